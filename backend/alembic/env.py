@@ -14,7 +14,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Import models and Base
 from app.db.database import Base
-from app.models import User, TextHistory
+from app.models import User, TextHistory, TextContent
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,65 @@
+"""History listing index, projection columns and compressed content store
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create text_contents table (large texts, compressed and stored once per hash)
+    op.create_table(
+        'text_contents',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('codec', sa.String(length=8), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('hash')
+    )
+
+    # Batch mode so SQLite can alter the column and add the foreign keys
+    with op.batch_alter_table('text_histories') as batch_op:
+        batch_op.alter_column('input_text', existing_type=sa.Text(), nullable=True)
+        batch_op.add_column(sa.Column('input_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('output_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('input_snippet', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('input_size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('output_size', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_text_histories_input_hash', 'text_contents', ['input_hash'], ['hash'])
+        batch_op.create_foreign_key('fk_text_histories_output_hash', 'text_contents', ['output_hash'], ['hash'])
+        batch_op.create_index('ix_text_histories_user_created_id', ['user_id', 'created_at', 'id'], unique=False)
+
+    # Fill the listing projection for existing rows (their texts stay inline)
+    op.execute(
+        "UPDATE text_histories SET input_snippet = substr(input_text, 1, 120), "
+        "input_size = length(input_text), output_size = length(output_result)"
+    )
+
+
+def downgrade() -> None:
+    # Rows whose texts moved to text_contents cannot be restored inline; drop them
+    op.execute("DELETE FROM text_histories WHERE input_text IS NULL")
+
+    with op.batch_alter_table('text_histories') as batch_op:
+        batch_op.drop_index('ix_text_histories_user_created_id')
+        batch_op.drop_constraint('fk_text_histories_output_hash', type_='foreignkey')
+        batch_op.drop_constraint('fk_text_histories_input_hash', type_='foreignkey')
+        batch_op.drop_column('output_size')
+        batch_op.drop_column('input_size')
+        batch_op.drop_column('input_snippet')
+        batch_op.drop_column('output_hash')
+        batch_op.drop_column('input_hash')
+        batch_op.alter_column('input_text', existing_type=sa.Text(), nullable=False)
+
+    op.drop_table('text_contents')
@@ -1,222 +1,543 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from typing import Literal, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
 from app.models.schemas import (
     GrammarCheckRequest, GrammarCheckResponse, GrammarError, GrammarErrorPosition,
     SummarizeRequest, SummarizeResponse,
-    SynonymsRequest, SynonymsResponse
+    SynonymsRequest, SynonymsResponse, BulkSynonymsRequest, BulkSynonymsResponse,
+    HistoryItem, HistoryPage, HistoryDetail
 )
-import language_tool_python
-from textblob import TextBlob
+from sqlalchemy.orm import Session
+from app.db.database import get_db, pool_status
+from app.models.text_history import TextHistory
 from nltk.corpus import wordnet
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
-from sumy.nlp.stemmers import Stemmer
-from sumy.utils import get_stop_words
 import nltk
-from app.utils.nlp import get_grammar_corrector
+import difflib
+import functools
+import hashlib
+import json
+import bisect
+import asyncio
+import concurrent.futures
+import os
+from app.utils.nlp import (
+    get_grammar_corrector, batch_correct, corrector_identity,
+    GeminiCorrector, CircuitOpenError
+)
+from app.utils.batching import SchedulerOverloaded, SchedulerStopped
+from app.utils.languagetool import get_language_tool, mark_language_tool_down
+from app.utils.merge import merge_errors
+from app.utils.spelling import get_spell_checker
+from app.utils.prefilter import get_prefilter, matches_by_sentence, prefilter_enabled
+from app.utils.summarizer import StreamingSummary, get_summarizer
+from app.utils.synonyms import (
+    SYNONYMS_TOP_K, get_synonym_index, rank_senses, signature, synonym_data_version, wordnet_senses
+)
+from app.utils.tokenizer import SentenceStream, segment, summary_words
+from app.utils.cache import get_result_cache, make_key, normalize_text
+from app.utils.auth import current_user_id, optional_user_id
+from app.utils.history import list_history, load_text, record
+from app.utils.memory import worker_memory
+from app.utils.admission import admission_stats
+from app.utils.pools import PoolOverloaded, check_spelling, get_pool, pool_stats, summarize_text
+from app.models.text_history import OperationType
+from app.utils import history, nlp
 
 router = APIRouter()
 
-# Initialize LanguageTool (keep remote server as primary)
-try:
-    tool = language_tool_python.LanguageTool('en-US', remote_server='https://api.languagetool.org/v2/')
-except Exception as e:
-    print(f"Warning: Could not initialize LanguageTool: {e}")
-    tool = None
+# Bump these when the output of an endpoint changes, to invalidate cached results
+_GRAMMAR_CACHE_VERSION = "1"
+_SUMMARY_CACHE_VERSION = "1"
+_SYNONYMS_CACHE_VERSION = "2"
+
+# Per-stage time budgets (seconds) for /check-grammar
+_neural_timeout = float(os.getenv("GRAMMAR_NEURAL_TIMEOUT", "20"))
+_spelling_timeout = float(os.getenv("GRAMMAR_SPELLING_TIMEOUT", "10"))
+
+# Bulk synonym lookups: words per request, and how long clients may cache a response (seconds)
+_bulk_max_words = int(os.getenv("SYNONYMS_BULK_MAX_WORDS", "2000"))
+_bulk_max_age = int(os.getenv("SYNONYMS_BULK_MAX_AGE", "86400"))
+
+class _UploadStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body iterator is still reading the request body.
+
+    The stock class listens for disconnects on receive() while streaming, which
+    would steal the upload's chunks; here request.stream() raises
+    ClientDisconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def _diff_errors(sentence, corrected_text):
+    """Map a corrected sentence back onto the original as word-level GrammarErrors."""
+    errors = []
+    orig_words = [token.text for token in sentence.tokens]
+    corr_words = corrected_text.split()
+    matcher = difflib.SequenceMatcher(None, orig_words, corr_words)
+
+    # Token offsets come straight from the segmenter (absolute positions)
+    word_positions = [(token.start, token.end) for token in sentence.tokens]
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'replace':
+            bad_phrase = " ".join(orig_words[i1:i2])
+            suggestion = " ".join(corr_words[j1:j2])
+            if i1 < len(word_positions):
+                start_char = word_positions[i1][0]
+                end_char = word_positions[i2-1][1] if i2 > 0 else start_char
+                errors.append(GrammarError(
+                    type='grammar',
+                    position=GrammarErrorPosition(start=start_char, end=end_char),
+                    suggestion=suggestion,
+                    message=f"Consider changing '{bad_phrase}' to '{suggestion}'"
+                ))
+        elif tag == 'delete':
+            bad_phrase = " ".join(orig_words[i1:i2])
+            if i1 < len(word_positions):
+                start_char = word_positions[i1][0]
+                end_char = word_positions[i2-1][1] if i2 > 0 else start_char
+                errors.append(GrammarError(
+                    type='grammar',
+                    position=GrammarErrorPosition(start=start_char, end=end_char),
+                    suggestion="",
+                    message=f"Consider removing '{bad_phrase}'"
+                ))
+        elif tag == 'insert':
+            suggestion = " ".join(corr_words[j1:j2])
+            if i1 < len(word_positions):
+                start_char = word_positions[i1][0]
+            else:
+                start_char = sentence.end
+            errors.append(GrammarError(
+                type='grammar',
+                position=GrammarErrorPosition(start=start_char, end=start_char + 1),
+                suggestion=suggestion,
+                message=f"Missing: '{suggestion}'"
+            ))
+    return errors
+
+async def _correct(corrector, sentences):
+    """Correct sentences: Gemini fans out over its async client, T5 batches on a worker thread."""
+    if isinstance(corrector, GeminiCorrector):
+        try:
+            return await corrector.acorrect(sentences)
+        except CircuitOpenError:
+            # Opened since get_grammar_corrector() picked it; the next request fails over
+            return [None] * len(sentences)
+    # All sentences go through the model in batches (shared across requests for T5)
+    return await asyncio.to_thread(batch_correct, corrector, sentences, max_length=128)
+
+async def _correct_cached(corrector, sentences):
+    """Correct sentences, only sending the ones without a cached correction to the model."""
+    cache = get_result_cache()
+    if cache is None:
+        return await _correct(corrector, sentences)
+
+    backend = corrector_identity(corrector)
+    keys = [make_key("grammar-neural", s, backend, _GRAMMAR_CACHE_VERSION) for s in sentences]
+    corrections = [cache.get(key) for key in keys]
+    missing = [i for i, c in enumerate(corrections) if c is None]
+    if missing:
+        fresh = await _correct(corrector, [sentences[i] for i in missing])
+        for i, corrected in zip(missing, fresh):
+            corrections[i] = corrected
+            cache.set(keys[i], corrected)
+    return corrections
+
+def _match_errors(matches, offset=0):
+    """Convert LanguageTool matches to GrammarErrors, shifted by offset."""
+    errors = []
+    for match in matches:
+        # We mainly want spelling from LT if T5 missed it, but LT finds grammar too.
+        error_type = 'spelling' if match.ruleIssueType == 'misspelling' else 'grammar'
+        errors.append(GrammarError(
+            type=error_type,
+            position=GrammarErrorPosition(start=offset + match.offset, end=offset + match.offset + match.errorLength),
+            suggestion=match.replacements[0] if match.replacements else "",
+            message=match.message
+        ))
+    return errors
+
+def _shift(error, offset):
+    return error.model_copy(update={'position': GrammarErrorPosition(
+        start=error.position.start + offset, end=error.position.end + offset
+    )})
+
+def _check_languagetool_cached(tool, text):
+    """Run LanguageTool, reusing cached per-sentence results.
+
+    On a cold document the whole text is checked once and the matches are split
+    per sentence; after an edit only the changed sentences are re-checked.
+    """
+    cache = get_result_cache()
+    sentences = segment(text).sentences if cache is not None else []
+    if not sentences:
+        return _match_errors(tool.check(text))
+
+    keys = [make_key("grammar-languagetool", s.text, "languagetool", _GRAMMAR_CACHE_VERSION) for s in sentences]
+    cached = [cache.get(key) for key in keys]
+    missing = [i for i, c in enumerate(cached) if c is None]
+
+    if len(missing) == len(sentences):
+        # Bucket whole-text matches by the sentence they start in (sentence-relative offsets)
+        starts = [s.start for s in sentences]
+        buckets = [[] for _ in sentences]
+        for error in _match_errors(tool.check(text)):
+            i = max(0, bisect.bisect_right(starts, error.position.start) - 1)
+            buckets[i].append(_shift(error, -starts[i]))
+        for i in missing:
+            cached[i] = [e.model_dump() for e in buckets[i]]
+            cache.set(keys[i], cached[i])
+    else:
+        for i in missing:
+            cached[i] = [e.model_dump() for e in _match_errors(tool.check(sentences[i].text))]
+            cache.set(keys[i], cached[i])
 
-@router.post("/check-grammar", response_model=GrammarCheckResponse)
-def check_grammar(request: GrammarCheckRequest):
     errors = []
-    corrector = get_grammar_corrector()
+    for sentence, sentence_errors in zip(sentences, cached):
+        errors.extend(_shift(GrammarError(**e), sentence.start) for e in sentence_errors)
+    return errors
+
+# The model is saturated, stuck or shutting down: the response lists the stage as timed out
+_NEURAL_UNAVAILABLE = (SchedulerOverloaded, SchedulerStopped, PoolOverloaded, concurrent.futures.TimeoutError)
+
+async def _neural_stage(text, checker_errors=None):
+    """Run the T5/Gemini context-aware check; returns (errors, sentences skipped by the pre-filter).
+
+    With `checker_errors` (the spelling stage's output), only the sentences the
+    pre-filter scores as suspicious are sent to the corrector.
+    """
+    # The first call may load the T5 model, so keep it off the event loop
+    corrector = await asyncio.to_thread(get_grammar_corrector)
     
-    # 1. Run T5 Context-Aware Check
     t5_errors = []
+    skipped = 0
     if corrector:
         try:
-            blob = TextBlob(request.text)
-            offset = 0
-            for sentence in blob.sentences:
-                original_text = str(sentence)
-                results = corrector(original_text, max_length=128)
-                if results and len(results) > 0:
-                    corrected_text = results[0]['generated_text']
-                    
-                    if corrected_text.strip() != original_text.strip():
-                        import difflib
-                        
-                        orig_words = original_text.split()
-                        corr_words = corrected_text.split()
-                        matcher = difflib.SequenceMatcher(None, orig_words, corr_words)
-                        
-                        # Map words to char positions
-                        word_positions = []
-                        current_pos = 0
-                        for word in orig_words:
-                            start = original_text.find(word, current_pos)
-                            if start == -1: start = current_pos # Fallback
-                            end = start + len(word)
-                            word_positions.append((start, end))
-                            current_pos = end
-                        
-                        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-                            if tag == 'replace':
-                                bad_phrase = " ".join(orig_words[i1:i2])
-                                suggestion = " ".join(corr_words[j1:j2])
-                                if i1 < len(word_positions):
-                                    start_char = word_positions[i1][0]
-                                    end_char = word_positions[i2-1][1] if i2 > 0 else start_char
-                                    t5_errors.append(GrammarError(
-                                        type='grammar',
-                                        position=GrammarErrorPosition(start=offset + start_char, end=offset + end_char),
-                                        suggestion=suggestion,
-                                        message=f"Consider changing '{bad_phrase}' to '{suggestion}'"
-                                    ))
-                            elif tag == 'delete':
-                                bad_phrase = " ".join(orig_words[i1:i2])
-                                if i1 < len(word_positions):
-                                    start_char = word_positions[i1][0]
-                                    end_char = word_positions[i2-1][1] if i2 > 0 else start_char
-                                    t5_errors.append(GrammarError(
-                                        type='grammar',
-                                        position=GrammarErrorPosition(start=offset + start_char, end=offset + end_char),
-                                        suggestion="",
-                                        message=f"Consider removing '{bad_phrase}'"
-                                    ))
-                            elif tag == 'insert':
-                                suggestion = " ".join(corr_words[j1:j2])
-                                if i1 < len(word_positions):
-                                    start_char = word_positions[i1][0]
-                                else:
-                                    start_char = len(original_text)
-                                t5_errors.append(GrammarError(
-                                        type='grammar',
-                                        position=GrammarErrorPosition(start=offset + start_char, end=offset + start_char + 1),
-                                        suggestion=suggestion,
-                                        message=f"Missing: '{suggestion}'"
-                                    ))
-
-                # Simple offset update - robust enough for simple spacing
-                offset += len(original_text) + (1 if offset + len(original_text) < len(request.text) else 0)
+            sentences = segment(text).sentences
+            prefilter = await asyncio.to_thread(get_prefilter) if checker_errors is not None else None
+            if prefilter is not None:
+                selected = prefilter.select(
+                    [s.text for s in sentences], matches_by_sentence(sentences, checker_errors)
+                )
+                skipped = len(sentences) - len(selected)
+                sentences = [sentences[i] for i in selected]
+            corrections = await _correct_cached(corrector, [s.text for s in sentences])
+            for sentence, corrected_text in zip(sentences, corrections):
+                if corrected_text is not None and corrected_text.strip() != sentence.text.strip():
+                    t5_errors.extend(_diff_errors(sentence, corrected_text))
 
+        except _NEURAL_UNAVAILABLE:
+            raise  # Reported in `timed_out` by _run_stage
         except Exception as e:
             print(f"T5 Error: {e}")
+    return t5_errors, skipped
 
-    # 2. Run Spelling Check (LanguageTool or TextBlob)
-    spelling_errors = []
-    
-    # Try LanguageTool first
+def _spelling_stage(text):
+    """Run the spelling check (LanguageTool, or the offline engine when LanguageTool is down).
+
+    Returns the errors keyed by the checker that produced them.
+    """
+    # Try LanguageTool first (remote or local server; reconnects lazily after failures)
+    tool = get_language_tool()
     if tool:
         try:
-            matches = tool.check(request.text)
-            for match in matches:
-                # We mainly want spelling from LT if T5 missed it, but LT finds grammar too.
-                error_type = 'spelling' if match.ruleIssueType == 'misspelling' else 'grammar'
-                spelling_errors.append(GrammarError(
-                    type=error_type,
-                    position=GrammarErrorPosition(start=match.offset, end=match.offset + match.errorLength),
-                    suggestion=match.replacements[0] if match.replacements else "",
-                    message=match.message
-                ))
-        except Exception:
-            pass
+            return {"languagetool": _check_languagetool_cached(tool, text)}
+        except Exception as e:
+            print(f"LanguageTool Error: {e}")
+            mark_language_tool_down()
             
-    # Fallback/Augment with TextBlob for pure spelling if LT failed or empty?
-    # For now, let's rely on LT if available. If not, TextBlob.
-    if not spelling_errors and not tool:
-        blob = TextBlob(request.text)
-        offset = 0
-        for word in blob.words:
-            corrected = word.correct()
-            if word != corrected and len(word) > 1:
-                # Find position
-                start = request.text.find(word, offset)
-                if start != -1:
-                    spelling_errors.append(GrammarError(
-                        type='spelling',
-                        position=GrammarErrorPosition(start=start, end=start+len(word)),
-                        suggestion=str(corrected),
-                        message=f"Possible spelling mistake: {word}"
-                    ))
-                    offset = start + len(word)
+    # Fallback to the offline engine (TextBlob's dictionary) if LT is unavailable
+    spelling_errors = []
+    for start, end, word, suggestion in _offline_spelling(text):
+        spelling_errors.append(GrammarError(
+            type='spelling',
+            position=GrammarErrorPosition(start=start, end=end),
+            suggestion=suggestion,
+            message=f"Possible spelling mistake: {word}"
+        ))
+    return {"textblob": spelling_errors}
 
-    # 3. Merge & Dedup
-    # Priority: T5 errors > Spelling errors.
-    # If a spelling error overlaps with a T5 error, assume T5 handled it (rewrote the phrase).
-    
-    final_errors = list(t5_errors)
-    
-    for s_err in spelling_errors:
-        is_covered = False
-        s_start = s_err.position.start
-        s_end = s_err.position.end
-        
-        for t_err in t5_errors:
-            t_start = t_err.position.start
-            t_end = t_err.position.end
-            
-            # Check overlap
-            if max(s_start, t_start) < min(s_end, t_end):
-                is_covered = True
-                break
-        
-        if not is_covered:
-            final_errors.append(s_err)
+def _offline_spelling(text):
+    """Misspelled words from the offline engine, in the 'spelling' process pool if there is one."""
+    pool = get_pool("spelling")
+    if pool is not None:
+        try:
+            return pool.call(check_spelling, text)
+        except PoolOverloaded:
+            pass  # A busy pool shouldn't fail the check; run it here
+    return get_spell_checker().check_words(segment(text).words)
 
-    final_errors.sort(key=lambda x: x.position.start)
-    return GrammarCheckResponse(errors=final_errors)
+async def _run_stage(name, stage, text, timeout, timed_out, default):
+    """Run a stage under a deadline; on timeout record its name and return `default`.
 
-    return GrammarCheckResponse(errors=errors)
+    Blocking stages run on a worker thread, which can't be interrupted and
+    finishes in the background. A neural stage that can't get the model
+    (queue full, wait too long, shutting down) counts as timed out too.
+    """
+    if asyncio.iscoroutinefunction(stage):
+        work = stage(text)
+    else:
+        work = asyncio.to_thread(stage, text)
+    try:
+        return await asyncio.wait_for(work, timeout)
+    except asyncio.TimeoutError:
+        print(f"Grammar stage '{name}' timed out after {timeout}s")
+        timed_out.append(name)
+        return default
+    except _NEURAL_UNAVAILABLE as e:
+        print(f"Grammar stage '{name}' gave up: {type(e).__name__}: {e}")
+        timed_out.append(name)
+        return default
+
+@router.post("/check-grammar", response_model=GrammarCheckResponse)
+async def check_grammar(request: GrammarCheckRequest, http_request: Request,
+                        user_id: Optional[int] = Depends(optional_user_id)):
+    timed_out = []
+    # Set by the admission middleware when the grammar budget is saturated
+    degraded = getattr(http_request.state, "degraded", False)
+    if degraded:
+        # LanguageTool (or the offline engine) only
+        spelling_errors = await _run_stage(
+            "spelling", _spelling_stage, request.text, _spelling_timeout, timed_out, {}
+        )
+        t5_errors, skipped = [], 0
+    elif prefilter_enabled():
+        # 1. Spelling/LanguageTool first: its matches feed the pre-filter...
+        spelling_errors = await _run_stage(
+            "spelling", _spelling_stage, request.text, _spelling_timeout, timed_out, {}
+        )
+        # 2. ...which forwards only suspicious sentences to the neural check
+        checker_errors = [error for errors in spelling_errors.values() for error in errors]
+        t5_errors, skipped = await _run_stage(
+            "neural", functools.partial(_neural_stage, checker_errors=checker_errors),
+            request.text, _neural_timeout, timed_out, ([], 0)
+        )
+    else:
+        # 1 & 2. Run the neural check and the spelling check concurrently, each with its own budget
+        (t5_errors, skipped), spelling_errors = await asyncio.gather(
+            _run_stage("neural", _neural_stage, request.text, _neural_timeout, timed_out, ([], 0)),
+            _run_stage("spelling", _spelling_stage, request.text, _spelling_timeout, timed_out, {}),
+        )
+
+    # 3. Merge & Dedup
+    # Priority: T5 errors > LanguageTool > TextBlob.
+    # If a spelling error overlaps with a T5 error, assume T5 handled it (rewrote the phrase).
+    final_errors = merge_errors({"neural": t5_errors, **spelling_errors})
+    response = GrammarCheckResponse(
+        errors=final_errors, timed_out=timed_out, skipped_sentences=skipped, degraded=degraded
+    )
+    record(OperationType.GRAMMAR_CHECK, request.text, response.model_dump_json(), user_id)
+    return response
 
 @router.post("/summarize", response_model=SummarizeResponse)
-def summarize(request: SummarizeRequest):
+def summarize(request: SummarizeRequest, user_id: Optional[int] = Depends(optional_user_id)):
     text = request.text
     if not text.strip():
         return SummarizeResponse(summary="")
-        
+
     try:
-        parser = PlaintextParser.from_string(text, Tokenizer("english"))
-        stemmer = Stemmer("english")
-        summarizer = LsaSummarizer(stemmer)
-        summarizer.stop_words = get_stop_words("english")
-        
-        # Summarize to 20% of sentences or at least 3
-        # Improve logic: count sentences first
-        sentences = list(parser.document.sentences)
-        sentence_count = len(sentences)
-        
-        if sentence_count <= 2:
-            return SummarizeResponse(summary=text)
-            
-        count = max(2, int(sentence_count * 0.3))
-        summary_sentences = summarizer(parser.document, count)
-        
-        summary = " ".join([str(s) for s in summary_sentences])
-        return SummarizeResponse(summary=summary)
+        engine = get_summarizer(request.algorithm)
+    except ValueError as e:
+        print(f"Summarization error: {e}")
+        return SummarizeResponse(summary=text)
+
+    cache = get_result_cache()
+    key = make_key("summarize", normalize_text(text), engine.identity, _SUMMARY_CACHE_VERSION)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            record(OperationType.SUMMARIZE, text, cached, user_id)
+            return SummarizeResponse(summary=cached)
+
+    pool = get_pool("summarize")
+    try:
+        # Summarize to 30% of sentences, at least 2 (texts of 1-2 sentences are returned as-is)
+        if pool is not None:
+            summary = pool.call(summarize_text, request.algorithm, text)
+        else:
+            summary = engine.summarize(text)
+    except PoolOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Summarization error: {e}")
         # Fallback
         return SummarizeResponse(summary=text)
 
+    if cache is not None:
+        cache.set(key, summary)
+    record(OperationType.SUMMARIZE, text, summary, user_id)
+    return SummarizeResponse(summary=summary)
+
+@router.post("/summarize/stream")
+async def summarize_stream(request: Request, algorithm: Optional[Literal["lsa", "textrank", "centroid"]] = None):
+    """Summarize a (chunked) plain-text upload of any length (algorithm as a query parameter).
+
+    Streams NDJSON: one {"section", "summary"} line per finished section, then
+    {"final": true, "summary", "sentences", "sections"} at the end.
+    """
+    stream = SentenceStream()
+    summary = StreamingSummary(get_summarizer(algorithm))
+
+    async def add(sentences):
+        if not sentences:
+            return []
+        first = summary.sections
+        # Summarizing a section is CPU work; keep it off the event loop
+        finished = await asyncio.to_thread(summary.extend, sentences)
+        return [json.dumps({"section": first + i, "summary": text}) + "\n" for i, text in enumerate(finished)]
+
+    async def events():
+        try:
+            async for chunk in request.stream():
+                for line in await add(stream.feed(chunk)):
+                    yield line
+            for line in await add(stream.close()):
+                yield line
+            final = await asyncio.to_thread(summary.finish)
+            yield json.dumps({
+                "final": True, "summary": final,
+                "sentences": summary.sentences, "sections": summary.sections,
+            }) + "\n"
+        except ClientDisconnect:
+            return
+        except Exception as e:
+            print(f"Streaming summarization error: {e}")
+            yield json.dumps({"error": "summarization failed"}) + "\n"
+
+    return _UploadStreamingResponse(events(), media_type="application/x-ndjson")
+
 @router.post("/synonyms", response_model=SynonymsResponse)
-def get_synonyms(request: SynonymsRequest):
-    word = request.word.lower()
-    synonyms = set()
-    
+def get_synonyms(request: SynonymsRequest, user_id: Optional[int] = Depends(optional_user_id)):
+    context = signature(request.text) if request.text else None
+    synonyms = _synonyms_for(request.word.lower(), context)
+    record(OperationType.SYNONYM_LOOKUP, request.word, json.dumps(synonyms), user_id)
+    return SynonymsResponse(synonyms=synonyms)
+
+def _synonyms_for(word, context=None):
+    """Top synonyms of a lowercased word, ranked for a context signature() if given."""
+    index = get_synonym_index()
+    if index is not None:
+        # A probe into the prebuilt index is cheaper than the result cache
+        return index.rank(word, context) or _COMMON_SYNONYMS.get(word, [])
+
+    cache = get_result_cache()
+    context_key = " ".join(sorted(context)) if context else ""
+    key = make_key("synonyms", f"{normalize_text(word)}\n{context_key}", f"wordnet-k{SYNONYMS_TOP_K}", _SYNONYMS_CACHE_VERSION)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    synonyms = _lookup_synonyms(word, context)
+    if cache is not None:
+        cache.set(key, synonyms)
+    return synonyms
+
+def _bulk_etag(words, context):
+    """ETag for a bulk lookup: changes with the (ordered) words, the context and the synonym data."""
+    digest = hashlib.sha256("\n".join(
+        [synonym_data_version(), _SYNONYMS_CACHE_VERSION, str(SYNONYMS_TOP_K), " ".join(sorted(context or ()))] + words
+    ).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _bulk_synonyms(words, text, if_none_match):
+    # Case-fold and dedupe server-side; with no word list, look up every word in the text
+    if words is None:
+        words = summary_words(text or "")
+    unique = list(dict.fromkeys(w.strip().lower() for w in words if w.strip()))[:_bulk_max_words]
+
+    context = signature(text) if text else None
+    etag = _bulk_etag(unique, context)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={_bulk_max_age}"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    body = BulkSynonymsResponse(synonyms={word: _synonyms_for(word, context) for word in unique})
+    return JSONResponse(body.model_dump(), headers=headers)
+
+@router.post("/synonyms/bulk", response_model=BulkSynonymsResponse)
+def get_synonyms_bulk(request: BulkSynonymsRequest, if_none_match: Optional[str] = Header(None)):
+    """Synonyms for many words at once (or for every word of `text`)."""
+    return _bulk_synonyms(request.words, request.text, if_none_match)
+
+@router.get("/synonyms/bulk", response_model=BulkSynonymsResponse)
+def get_synonyms_bulk_cacheable(words: str = "", if_none_match: Optional[str] = Header(None)):
+    """GET form of the bulk lookup (comma-separated words), cacheable by browsers and proxies."""
+    return _bulk_synonyms(words.split(","), None, if_none_match)
+
+# Used when WordNet has nothing for a word
+_COMMON_SYNONYMS = {
+    'good': ['excellent', 'great', 'superb', 'fine'],
+}
+
+def _lookup_synonyms(word, context=None):
+    synonyms = []
+
     try:
         # Use NLTK WordNet
-        for syn in wordnet.synsets(word):
-            for lemma in syn.lemmas():
-                name = lemma.name().replace('_', ' ')
-                if name.lower() != word:
-                    synonyms.add(name)
+        synonyms = rank_senses(word, wordnet_senses(wordnet, word), context)
     except Exception as e:
         print(f"WordNet error: {e}")
 
     # Fallback/Hardcoded list if NLTK empty (for common words not in wordnet?? usually everything is in wordnet)
     if not synonyms:
-         common_synonyms = {
-            'good': ['excellent', 'great', 'superb', 'fine'],
-         }
-         return SynonymsResponse(synonyms=common_synonyms.get(word, []))
+         return _COMMON_SYNONYMS.get(word, [])
          
-    return SynonymsResponse(synonyms=list(synonyms))
+    return synonyms
+
+def _history_item(row):
+    return dict(
+        id=row.id, user_id=row.user_id, operation=row.operation_type.value, created_at=row.created_at,
+        snippet=row.input_snippet, input_size=row.input_size, output_size=row.output_size,
+    )
+
+@router.get("/history", response_model=HistoryPage)
+def get_history(limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None,
+                user_id: int = Depends(current_user_id), db: Session = Depends(get_db)):
+    """The authenticated user's history, newest first. Texts are fetched per entry."""
+    try:
+        rows, next_cursor = list_history(db, user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return HistoryPage(items=[HistoryItem(**_history_item(row)) for row in rows], next_cursor=next_cursor)
+
+@router.get("/history/{history_id}", response_model=HistoryDetail)
+def get_history_entry(history_id: int, user_id: int = Depends(current_user_id), db: Session = Depends(get_db)):
+    row = db.get(TextHistory, history_id)
+    # Other users' entries are reported as missing rather than forbidden
+    if row is None or row.user_id != user_id:
+        raise HTTPException(status_code=404, detail="History entry not found")
+    return HistoryDetail(
+        **_history_item(row),
+        input_text=load_text(db, row.input_text, row.input_hash),
+        output_result=load_text(db, row.output_result, row.output_hash),
+    )
+
+@router.get("/metrics")
+def metrics():
+    """Runtime counters for the caches, inference workers and process pools."""
+    cache = get_result_cache()
+    scheduler = nlp.inference_scheduler
+    gemini = nlp.gemini_corrector
+    recorder = history.history_recorder
+    return {
+        "cache": cache.stats() if cache is not None else None,
+        "scheduler": scheduler.stats() if scheduler is not None else None,
+        "gemini_circuit": gemini.breaker.state if gemini is not None else None,
+        "history": recorder.stats() if recorder is not None else None,
+        "database": pool_status(),
+        # Per worker; under serve.py most of the RSS is shared with the master (see pss_mb)
+        "memory": worker_memory(),
+        "pools": pool_stats(),
+        "admission": admission_stats(),
+    }
@@ -1,4 +1,4 @@
 """Database package."""
-from app.db.database import Base, engine, SessionLocal, get_db, init_db
+from app.db.database import Base, engine, SessionLocal, get_db, init_db, pool_status
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db", "init_db"]
+__all__ = ["Base", "engine", "SessionLocal", "get_db", "init_db", "pool_status"]
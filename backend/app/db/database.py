@@ -1,26 +1,132 @@
 """Database configuration and session management."""
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 # Get database URL from environment, default to SQLite for development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./studykit.db")
 
-# SQLite needs check_same_thread=False
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Connection pool (ignored for in-memory SQLite)
+_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    echo=os.getenv("ENVIRONMENT") == "development"
-)
+# SQLite pragmas applied to every new connection
+_sqlite_wal = os.getenv("SQLITE_WAL", "true").lower() == "true"
+_sqlite_mmap_size = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+_sqlite_busy_timeout_ms = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+class PoolStats:
+    """How long callers waited to check a connection out of the pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, wait, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def stats(self):
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+pool_stats = PoolStats()
+
+
+class _TimedPool:
+    """Pool mixin recording checkout wait (including connecting, when the pool has to) in pool_stats."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            # The pool stayed exhausted for pool_timeout seconds
+            pool_stats.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.observe(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    pass
+
+
+def _is_sqlite(url):
+    return url.startswith("sqlite")
+
+
+def _is_memory_sqlite(url):
+    return _is_sqlite(url) and (":memory:" in url or url.split("?")[0].rstrip("/") == "sqlite:")
+
+
+def engine_options(url):
+    """create_engine() keyword arguments for a URL, from the DB_* and SQLITE_* settings."""
+    options = {"echo": os.getenv("ENVIRONMENT") == "development"}
+    if _is_sqlite(url):
+        # SQLite needs check_same_thread=False
+        options["connect_args"] = {"check_same_thread": False}
+    if not _is_memory_sqlite(url):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=_pool_size,
+            max_overflow=_max_overflow,
+            pool_timeout=_pool_timeout,
+            pool_recycle=_pool_recycle,
+            pool_pre_ping=_pool_pre_ping,
+        )
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        if _sqlite_wal:
+            # Readers no longer block the writer (and the history flush no longer blocks readers)
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL: only a power loss can drop the last transactions
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        if _sqlite_mmap_size:
+            cursor.execute(f"PRAGMA mmap_size={_sqlite_mmap_size}")
+        cursor.execute(f"PRAGMA busy_timeout={_sqlite_busy_timeout_ms}")
+    finally:
+        cursor.close()
+
+
+def make_engine(url):
+    """Create a pooled engine; SQLite connections get the WAL/synchronous/mmap pragmas."""
+    created = create_engine(url, **engine_options(url))
+    if _is_sqlite(url) and not _is_memory_sqlite(url):
+        event.listen(created, "connect", _set_sqlite_pragmas)
+    return created
+
+
+engine = make_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-
 def get_db():
     """Dependency for getting database sessions."""
     db = SessionLocal()
@@ -30,6 +136,16 @@ def get_db():
         db.close()
 
 
+def pool_status(bound=None):
+    """Pool occupancy plus checkout wait times, for /api/metrics."""
+    pool = (bound or engine).pool
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    status.update(pool_stats.stats())
+    return status
+
+
 def init_db():
     """Initialize database tables."""
     Base.metadata.create_all(bind=engine)
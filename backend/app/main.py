@@ -1,20 +1,39 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from contextlib import asynccontextmanager
 from app.api.endpoints import router as api_router
-from app.utils.nlp import init_nlp
+from app.utils.nlp import close_gemini_corrector, init_nlp, stop_inference_scheduler
+from app.utils.languagetool import shutdown_language_tool, start_language_tool
+from app.utils.history import start_history_recorder, stop_history_recorder
+from app.utils.assets import readiness, start_startup
+from app.utils.pools import start_pools, stop_pools
+from app.utils.admission import AdmissionMiddleware
 import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load NLP models
-    init_nlp()
+    # Check the NLP assets and warm up in the background, so requests are served right away
+    start_startup(init_nlp)
+    # LanguageTool (and its local server) comes up in the background; the offline engine covers until then
+    start_language_tool()
+    start_history_recorder()
+    # Warm the process pools for the CPU-bound stages (when NLP_PROCESS_POOLS is on)
+    start_pools()
     yield
+    stop_inference_scheduler()
+    await close_gemini_corrector()
+    stop_pools()
+    shutdown_language_tool()
+    # Write out buffered history before exiting
+    stop_history_recorder()
 
 app = FastAPI(title="StudyKit API", version="1.0.0", lifespan=lifespan)
 
+# Per-route concurrency budgets; shed requests get 429/503 with Retry-After (inside CORS, so they carry its headers)
+app.add_middleware(AdmissionMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +49,12 @@ app.include_router(api_router, prefix="/api")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/ready")
+def readiness_check():
+    # 503 until the NLP assets are in place; warm-ups may still be running
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
 # Serve static files if directory exists (Production/Docker)
 static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
 if os.path.exists(static_dir):
@@ -1,5 +1,6 @@
 """Database models."""
 from app.models.user import User
 from app.models.text_history import TextHistory
+from app.models.text_content import TextContent
 
-__all__ = ["User", "TextHistory"]
+__all__ = ["User", "TextHistory", "TextContent"]
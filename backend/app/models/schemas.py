@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 class GrammarCheckRequest(BaseModel):
     text: str
@@ -16,9 +17,13 @@ class GrammarError(BaseModel):
 
 class GrammarCheckResponse(BaseModel):
     errors: List[GrammarError]
+    timed_out: List[str] = [] # stages that missed their deadline: neural, spelling
+    skipped_sentences: int = 0 # sentences the pre-filter kept away from the neural corrector
+    degraded: bool = False # admitted under load: LanguageTool-only, no neural stage
 
 class SummarizeRequest(BaseModel):
     text: str
+    algorithm: Optional[Literal["lsa", "textrank", "centroid"]] = None # default: SUMMARY_ALGORITHM
 
 class SummarizeResponse(BaseModel):
     summary: str
@@ -29,3 +34,27 @@ class SynonymsRequest(BaseModel):
 
 class SynonymsResponse(BaseModel):
     synonyms: List[str]
+
+class BulkSynonymsRequest(BaseModel):
+    words: Optional[List[str]] = None # default: every word of `text`
+    text: Optional[str] = None
+
+class BulkSynonymsResponse(BaseModel):
+    synonyms: Dict[str, List[str]] # keyed by the lowercased word
+
+class HistoryItem(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    operation: str # grammar_check, summarize, synonym_lookup
+    created_at: Optional[datetime] = None
+    snippet: Optional[str] = None # start of the input
+    input_size: Optional[int] = None # characters
+    output_size: Optional[int] = None
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None # pass as `cursor` for the next (older) page; null on the last page
+
+class HistoryDetail(HistoryItem):
+    input_text: Optional[str] = None
+    output_result: Optional[str] = None
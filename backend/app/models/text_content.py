@@ -0,0 +1,19 @@
+"""Content-addressed store for large history texts."""
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class TextContent(Base):
+    """Compressed text keyed by its SHA-256, shared by every history row that submitted it."""
+
+    __tablename__ = "text_contents"
+
+    hash = Column(String(64), primary_key=True)
+    codec = Column(String(8), nullable=False)  # compression of `data`: "zlib"
+    size = Column(Integer, nullable=False)  # uncompressed length in characters
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<TextContent(hash={self.hash[:12]}, codec={self.codec}, size={self.size})>"
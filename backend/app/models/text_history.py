@@ -1,5 +1,5 @@
 """Text history model for storing user's processed texts."""
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -21,10 +21,22 @@ class TextHistory(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     operation_type = Column(Enum(OperationType), nullable=False, index=True)
-    input_text = Column(Text, nullable=False)
+    # Short texts are stored inline; long ones live compressed in text_contents (see app.utils.history)
+    input_text = Column(Text, nullable=True)
     output_result = Column(Text, nullable=True)
+    input_hash = Column(String(64), ForeignKey("text_contents.hash"), nullable=True)
+    output_hash = Column(String(64), ForeignKey("text_contents.hash"), nullable=True)
+    # Listing projection, readable without loading either text
+    input_snippet = Column(String(200), nullable=True)
+    input_size = Column(Integer, nullable=True)
+    output_size = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Keyset pagination of a user's history, newest first
+    __table_args__ = (
+        Index("ix_text_histories_user_created_id", "user_id", "created_at", "id"),
+    )
+
     # Relationship to user
     user = relationship("User", back_populates="text_histories")
 
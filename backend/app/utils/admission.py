@@ -0,0 +1,228 @@
+"""Admission control: per-route concurrency budgets with bounded wait queues.
+
+Without it, a burst of /check-grammar requests queues up behind the T5 model
+and LanguageTool until everything times out, and cheap routes wait behind them
+for threadpool slots. Each route group gets its own budget: up to
+`concurrency` requests run at once, up to `queue` more wait (for at most
+ADMISSION_QUEUE_TIMEOUT seconds), and the rest are shed right away:
+
+- 429 when the wait queue is full
+- 503 when a queued request waited too long
+
+Both come with a Retry-After estimated from the route's recent latency. A
+/check-grammar request that would be shed is first retried on a separate
+LanguageTool-only budget: it runs without the neural stage and its response
+says `degraded: true`. /health, /ready and /api/metrics are never queued.
+Budgets are per process (per worker under serve.py).
+"""
+import asyncio
+import collections
+import math
+import os
+import time
+
+from starlette.responses import JSONResponse
+
+_admission_enabled = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+_queue_timeout = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+
+# Budget name -> (concurrency, wait queue size)
+BUDGETS = {
+    "grammar": (int(os.getenv("ADMISSION_GRAMMAR_CONCURRENCY", "8")), int(os.getenv("ADMISSION_GRAMMAR_QUEUE", "32"))),
+    "grammar-degraded": (
+        int(os.getenv("ADMISSION_GRAMMAR_DEGRADED_CONCURRENCY", "16")),
+        int(os.getenv("ADMISSION_GRAMMAR_DEGRADED_QUEUE", "32")),
+    ),
+    "summarize": (int(os.getenv("ADMISSION_SUMMARIZE_CONCURRENCY", "4")), int(os.getenv("ADMISSION_SUMMARIZE_QUEUE", "16"))),
+    "synonyms": (int(os.getenv("ADMISSION_SYNONYMS_CONCURRENCY", "64")), int(os.getenv("ADMISSION_SYNONYMS_QUEUE", "256"))),
+    "default": (int(os.getenv("ADMISSION_DEFAULT_CONCURRENCY", "32")), int(os.getenv("ADMISSION_DEFAULT_QUEUE", "64"))),
+}
+
+# Path prefix -> budget name, first match wins; None means never queued
+ROUTES = (
+    ("/health", None),
+    ("/ready", None),
+    ("/api/metrics", None),
+    ("/api/check-grammar", "grammar"),
+    ("/api/summarize", "summarize"),
+    ("/api/synonyms", "synonyms"),
+    ("/api/", "default"),
+)
+
+
+class Shed(Exception):
+    """Raised when a request is turned away; carries the status code and Retry-After seconds."""
+
+    def __init__(self, status_code, retry_after, reason):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class Budget:
+    """A concurrency limit with a FIFO wait queue, for one event loop."""
+
+    def __init__(self, name, concurrency, queue_size, queue_timeout=2.0):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = collections.deque()
+        # Smoothed seconds per request, for Retry-After
+        self._latency = None
+
+        # Counters
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.peak_active = 0
+        self.peak_waiting = 0
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: the queue ahead, served `concurrency` at a time."""
+        latency = self._latency if self._latency is not None else 1.0
+        return max(1, math.ceil(latency * (self.waiting + 1) / self.concurrency))
+
+    def _admit(self):
+        self.admitted += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    async def acquire(self):
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self._admit()
+            return
+        if self.waiting >= self.queue_size:
+            self.shed_queue_full += 1
+            raise Shed(429, self.retry_after(), f"Too many '{self.name}' requests waiting")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed_timeout += 1
+            raise Shed(503, self.retry_after(), f"Timed out waiting for a '{self.name}' slot")
+        except asyncio.CancelledError:
+            # Client went away; pass on a slot that was already handed over
+            if waiter.done() and not waiter.cancelled():
+                self._hand_over()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self._admit()
+
+    def _hand_over(self):
+        # The slot goes straight to the next waiter, so `active` is unchanged
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def release(self, elapsed):
+        self._latency = elapsed if self._latency is None else 0.8 * self._latency + 0.2 * elapsed
+        self._hand_over()
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "peak_active": self.peak_active,
+            "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "shed": self.shed_queue_full + self.shed_timeout,
+            "avg_latency_ms": round(self._latency * 1000, 1) if self._latency is not None else None,
+        }
+
+
+def budget_for(path):
+    for prefix, name in ROUTES:
+        if path.startswith(prefix):
+            return name
+    return None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the route budgets (pure ASGI, so streamed bodies pass through untouched)."""
+
+    def __init__(self, app, budgets=None, queue_timeout=None, enabled=None):
+        self.app = app
+        self.enabled = _admission_enabled if enabled is None else enabled
+        timeout = _queue_timeout if queue_timeout is None else queue_timeout
+        self.budgets = {
+            name: Budget(name, concurrency, queue_size, timeout)
+            for name, (concurrency, queue_size) in (budgets or BUDGETS).items()
+        }
+        self.degraded = 0
+        self.rejected = 0
+        global admission
+        admission = self
+
+    async def __call__(self, scope, receive, send):
+        name = budget_for(scope["path"]) if scope["type"] == "http" and self.enabled else None
+        budget = self.budgets.get(name)
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await budget.acquire()
+        except Shed as shed:
+            fallback = self.budgets.get(f"{name}-degraded")
+            if fallback is None:
+                await self._reject(shed, scope, receive, send)
+                return
+            try:
+                await fallback.acquire()
+            except Shed:
+                await self._reject(shed, scope, receive, send)
+                return
+            # The endpoint reads this from request.state and skips its expensive stage
+            budget = fallback
+            self.degraded += 1
+            scope.setdefault("state", {})["degraded"] = True
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            budget.release(time.perf_counter() - started)
+
+    async def _reject(self, shed, scope, receive, send):
+        self.rejected += 1
+        response = JSONResponse(
+            {"detail": str(shed)}, status_code=shed.status_code, headers={"Retry-After": str(shed.retry_after)}
+        )
+        await response(scope, receive, send)
+
+    def stats(self):
+        return {
+            # Requests turned away with 429/503, and /check-grammar requests run LanguageTool-only instead
+            "rejected": self.rejected,
+            "degraded": self.degraded,
+            "budgets": {name: budget.stats() for name, budget in self.budgets.items()},
+        }
+
+
+# The middleware instance built by the app (Starlette builds it when the app starts)
+admission = None
+
+
+def admission_stats():
+    return admission.stats() if admission is not None and admission.enabled else None
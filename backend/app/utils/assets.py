@@ -0,0 +1,221 @@
+"""Versioned local bundle of NLP assets, and background warm-up after startup.
+
+Startup used to call `nltk.download` for every package on every boot (network
+round trips even when the data was already there) and warm TextBlob up before
+the first request could be served. Instead, `python -m app.utils.assets`
+prebuilds a bundle directory with the NLTK data and the synonym index, plus a
+manifest recording the bundle version. On boot, a manifest with the current
+version is trusted as-is, so a warm start touches neither the network nor the
+NLTK data; only a missing or outdated bundle is (re)downloaded.
+
+`start_startup()` runs that check and then the warm-ups (punkt, the spelling
+index, the summarizer, the synonym index) in a background thread, so the server
+accepts requests immediately. `/ready` reports 503 until the assets are in
+place (and for good if the check fails) and lists the warm-up progress; `/health` stays a plain liveness check.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+# Bump when the bundle's contents change, so existing bundles are rebuilt
+ASSET_BUNDLE_VERSION = 1
+
+NLP_ASSET_DIR = os.getenv("NLP_ASSET_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "nlp"
+)
+_download_missing = os.getenv("NLP_ASSET_DOWNLOAD", "true").lower() == "true"
+_warmup_enabled = os.getenv("NLP_WARMUP", "true").lower() == "true"
+
+_MANIFEST = "manifest.json"
+
+# NLTK package -> resource path checked with nltk.data.find
+NLTK_PACKAGES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+}
+
+# Startup progress reported by /ready
+_state = {"assets": "pending", "missing": [], "warmup": {}}
+_state_lock = threading.Lock()
+_startup_thread = None
+
+
+def _register_path(asset_dir):
+    import nltk
+
+    if asset_dir not in nltk.data.path:
+        nltk.data.path.insert(0, asset_dir)
+
+
+def read_manifest(asset_dir=None):
+    try:
+        with open(os.path.join(asset_dir or NLP_ASSET_DIR, _MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(asset_dir, packages):
+    manifest = {"version": ASSET_BUNDLE_VERSION, "nltk": sorted(packages), "built_at": int(time.time())}
+    os.makedirs(asset_dir, exist_ok=True)
+    path = os.path.join(asset_dir, _MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+def _found(resource):
+    import nltk
+
+    try:
+        nltk.data.find(resource)
+        return True
+    except LookupError:
+        return False
+
+
+def _in_bundle(asset_dir, resource):
+    path = os.path.join(asset_dir, *resource.split("/"))
+    return os.path.exists(path) or os.path.exists(path + ".zip")
+
+
+def ensure_assets(asset_dir=None, download=None):
+    """Make the NLTK data available; returns the packages still missing.
+
+    A current manifest in the bundle directory is trusted without looking at the
+    data. Otherwise each package is looked up (in the bundle or any other NLTK
+    data path) and only the missing ones are downloaded into the bundle.
+    """
+    asset_dir = asset_dir or NLP_ASSET_DIR
+    download = _download_missing if download is None else download
+    _register_path(asset_dir)
+
+    manifest = read_manifest(asset_dir)
+    if manifest and manifest.get("version") == ASSET_BUNDLE_VERSION and set(NLTK_PACKAGES) <= set(manifest["nltk"]):
+        return []
+
+    missing = [package for package, resource in NLTK_PACKAGES.items() if not _found(resource)]
+    if missing and download:
+        import nltk
+
+        print(f"Downloading NLP assets into {asset_dir}: {', '.join(missing)}")
+        for package in missing:
+            nltk.download(package, download_dir=asset_dir, quiet=True)
+        missing = [package for package in missing if not _found(NLTK_PACKAGES[package])]
+    if missing:
+        print(f"Warning: NLP assets unavailable, using fallbacks: {', '.join(missing)}")
+    elif all(_in_bundle(asset_dir, resource) for resource in NLTK_PACKAGES.values()):
+        # The bundle is complete: the next boot can skip the lookups
+        _write_manifest(asset_dir, NLTK_PACKAGES)
+    return missing
+
+
+def build_bundle(asset_dir=None):
+    """Download every package into the bundle directory and build the synonym index there."""
+    import nltk
+    from app.utils import synonyms
+
+    asset_dir = asset_dir or NLP_ASSET_DIR
+    os.makedirs(asset_dir, exist_ok=True)
+    for package in NLTK_PACKAGES:
+        if not nltk.download(package, download_dir=asset_dir, quiet=True):
+            raise RuntimeError(f"Could not download NLTK package '{package}'")
+    _register_path(asset_dir)
+    synonyms.build_wordnet_index(synonyms.SYNONYM_INDEX_PATH)
+    return _write_manifest(asset_dir, NLTK_PACKAGES)
+
+
+def _warm_punkt():
+    from app.utils.tokenizer import _get_punkt
+    _get_punkt()
+
+
+def _warm_spelling():
+    from app.utils.spelling import get_spell_checker
+    get_spell_checker()
+
+
+def _warm_summarizer():
+    from app.utils.summarizer import get_summarizer
+    get_summarizer().summarize("Warm-up text for the summarizer. It has three sentences. This is the last one.")
+
+
+def _warm_synonyms():
+    from app.utils.synonyms import get_synonym_index
+
+    if get_synonym_index() is None:
+        # No prebuilt index: requests read WordNet directly, so load it now
+        from nltk.corpus import wordnet
+        wordnet.ensure_loaded()
+
+
+WARMUPS = (
+    ("punkt", _warm_punkt),
+    ("spelling", _warm_spelling),
+    ("summarizer", _warm_summarizer),
+    ("synonyms", _warm_synonyms),
+)
+
+
+def _set_state(**changes):
+    with _state_lock:
+        _state.update(changes)
+
+
+def _run_startup(prepare):
+    try:
+        missing = prepare() if prepare is not None else ensure_assets()
+        _set_state(assets="ready", missing=list(missing or []))
+    except Exception as e:
+        print(f"Error preparing NLP assets: {e}")
+        _set_state(assets="failed")
+
+    if not _warmup_enabled:
+        return
+    for name, warm in WARMUPS:
+        started = time.perf_counter()
+        try:
+            warm()
+            status = "done"
+        except Exception as e:
+            print(f"Warm-up '{name}' failed: {e}")
+            status = "failed"
+        with _state_lock:
+            _state["warmup"][name] = {"status": status, "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def start_startup(prepare=None):
+    """Check the assets (running `prepare`, default ensure_assets) and warm up, in a background thread."""
+    global _startup_thread
+
+    with _state_lock:
+        if _startup_thread is not None:
+            return _startup_thread
+        _state.update(assets="pending", missing=[], warmup={name: {"status": "pending"} for name, _ in WARMUPS})
+        _startup_thread = threading.Thread(target=_run_startup, args=(prepare,), name="nlp-startup", daemon=True)
+    _startup_thread.start()
+    return _startup_thread
+
+
+def readiness():
+    """Startup state for /ready: ready once the asset check has succeeded, warm-ups reported alongside.
+
+    Assets listed in `missing` have fallbacks; a failed check leaves the server not ready.
+    """
+    with _state_lock:
+        state = {**_state, "warmup": dict(_state["warmup"])}
+    state["ready"] = state["assets"] == "ready"
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the NLP asset bundle (NLTK data and synonym index).")
+    parser.add_argument("--output", default=NLP_ASSET_DIR)
+    args = parser.parse_args()
+    manifest = build_bundle(args.output)
+    print(f"Wrote asset bundle v{manifest['version']} ({', '.join(manifest['nltk'])}) to {args.output}")
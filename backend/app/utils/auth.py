@@ -0,0 +1,75 @@
+"""Signed bearer tokens identifying the calling user.
+
+A token is "<user id>.<expiry>.<signature>", the signature being an HMAC-SHA256
+of the first two parts under AUTH_SECRET, so the server can check it without a
+session table. Without AUTH_SECRET no token verifies, and the endpoints that
+need a user (the history) answer 401. Issue a token for a user with:
+
+    python -m app.utils.auth <user id>
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import time
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException
+
+_auth_secret = os.getenv("AUTH_SECRET", "")
+_token_ttl = int(os.getenv("AUTH_TOKEN_TTL", str(30 * 24 * 3600)))
+
+
+def _signature(payload, secret):
+    digest = hmac.new(secret.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def issue_token(user_id, ttl=None, secret=None):
+    secret = _auth_secret if secret is None else secret
+    if not secret:
+        raise ValueError("AUTH_SECRET is not set")
+    payload = f"{int(user_id)}.{int(time.time()) + (_token_ttl if ttl is None else ttl)}"
+    return f"{payload}.{_signature(payload, secret)}"
+
+
+def verify_token(token, secret=None):
+    """The user id a token was issued for, or None if it is malformed, forged or expired."""
+    secret = _auth_secret if secret is None else secret
+    if not secret or not token:
+        return None
+    try:
+        user_id, expires, signature = token.split(".")
+        if not hmac.compare_digest(signature, _signature(f"{user_id}.{expires}", secret)):
+            return None
+        if int(expires) < time.time():
+            return None
+        return int(user_id)
+    except ValueError:
+        return None
+
+
+def optional_user_id(authorization: Optional[str] = Header(None)):
+    """Dependency: the authenticated user's id, or None for anonymous (or badly authenticated) callers."""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return verify_token(token.strip())
+
+
+def current_user_id(user_id: Optional[int] = Depends(optional_user_id)):
+    """Dependency: the authenticated user's id; 401 without a valid token."""
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return user_id
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Issue a bearer token for a user (needs AUTH_SECRET).")
+    parser.add_argument("user_id", type=int)
+    parser.add_argument("--ttl", type=int, default=_token_ttl, help="seconds until the token expires")
+    args = parser.parse_args()
+    print(issue_token(args.user_id, args.ttl))
@@ -0,0 +1,173 @@
+"""Cross-request dynamic batching for the grammar model."""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when the inference queue is full and cannot accept more sentences."""
+
+
+class SchedulerStopped(Exception):
+    """Set on sentences still queued when the scheduler stops, and raised on submits after that."""
+
+
+class InferenceScheduler:
+    """Collects sentences from concurrent requests and runs them through the model together.
+
+    Request handlers call `correct()`, which enqueues each sentence and waits on a
+    future. A single worker thread takes the first queued sentence, keeps collecting
+    for up to `max_wait_ms` (or until `max_batch_size` is reached), runs one batched
+    generation and resolves the futures. Only that thread touches the model, so torch
+    intra-op threads are not oversubscribed by competing request workers. `correct()`
+    gives up after `result_timeout` seconds, so a stuck model never pins its callers.
+    """
+
+    def __init__(self, corrector, max_batch_size=16, max_wait_ms=15, max_queue_size=512,
+                 submit_timeout=0.5, result_timeout=20.0, num_threads=None, **generate_kwargs):
+        self.corrector = corrector
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.submit_timeout = submit_timeout
+        self.result_timeout = result_timeout
+        self.num_threads = num_threads
+        self.generate_kwargs = generate_kwargs
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+        # Counters
+        self.batches = 0
+        self.sentences = 0
+        self.rejected = 0
+
+    def start(self):
+        with self._lock:
+            if self._stopped:
+                raise SchedulerStopped("Inference scheduler is stopped")
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the worker after its current batch; sentences still queued fail with SchedulerStopped."""
+        with self._lock:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+        # Draining first also makes room for the stop marker in a full queue
+        self._fail_pending()
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        self._fail_pending()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(SchedulerStopped("Inference scheduler stopped"))
+
+    def submit(self, sentence):
+        """Queue one sentence and return a Future resolving to its corrected text (or None)."""
+        self.start()
+        future = Future()
+        try:
+            self._queue.put((sentence, future), timeout=self.submit_timeout)
+        except queue.Full:
+            self.rejected += 1
+            raise SchedulerOverloaded(f"Inference queue is full ({self._queue.maxsize} sentences)")
+        return future
+
+    def correct(self, sentences, timeout=None):
+        """Correct a list of sentences, blocking until the worker has processed all of them.
+
+        Raises concurrent.futures.TimeoutError after `timeout` seconds (default:
+        `result_timeout`) for the whole list.
+        """
+        futures = []
+        try:
+            for sentence in sentences:
+                futures.append(self.submit(sentence))
+        except (SchedulerOverloaded, SchedulerStopped):
+            # Don't leave half a document in the queue
+            for future in futures:
+                future.cancel()
+            raise
+        deadline = time.monotonic() + (self.result_timeout if timeout is None else timeout)
+        try:
+            return [future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures]
+        except BaseException:
+            # Queued sentences nobody waits for any more are skipped by the worker
+            for future in futures:
+                future.cancel()
+            raise
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "batches": self.batches,
+            "sentences": self.sentences,
+            "rejected": self.rejected,
+            "avg_batch_size": round(self.sentences / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then exit
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        from app.utils.nlp import correct_sentences
+
+        if self.num_threads:
+            try:
+                import torch
+                torch.set_num_threads(self.num_threads)
+            except ImportError:
+                pass
+
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            # Skip sentences whose caller already gave up
+            batch = [(s, f) for s, f in self._collect(item) if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = correct_sentences(
+                    self.corrector, [s for s, _ in batch], batch_size=len(batch), **self.generate_kwargs
+                )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.sentences += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
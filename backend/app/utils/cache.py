@@ -0,0 +1,213 @@
+"""Content-addressed result cache shared by the API endpoints."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Lazy global, built from env on first use
+result_cache = None
+_cache_enabled = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+_cache_size = int(os.getenv("RESULT_CACHE_SIZE", "4096"))
+_cache_ttl = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+_cache_path = os.getenv("RESULT_CACHE_PATH", "")
+_cache_disk_size = int(os.getenv("RESULT_CACHE_DISK_SIZE", "100000"))
+
+
+def normalize_text(text):
+    """Normalize text for keying: unicode NFC, unified newlines, no outer whitespace."""
+    text = unicodedata.normalize("NFC", text)
+    return text.replace("\r\n", "\n").strip()
+
+
+def make_key(endpoint, text, backend="", version=""):
+    """Hash (endpoint, text, backend identity, model version) into a cache key."""
+    payload = json.dumps([endpoint, backend, version, text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """Thread-safe LRU dictionary with a size limit and per-entry TTL."""
+
+    name = "memory"
+
+    def __init__(self, max_entries=4096, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if self.ttl and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteTier:
+    """On-disk tier that survives restarts. Values are stored as JSON.
+
+    Every `prune_every` writes, expired rows are deleted and the oldest rows beyond
+    `max_entries` are evicted, so the file does not grow without bound.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, ttl=3600.0, max_entries=100000, prune_every=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS result_cache_expires ON result_cache (expires)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM result_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        if self.ttl and expires < time.time():
+            with self._lock:
+                self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                self._conn.commit()
+            return None
+        return json.loads(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        # Called with the lock held
+        if self.ttl:
+            self._conn.execute("DELETE FROM result_cache WHERE expires < ?", (time.time(),))
+        if self.max_entries:
+            # Every row gets the same TTL, so the earliest expiry is the oldest write
+            self._conn.execute(
+                "DELETE FROM result_cache WHERE key IN "
+                "(SELECT key FROM result_cache ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def prune(self):
+        """Delete expired rows and evict the oldest beyond max_entries now."""
+        with self._lock:
+            self._prune()
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+
+class ResultCache:
+    """Looks keys up tier by tier (fastest first) and promotes hits to the faster tiers.
+
+    Any object with get/set/clear/__len__ and a `name` can be used as a tier.
+    Values must be JSON-serializable; None is never cached.
+    """
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self.hits = 0
+        self.misses = 0
+        self.tier_hits = {tier.name: 0 for tier in self.tiers}
+
+    def get(self, key):
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                self.hits += 1
+                self.tier_hits[tier.name] += 1
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        if value is None:
+            return
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "tiers": {tier.name: {"entries": len(tier), "hits": self.tier_hits[tier.name]} for tier in self.tiers},
+        }
+
+
+def get_result_cache():
+    """Get the shared result cache, or None if caching is disabled."""
+    global result_cache
+
+    if not _cache_enabled:
+        return None
+
+    if result_cache is None:
+        tiers = []
+        if _cache_size > 0:
+            tiers.append(MemoryTier(max_entries=_cache_size, ttl=_cache_ttl))
+        if _cache_path:
+            try:
+                tiers.append(SqliteTier(_cache_path, ttl=_cache_ttl, max_entries=_cache_disk_size))
+            except Exception as e:
+                print(f"Warning: Could not open result cache at {_cache_path}: {e}")
+        if not tiers:
+            return None
+        result_cache = ResultCache(tiers)
+
+    return result_cache
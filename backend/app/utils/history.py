@@ -0,0 +1,340 @@
+"""Write-behind recording of TextHistory rows.
+
+Endpoints call `record()`, which only appends a row to an in-process queue, so
+request latency does not depend on the database. A worker thread takes rows off
+the queue and writes them with one bulk INSERT per batch (an executemany, or
+COPY on PostgreSQL with psycopg2), flushing when `batch_size` rows are waiting
+or `flush_interval_ms` after the first one arrived. The lifespan hook starts the
+recorder and drains it on shutdown.
+
+Texts longer than `HISTORY_INLINE_MAX_CHARS` are stored zlib-compressed in
+text_contents under their SHA-256, so a resubmitted essay is stored once; the
+history row keeps only the hash, the sizes and a short snippet for listings.
+"""
+import base64
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, insert, inspect, or_, select
+
+from app.models.text_content import TextContent
+from app.models.text_history import TextHistory
+
+_STOP = object()
+
+# Lazy global, started by the lifespan hook
+history_recorder = None
+_history_enabled = os.getenv("HISTORY_ENABLED", "false").lower() == "true"
+_history_batch_size = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+_history_flush_interval_ms = float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "1000"))
+_history_queue_size = int(os.getenv("HISTORY_QUEUE_SIZE", "10000"))
+_inline_max_chars = int(os.getenv("HISTORY_INLINE_MAX_CHARS", "2048"))
+
+SNIPPET_CHARS = 120
+
+_COLUMNS = (
+    "user_id", "operation_type", "input_text", "output_result", "input_hash", "output_hash",
+    "input_snippet", "input_size", "output_size", "created_at",
+)
+# (text column, hash column, size column) for each stored text
+_TEXT_FIELDS = (("input_text", "input_hash", "input_size"), ("output_result", "output_hash", "output_size"))
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_text(text):
+    """Return (codec, data) for a TextContent row."""
+    return "zlib", zlib.compress(text.encode("utf-8"), 6)
+
+
+def decompress_text(codec, data):
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown text codec: {codec}")
+
+
+def prepare_rows(rows, inline_max_chars=None):
+    """Split queued rows into TextHistory values and the (deduplicated) TextContent rows they reference."""
+    if inline_max_chars is None:
+        inline_max_chars = _inline_max_chars
+    contents = {}
+    prepared = []
+    for row in rows:
+        values = {
+            "user_id": row["user_id"],
+            "operation_type": row["operation_type"],
+            "input_snippet": row["input_text"][:SNIPPET_CHARS],
+            "created_at": row["created_at"],
+        }
+        for text_column, hash_column, size_column in _TEXT_FIELDS:
+            text = row[text_column]
+            values[size_column] = None if text is None else len(text)
+            if text is not None and len(text) > inline_max_chars:
+                digest = content_hash(text)
+                if digest not in contents:
+                    codec, data = compress_text(text)
+                    contents[digest] = {"hash": digest, "codec": codec, "size": len(text), "data": data}
+                values[text_column], values[hash_column] = None, digest
+            else:
+                values[text_column], values[hash_column] = text, None
+        prepared.append(values)
+    return prepared, list(contents.values())
+
+
+class HistoryRecorder:
+    """Buffers TextHistory rows and inserts them in batches from a single worker thread.
+
+    `record()` never blocks: when the queue is full (the database is down or too
+    slow) the row is dropped and counted, rather than slowing the request down.
+    """
+
+    def __init__(self, session_factory, batch_size=500, flush_interval_ms=1000, max_queue_size=10000):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.flushes = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="history-recorder", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """Write out every queued row, then stop the worker."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def record(self, operation_type, input_text, output_result=None, user_id=None):
+        """Queue one row; returns False if it had to be dropped."""
+        row = {
+            "user_id": user_id,
+            "operation_type": operation_type,
+            "input_text": input_text,
+            "output_result": output_result,
+            # Stamp the request time, not the (later) flush time
+            "created_at": datetime.now(timezone.utc),
+        }
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "flushes": self.flushes,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _collect(self, first, stopping):
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Once stopping, take what is already queued without waiting
+                item = self._queue.get_nowait() if stopping or remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                if stopping or remaining <= 0:
+                    break
+                continue
+            if item is _STOP:
+                stopping = True
+                continue
+            batch.append(item)
+        return batch, stopping
+
+    def _run(self):
+        stopping = False
+        while True:
+            try:
+                # After the stop marker, drain what is left and exit
+                item = self._queue.get_nowait() if stopping else self._queue.get()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                continue
+            batch, stopping = self._collect(item, stopping)
+            self.flush(batch)
+
+    def flush(self, rows):
+        """Insert rows in one statement; a failed batch is logged and dropped."""
+        try:
+            # Hashing and compression happen here, off the request path
+            values, contents = prepare_rows(rows)
+            with self.session_factory() as session:
+                if contents:
+                    _insert_contents(session, contents)
+                if not _copy_rows(session.connection(), values):
+                    session.execute(insert(TextHistory), values)
+                session.commit()
+        except Exception as e:
+            print(f"History flush failed, dropping {len(rows)} rows: {e}")
+            self.failed += len(rows)
+            return
+        self.flushes += 1
+        self.written += len(rows)
+
+
+def _insert_contents(session, contents):
+    """Insert TextContent rows, skipping hashes that are already stored."""
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        session.execute(dialect_insert(TextContent).on_conflict_do_nothing(index_elements=["hash"]), contents)
+        return
+
+    stored = set(session.scalars(select(TextContent.hash).where(TextContent.hash.in_([c["hash"] for c in contents]))))
+    missing = [c for c in contents if c["hash"] not in stored]
+    if missing:
+        session.execute(insert(TextContent), missing)
+
+
+def _csv_field(value):
+    # An unquoted empty field is NULL to COPY, a quoted one is an empty string
+    if value is None:
+        return ""
+    if isinstance(value, int):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_rows(connection, rows):
+    """COPY rows into text_histories on PostgreSQL with psycopg2; False if COPY is unavailable."""
+    if connection.dialect.name != "postgresql":
+        return False
+    cursor = connection.connection.dbapi_connection.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        return False
+
+    buffer = io.StringIO()
+    for row in rows:
+        fields = [row[column] for column in _COLUMNS]
+        fields[1] = row["operation_type"].name  # Stored by enum name, as SQLAlchemy does
+        fields[-1] = row["created_at"].isoformat()
+        buffer.write(",".join(_csv_field(value) for value in fields) + "\n")
+    buffer.seek(0)
+    try:
+        cursor.copy_expert(
+            f"COPY {TextHistory.__tablename__} ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+    return True
+
+
+def start_history_recorder():
+    """Start the shared recorder (called on startup); no-op when HISTORY_ENABLED is false.
+
+    The tables come from the migrations (`alembic upgrade head`); without them
+    the recorder stays off rather than failing every flush.
+    """
+    global history_recorder
+    from app.db.database import SessionLocal, engine
+
+    if _history_enabled and history_recorder is None:
+        missing = [name for name in (TextHistory.__tablename__, TextContent.__tablename__)
+                   if not inspect(engine).has_table(name)]
+        if missing:
+            print(f"Warning: history recording disabled, missing tables {missing} (run `alembic upgrade head`)")
+            return None
+        history_recorder = HistoryRecorder(
+            SessionLocal,
+            batch_size=_history_batch_size,
+            flush_interval_ms=_history_flush_interval_ms,
+            max_queue_size=_history_queue_size,
+        )
+        history_recorder.start()
+    return history_recorder
+
+
+def stop_history_recorder():
+    """Drain queued rows and stop the worker (called on shutdown)."""
+    global history_recorder
+    if history_recorder is not None:
+        history_recorder.stop()
+        history_recorder = None
+
+
+def record(operation_type, input_text, output_result=None, user_id=None):
+    """Queue a TextHistory row if the recorder is running."""
+    recorder = history_recorder
+    if recorder is not None:
+        recorder.record(operation_type, input_text, output_result, user_id)
+
+
+def load_text(session, inline, digest):
+    """Full text of a history field: inline, or decompressed from text_contents."""
+    if digest is None:
+        return inline
+    content = session.get(TextContent, digest)
+    return decompress_text(content.codec, content.data) if content is not None else None
+
+
+def encode_cursor(created_at, row_id):
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """(created_at, id) of the last row of the previous page; ValueError if malformed."""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def list_history(session, user_id, limit=20, cursor=None):
+    """One page of a user's history, newest first, and the next page's cursor.
+
+    Keyset pagination on (user_id, created_at, id) instead of OFFSET, so every
+    page is an index range scan; only the listing projection is selected, never
+    the stored texts.
+    """
+    query = select(
+        TextHistory.id, TextHistory.user_id, TextHistory.operation_type, TextHistory.created_at,
+        TextHistory.input_snippet, TextHistory.input_size, TextHistory.output_size,
+    ).where(TextHistory.user_id == user_id)
+    if cursor is not None:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(or_(
+            TextHistory.created_at < created_at,
+            and_(TextHistory.created_at == created_at, TextHistory.id < row_id),
+        ))
+    # One extra row tells whether there is a next page
+    rows = session.execute(
+        query.order_by(TextHistory.created_at.desc(), TextHistory.id.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
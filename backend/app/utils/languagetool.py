@@ -0,0 +1,256 @@
+"""LanguageTool HTTP client with an optional supervised local server.
+
+Connecting (and, in local mode, starting the Java server, which takes tens of
+seconds) happens on a background thread started from the lifespan hook;
+requests never wait for it. Until the client is up, get_language_tool()
+returns None and the grammar check uses the offline spelling engine.
+"""
+import os
+import shlex
+import subprocess
+import threading
+import time
+
+import httpx
+
+# Lazy global, (re)created by get_language_tool()
+language_tool = None
+language_tool_server = None
+_next_retry = 0.0
+_connecting = False
+_lock = threading.Lock()
+
+_lt_mode = os.getenv("LANGUAGETOOL_MODE", "remote").lower()
+_lt_url = os.getenv("LANGUAGETOOL_URL", "https://api.languagetool.org/v2")
+_lt_jar = os.getenv("LANGUAGETOOL_JAR", "")
+_lt_command = os.getenv("LANGUAGETOOL_COMMAND", "")
+_lt_port = int(os.getenv("LANGUAGETOOL_PORT", "8081"))
+_lt_timeout = float(os.getenv("LANGUAGETOOL_TIMEOUT", "10"))
+_lt_retry_seconds = float(os.getenv("LANGUAGETOOL_RETRY_SECONDS", "30"))
+
+
+class Match:
+    """A single LanguageTool match (same attribute names as language_tool_python)."""
+
+    def __init__(self, data):
+        self.offset = data["offset"]
+        self.errorLength = data["length"]
+        self.message = data.get("message", "")
+        self.replacements = [r["value"] for r in data.get("replacements", [])]
+        rule = data.get("rule", {})
+        self.ruleId = rule.get("id", "")
+        self.ruleIssueType = rule.get("issueType", "")
+
+    def __repr__(self):
+        return f"<Match(rule={self.ruleId}, offset={self.offset}, length={self.errorLength})>"
+
+
+class LanguageToolClient:
+    """Talks to a LanguageTool server over a pooled keep-alive HTTP connection."""
+
+    def __init__(self, base_url, language="en-US", timeout=10.0, max_connections=20):
+        self.base_url = base_url.rstrip("/")
+        self.language = language
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def check(self, text):
+        response = self._client.post("/check", data={"language": self.language, "text": text})
+        response.raise_for_status()
+        return [Match(m) for m in response.json().get("matches", [])]
+
+    def healthy(self):
+        try:
+            return self._client.get("/languages", timeout=2.0).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def close(self):
+        self._client.close()
+
+
+class LanguageToolServer:
+    """Starts a local LanguageTool server process and restarts it when health checks fail."""
+
+    def __init__(self, command, port, health_interval=10.0, startup_timeout=60.0):
+        self.command = command
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}/v2"
+        self.health_interval = health_interval
+        self.startup_timeout = startup_timeout
+        self.restarts = 0
+
+        self._process = None
+        self._probe = httpx.Client(base_url=self.base_url, timeout=2.0)
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._supervisor = None
+
+    def healthy(self):
+        if self._process is None or self._process.poll() is not None:
+            return False
+        try:
+            return self._probe.get("/languages").status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def start(self):
+        """Start the supervisor thread, which launches the process; returns right away."""
+        if self._supervisor is None:
+            self._supervisor = threading.Thread(target=self._supervise, name="languagetool-supervisor", daemon=True)
+            self._supervisor.start()
+
+    def wait_ready(self, timeout=None):
+        """Block until the server answers health checks; False if it isn't up within `timeout`."""
+        return self._ready.wait(timeout)
+
+    def stop(self):
+        self._stop.set()
+        self._ready.clear()
+        with self._lock:
+            self._terminate()
+        self._probe.close()
+
+    def _launch(self):
+        self._terminate()
+        print(f"Starting local LanguageTool server on port {self.port}...")
+        self._process = subprocess.Popen(self.command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline and not self._stop.is_set():
+            if self.healthy():
+                self._ready.set()
+                return
+            if self._process.poll() is not None:
+                raise RuntimeError(f"LanguageTool server exited with code {self._process.returncode}")
+            time.sleep(0.1)
+        raise RuntimeError("LanguageTool server did not become healthy in time")
+
+    def _terminate(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+
+    def _supervise(self):
+        launched = False
+        while not self._stop.is_set():
+            if not self.healthy():
+                self._ready.clear()
+                with self._lock:
+                    if self._stop.is_set():
+                        break
+                    try:
+                        if launched:
+                            self.restarts += 1
+                        launched = True
+                        self._launch()
+                    except Exception as e:
+                        print(f"Warning: LanguageTool server start failed: {e}")
+            self._stop.wait(self.health_interval)
+
+
+def _local_command():
+    if _lt_command:
+        return shlex.split(_lt_command.format(port=_lt_port))
+    if _lt_jar:
+        return [
+            "java", "-cp", _lt_jar, "org.languagetool.server.HTTPServer",
+            "--port", str(_lt_port), "--allow-origin", "*",
+        ]
+    return None
+
+
+def _connect():
+    global language_tool_server
+
+    if _lt_mode == "local":
+        command = _local_command()
+        if command is None:
+            raise RuntimeError("LANGUAGETOOL_MODE=local needs LANGUAGETOOL_JAR or LANGUAGETOOL_COMMAND")
+        with _lock:
+            if language_tool_server is None:
+                language_tool_server = LanguageToolServer(command, _lt_port)
+                language_tool_server.start()
+            server = language_tool_server
+        # On the connect thread, so nothing waits for this but the connection itself
+        if not server.wait_ready(server.startup_timeout):
+            raise RuntimeError("Local LanguageTool server is not up yet")
+        base_url = server.base_url
+    else:
+        base_url = _lt_url
+
+    client = LanguageToolClient(base_url, timeout=_lt_timeout)
+    if not client.healthy():
+        client.close()
+        raise RuntimeError(f"LanguageTool server at {base_url} is not reachable")
+    return client
+
+
+def _connect_in_background():
+    global language_tool, _next_retry, _connecting
+
+    try:
+        client = _connect()
+    except Exception as e:
+        print(f"Warning: Could not initialize LanguageTool: {e}")
+        client = None
+    with _lock:
+        if client is not None:
+            language_tool = client
+        else:
+            _next_retry = time.monotonic() + _lt_retry_seconds
+        _connecting = False
+
+
+def get_language_tool():
+    """Get the LanguageTool client, or None while it is down or still connecting.
+
+    Never blocks: a missing client is (re)connected on a background thread,
+    at most once per retry cooldown.
+    """
+    global _connecting
+
+    if language_tool is not None:
+        return language_tool
+
+    with _lock:
+        if language_tool is None and not _connecting and time.monotonic() >= _next_retry:
+            _connecting = True
+            threading.Thread(target=_connect_in_background, name="languagetool-connect", daemon=True).start()
+    return language_tool
+
+
+def start_language_tool():
+    """Start connecting (and the local server, in local mode) in the background (called on startup)."""
+    get_language_tool()
+
+
+def mark_language_tool_down():
+    """Drop the current client after a failed check; the next retry happens after a cooldown."""
+    global language_tool, _next_retry
+
+    with _lock:
+        if language_tool is not None:
+            language_tool.close()
+            language_tool = None
+        _next_retry = time.monotonic() + _lt_retry_seconds
+
+
+def shutdown_language_tool():
+    """Close the client and stop the local server, if any (called on shutdown)."""
+    global language_tool, language_tool_server
+
+    with _lock:
+        if language_tool is not None:
+            language_tool.close()
+            language_tool = None
+        if language_tool_server is not None:
+            language_tool_server.stop()
+            language_tool_server = None
@@ -0,0 +1,61 @@
+"""Process memory from /proc (Linux): resident, proportional, shared and private sizes.
+
+With serve.py the workers are forked from a master that already holds the
+models, so most of each worker's RSS is pages shared with the master and its
+siblings. RSS counts those pages once per process; PSS splits each shared page
+between the processes mapping it, so summing PSS over the master and workers
+gives the real footprint, and sum(RSS) - sum(PSS) is what sharing saves.
+"""
+import os
+
+_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_mb",
+    "Shared_Dirty": "shared_mb",
+    "Private_Clean": "private_mb",
+    "Private_Dirty": "private_mb",
+    "Swap": "swap_mb",
+}
+
+
+def parse_smaps_rollup(text):
+    """Sizes in MB from the contents of /proc/<pid>/smaps_rollup."""
+    sizes = dict.fromkeys(_FIELDS.values(), 0.0)
+    for line in text.splitlines():
+        name, _, value = line.partition(":")
+        if name in _FIELDS and value.strip().endswith("kB"):
+            sizes[_FIELDS[name]] += int(value.split()[0]) / 1024
+    return {name: round(size, 1) for name, size in sizes.items()}
+
+
+def process_memory(pid="self"):
+    """Memory of a process in MB, or None where /proc is not available.
+
+    Falls back to RSS alone on kernels without smaps_rollup (before 4.14).
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            return parse_smaps_rollup(f.read())
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return {"rss_mb": round(int(line.split()[1]) / 1024, 1)}
+    except OSError:
+        pass
+    return None
+
+
+def worker_memory():
+    """This process's memory, tagged with its pid and serve.py worker number (None outside serve.py)."""
+    worker = os.getenv("SERVE_WORKER_ID")
+    return {
+        "pid": os.getpid(),
+        "worker": int(worker) if worker is not None else None,
+        **(process_memory() or {}),
+    }
@@ -0,0 +1,51 @@
+"""Merge and de-duplicate GrammarErrors coming from several checkers."""
+import bisect
+
+# Default priority: the neural rewrite wins over LanguageTool, which wins over TextBlob
+DEFAULT_PRIORITY = ("neural", "languagetool", "textblob")
+
+
+class _IntervalIndex:
+    """Sorted, non-empty [start, end) intervals with prefix-max ends, for overlap queries."""
+
+    def __init__(self, intervals):
+        intervals = sorted((s, e) for s, e in intervals if s < e)
+        self.starts = [s for s, _ in intervals]
+        self.max_ends = []
+        running = None
+        for _, e in intervals:
+            running = e if running is None else max(running, e)
+            self.max_ends.append(running)
+
+    def overlaps(self, start, end):
+        """True if [start, end) shares at least one position with any indexed interval."""
+        if start >= end:
+            return False
+        # Intervals starting before `end`; one of them overlaps iff the furthest end passes `start`
+        count = bisect.bisect_left(self.starts, end)
+        return count > 0 and self.max_ends[count - 1] > start
+
+
+def merge_errors(groups, priority=DEFAULT_PRIORITY):
+    """Merge errors from several checkers into one list sorted by start position.
+
+    `groups` maps a checker name to its errors. Checkers are taken in `priority`
+    order (names not listed come last, in the order given). An error is dropped
+    when it overlaps an error already kept from a higher-priority checker; errors
+    from the same checker never suppress each other. The result is a stable sort
+    by start, so at equal starts higher-priority errors come first.
+
+    Runs in O((n + m) log n) instead of comparing every pair of errors.
+    """
+    names = [name for name in priority if name in groups]
+    names += [name for name in groups if name not in names]
+
+    kept = []
+    index = _IntervalIndex([])
+    for n, name in enumerate(names):
+        kept.extend(e for e in groups[name] if not index.overlaps(e.position.start, e.position.end))
+        if n + 1 < len(names):
+            index = _IntervalIndex((e.position.start, e.position.end) for e in kept)
+
+    kept.sort(key=lambda e: e.position.start)
+    return kept
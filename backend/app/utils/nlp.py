@@ -1,102 +1,488 @@
-import nltk
-from textblob import TextBlob
 import logging
 import os
+import asyncio
+import importlib.util
+import random
+import time
+import httpx
+import json
+from app.utils.assets import ensure_assets
+from app.utils.batching import InferenceScheduler
+from app.utils.pools import PooledCorrector, get_pool, pool_configured
 
 # Lazy loading imports (only import when needed)
 grammar_corrector = None
+gemini_corrector = None
+pooled_corrector = None
 _use_t5_model = os.getenv("USE_T5_MODEL", "false").lower() == "true"
+T5_MODEL_NAME = "vennify/t5-base-grammar-correction"
+# "pipeline": transformers + torch dynamic quantization; "onnx": int8 ONNX export (see app.utils.onnx_t5)
+_t5_backend = os.getenv("T5_BACKEND", "pipeline").lower()
+_grammar_batch_size = int(os.getenv("GRAMMAR_BATCH_SIZE", "8"))
+_gemini_concurrency = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+_gemini_retries = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+_gemini_pack_tokens = int(os.getenv("GEMINI_PACK_TOKENS", "2000"))
+# HTTP/2 needs the optional h2 package (the "http2" extra: pip install -e ".[http2]")
+_http2_available = importlib.util.find_spec("h2") is not None
+
+# Cross-request batching for the local model
+inference_scheduler = None
+_use_scheduler = os.getenv("GRAMMAR_SCHEDULER", "true").lower() == "true"
+_scheduler_max_batch = int(os.getenv("GRAMMAR_SCHEDULER_MAX_BATCH", "16"))
+_scheduler_max_wait_ms = float(os.getenv("GRAMMAR_SCHEDULER_MAX_WAIT_MS", "15"))
+_scheduler_queue_size = int(os.getenv("GRAMMAR_SCHEDULER_QUEUE_SIZE", "512"))
+# Longest a request waits for its sentences before giving up on the model; never past the
+# /check-grammar neural budget, after which nobody is waiting for the answer
+_neural_budget = float(os.getenv("GRAMMAR_NEURAL_TIMEOUT", "20"))
+_scheduler_timeout = min(float(os.getenv("GRAMMAR_SCHEDULER_TIMEOUT", str(_neural_budget))), _neural_budget)
+_torch_num_threads = int(os.getenv("TORCH_NUM_THREADS", "0")) or os.cpu_count()
 
 def init_nlp():
-    """Download necessary NLP data (lightweight - no heavy models)."""
+    """Make sure the NLP data is available (from the local asset bundle; downloads only what is missing).
+
+    Returns the packages still missing; a failed check is logged and re-raised,
+    so startup reports the server as not ready.
+    """
     print("Initializing NLP data...")
     try:
-        # NLTK - only essential data
-        nltk.download('punkt', quiet=True)
-        nltk.download('wordnet', quiet=True)
-        nltk.download('omw-1.4', quiet=True)
-        nltk.download('punkt_tab', quiet=True)
-
-        # TextBlob warm-up (lightweight)
-        TextBlob("test").correct()
-
-        print("NLP data initialized successfully (lightweight mode).")
-        if _use_t5_model:
-            print("T5 model will be loaded on first grammar check request.")
-        else:
-            print("T5 model disabled (using LanguageTool + TextBlob only).")
+        missing = ensure_assets()
     except Exception as e:
         print(f"Error initializing NLP data: {e}")
         logging.error(f"NLP Init Error: {e}")
+        raise
+    print("NLP data initialized successfully (lightweight mode).")
+    if _use_t5_model:
+        print("T5 model will be loaded on first grammar check request.")
+    else:
+        print("T5 model disabled (using LanguageTool + TextBlob only).")
+    return missing
 
-    return grammar_corrector
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the upstream is marked unhealthy."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets a trial call through after `reset_timeout`."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
 
 
 # Lightweight Gemini Client
 class GeminiCorrector:
-    def __init__(self, api_key):
+    def __init__(self, api_key, max_concurrency=8, max_retries=3, backoff=0.25, timeout=5.0,
+                 pack_tokens=2000, transport=None):
         self.api_key = api_key
         # Using gemini-1.5-flash for speed/cost (free tier)
-        self.url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}"
-        
-    def __call__(self, text, **kwargs):
-        """Mimics the Transformers pipeline interface."""
-        import httpx
-        import json
-        
+        self.model_id = "gemini-1.5-flash"
+        self.url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_id}:generateContent?key={api_key}"
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        # Approximate token budget for one packed multi-sentence prompt (0 disables packing)
+        self.pack_tokens = pack_tokens
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET", "30")),
+        )
+        # Optional httpx transport (tests use httpx.MockTransport)
+        self._transport = transport
+        self._client = None
+        self._async_client = None
+        self._async_loop = None
+
+    @staticmethod
+    def _payload(text):
         prompt = (
             "Correct the grammar and spelling of the following text. "
             "Return ONLY the corrected text. Maintain the original meaning and tone.\n\n"
             f"Text: {text}"
         )
         
-        payload = {
+        return {
             "contents": [{
                 "parts": [{"text": prompt}]
             }]
         }
-        
+
+    @staticmethod
+    def _packed_payload(texts):
+        numbered = json.dumps([{"i": i, "text": t} for i, t in enumerate(texts)], ensure_ascii=False)
+        prompt = (
+            "Correct the grammar and spelling of each sentence below. "
+            "Maintain the original meaning and tone. The input is a JSON array of "
+            '{"i": <index>, "text": <sentence>} objects. Return ONLY a JSON array with one '
+            '{"i": <same index>, "text": <corrected sentence>} object per input sentence.\n\n'
+            f"Sentences: {numbered}"
+        )
+        return {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {"responseMimeType": "application/json"},
+        }
+
+    @staticmethod
+    def _extract(data):
+        if data and "candidates" in data and data["candidates"]:
+            return data["candidates"][0]["content"]["parts"][0]["text"].strip()
+        return None
+
+    @staticmethod
+    def _parse_packed(raw, count):
+        """Map a packed JSON reply back to {index: corrected text}; None if it can't be parsed."""
+        if raw is None:
+            return None
+        raw = raw.strip()
+        if raw.startswith("```"):
+            raw = raw.strip("`").removeprefix("json").strip()
         try:
-            # Short timeout to avoid hanging
-            response = httpx.post(self.url, json=payload, timeout=5.0)
-            if response.status_code == 200:
-                data = response.json()
-                if "candidates" in data and data["candidates"]:
-                    corrected_text = data["candidates"][0]["content"]["parts"][0]["text"]
-                    return [{'generated_text': corrected_text.strip()}]
-            else:
-                print(f"Gemini API Error: {response.status_code} - {response.text}")
-        except Exception as e:
-            print(f"Gemini Call Failed: {e}")
-            
-        # Fallback: return original text effectively (no change) or empty list
+            items = json.loads(raw)
+        except ValueError:
+            return None
+        if not isinstance(items, list):
+            return None
+        corrected = {}
+        for item in items:
+            if isinstance(item, dict) and isinstance(item.get("i"), int) and isinstance(item.get("text"), str):
+                if 0 <= item["i"] < count:
+                    corrected[item["i"]] = item["text"].strip()
+        return corrected
+
+    @staticmethod
+    def _estimate_tokens(text):
+        # ~4 characters per token for English, plus JSON framing
+        return len(text) // 4 + 8
+
+    def _pack(self, sentences):
+        """Group sentence indices into prompts that stay within the token budget."""
+        if self.pack_tokens <= 0:
+            return [[i] for i in range(len(sentences))]
+        groups, current, used = [], [], 0
+        for i, sentence in enumerate(sentences):
+            cost = self._estimate_tokens(sentence)
+            if current and used + cost > self.pack_tokens:
+                groups.append(current)
+                current, used = [], 0
+            current.append(i)
+            used += cost
+        if current:
+            groups.append(current)
+        return groups
+
+    def _retry_delay(self, attempt, response=None):
+        """Exponential backoff with full jitter, honouring Retry-After when the server sends it.
+
+        Retry-After is capped at the longest backoff of the retry loop, so a server
+        asking for minutes cannot hold a request (and its worker) that long.
+        """
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), self.backoff * (2 ** self.max_retries))
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout, transport=self._transport)
+        return self._client
+
+    def _get_async_client(self):
+        # An AsyncClient's connection pool belongs to the loop that created it
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            if self._async_client is not None:
+                self._close_stale_client(self._async_client, self._async_loop)
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=_http2_available,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+                transport=self._transport,
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    @staticmethod
+    def _close_stale_client(client, loop):
+        """Close a client created on another event loop, on that loop while it still runs."""
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        # Its loop has stopped: close from here, ignoring sockets that can no longer be closed
+        task = asyncio.get_running_loop().create_task(client.aclose())
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _post(self, payload):
+        """POST with retries on 429/5xx; returns the reply text or None."""
+        if not self.breaker.allow():
+            return None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self._get_client().post(self.url, json=payload)
+                if response.status_code == 200:
+                    text = self._extract(response.json())
+                    self.breaker.record_success()
+                    return text
+                if response.status_code != 429 and response.status_code < 500:
+                    print(f"Gemini API Error: {response.status_code} - {response.text}")
+                    return None
+            except Exception as e:
+                print(f"Gemini Call Failed: {e}")
+            if attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, response))
+        self.breaker.record_failure()
+        return None
+
+    async def _apost(self, payload):
+        """Async POST with retries on 429/5xx; returns the reply text or None."""
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                return None
+            response = None
+            try:
+                response = await self._get_async_client().post(self.url, json=payload)
+                if response.status_code == 200:
+                    # A malformed body (not JSON, missing fields) counts as a failed call
+                    text = self._extract(response.json())
+                    self.breaker.record_success()
+                    return text
+                if response.status_code != 429 and response.status_code < 500:
+                    print(f"Gemini API Error: {response.status_code} - {response.text}")
+                    return None
+            except Exception as e:
+                print(f"Gemini Call Failed: {e!r}")
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._retry_delay(attempt, response))
+        self.breaker.record_failure()
+        return None
+        
+    def __call__(self, text, **kwargs):
+        """Mimics the Transformers pipeline interface."""
+        if isinstance(text, list):
+            corrected = self.correct_many(text)
+            return [[{'generated_text': c}] if c is not None else [] for c in corrected]
+
+        corrected_text = self._post(self._payload(text))
+        if corrected_text is not None:
+            return [{'generated_text': corrected_text}]
         # Returning empty list means "no correction found" (or failure)
         return []
 
+    def correct_many(self, sentences):
+        """Correct sentences with packed prompts, falling back to one call per unparsed sentence."""
+        corrected = [None] * len(sentences)
+        for group in self._pack(sentences):
+            if len(group) > 1:
+                parsed = self._parse_packed(self._post(self._packed_payload([sentences[i] for i in group])), len(group))
+                for j, text in (parsed or {}).items():
+                    corrected[group[j]] = text
+                group = [i for j, i in enumerate(group) if not parsed or j not in parsed]
+            for i in group:
+                corrected[i] = self._post(self._payload(sentences[i]))
+        return corrected
+
+    async def _acorrect_group(self, sentences, group, corrected, semaphore):
+        if len(group) > 1:
+            async with semaphore:
+                raw = await self._apost(self._packed_payload([sentences[i] for i in group]))
+            parsed = self._parse_packed(raw, len(group))
+            for j, text in (parsed or {}).items():
+                corrected[group[j]] = text
+            group = [i for j, i in enumerate(group) if not parsed or j not in parsed]
+
+        async def single(i):
+            async with semaphore:
+                corrected[i] = await self._apost(self._payload(sentences[i]))
+
+        await asyncio.gather(*(single(i) for i in group))
+
+    async def acorrect(self, sentences):
+        """Correct sentences concurrently over one shared keep-alive client.
+
+        Sentences are packed into as few prompts as the token budget allows.
+        Returns one corrected string (or None) per sentence, in input order.
+        Raises CircuitOpenError if the upstream is currently marked unhealthy.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gemini circuit is open")
+        corrected = [None] * len(sentences)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(*(
+            self._acorrect_group(sentences, group, corrected, semaphore) for group in self._pack(sentences)
+        ))
+        return corrected
+
+    async def aclose(self):
+        """Close the HTTP clients (called on shutdown)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+def _generated_text(result):
+    """Extract the corrected string from a single pipeline result (or None)."""
+    if isinstance(result, list):
+        result = result[0] if result else None
+    if not result:
+        return None
+    return result['generated_text']
+
+
+def correct_sentences(corrector, sentences, batch_size=None, **kwargs):
+    """Run the corrector over many sentences using length-sorted micro-batches.
+
+    Sorting by length keeps padding inside each batch small. Returns one
+    corrected string per input sentence, in input order (None when the
+    corrector produced nothing for that sentence).
+    """
+    if batch_size is None:
+        batch_size = _grammar_batch_size
+    batch_size = max(1, batch_size)
+
+    corrected = [None] * len(sentences)
+    order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        results = corrector([sentences[i] for i in chunk], batch_size=len(chunk), **kwargs)
+        for i, result in zip(chunk, results or []):
+            corrected[i] = _generated_text(result)
+    return corrected
+
+
+def corrector_identity(corrector):
+    """Stable name of the model behind a corrector, used in cache keys."""
+    return getattr(corrector, "model_id", T5_MODEL_NAME)
+
+
+def get_inference_scheduler(corrector, **generate_kwargs):
+    """Get the shared scheduler for the local model, (re)creating it if the model changed."""
+    global inference_scheduler
+
+    if inference_scheduler is None or inference_scheduler.corrector is not corrector:
+        stop_inference_scheduler()
+        inference_scheduler = InferenceScheduler(
+            corrector,
+            max_batch_size=_scheduler_max_batch,
+            max_wait_ms=_scheduler_max_wait_ms,
+            max_queue_size=_scheduler_queue_size,
+            result_timeout=_scheduler_timeout,
+            # A pooled model sets its threads in its own process
+            num_threads=None if isinstance(corrector, PooledCorrector) else _torch_num_threads,
+            **generate_kwargs
+        )
+        inference_scheduler.start()
+    return inference_scheduler
+
+
+def stop_inference_scheduler():
+    """Stop the scheduler worker (called on shutdown)."""
+    global inference_scheduler
+    if inference_scheduler is not None:
+        inference_scheduler.stop()
+        inference_scheduler = None
+
+
+def batch_correct(corrector, sentences, **kwargs):
+    """Correct sentences through the shared scheduler for the local model, else batch in-request.
+
+    The Gemini client is network-bound and gains nothing from cross-request batching.
+    """
+    if _use_scheduler and not isinstance(corrector, GeminiCorrector):
+        return get_inference_scheduler(corrector, **kwargs).correct(sentences)
+    return correct_sentences(corrector, sentences, **kwargs)
+
+
+async def close_gemini_corrector():
+    """Close the Gemini client's connections (called on shutdown)."""
+    if gemini_corrector is not None:
+        await gemini_corrector.aclose()
+
+
 def get_grammar_corrector():
     """Get the best available corrector (Gemini > T5 > None)."""
-    global grammar_corrector
+    global gemini_corrector
     
     # 1. Check for Gemini Key
     api_key = os.getenv("GEMINI_API_KEY")
     if api_key:
-        if not isinstance(grammar_corrector, GeminiCorrector):
+        if gemini_corrector is None or gemini_corrector.api_key != api_key:
             print("Initializing Gemini Grammar Corrector...")
-            grammar_corrector = GeminiCorrector(api_key)
-        return grammar_corrector
+            gemini_corrector = GeminiCorrector(
+                api_key, max_concurrency=_gemini_concurrency, max_retries=_gemini_retries,
+                pack_tokens=_gemini_pack_tokens
+            )
+        if gemini_corrector.breaker.allow():
+            return gemini_corrector
+        # Upstream unhealthy: fail over to the next corrector until the breaker resets
 
     # 2. Check for T5
     if not _use_t5_model:
         return None
+    pool = get_pool("neural")
+    if pool is not None:
+        return _pooled_corrector(pool)
+    return _load_t5(_t5_backend)
+
+
+def _pooled_corrector(pool):
+    """The T5 model in the 'neural' process pool (see app.utils.pools)."""
+    global pooled_corrector
+
+    if pooled_corrector is None or pooled_corrector.pool is not pool:
+        model_id = f"{T5_MODEL_NAME}:onnx-int8" if _t5_backend == "onnx" else T5_MODEL_NAME
+        pooled_corrector = PooledCorrector(pool, model_id)
+    return pooled_corrector
+
+
+def _load_t5(backend):
+    """Load the T5 corrector on first use: the ONNX export if selected (falling back), else the pipeline."""
+    global grammar_corrector
 
     # Lazy load T5 on first request
+    if grammar_corrector is None and backend == "onnx":
+        try:
+            print("Loading int8 ONNX T5 Grammar Model (first request)...")
+            from app.utils.onnx_t5 import OnnxT5Corrector
+            grammar_corrector = OnnxT5Corrector.from_pretrained(num_threads=_torch_num_threads, model_name=T5_MODEL_NAME)
+            print("ONNX T5 model loaded successfully.")
+        except Exception as e:
+            # Missing export or onnxruntime: fall back to the torch pipeline
+            print(f"Failed to load ONNX T5 model (export it with 'python -m app.utils.onnx_t5'): {e}")
+
     if grammar_corrector is None:
         try:
             print("Loading T5 Grammar Model (first request)...")
             from transformers import pipeline, T5ForConditionalGeneration, T5Tokenizer
             import torch
 
-            model_name = "vennify/t5-base-grammar-correction"
+            model_name = T5_MODEL_NAME
             tokenizer = T5Tokenizer.from_pretrained(model_name)
             model = T5ForConditionalGeneration.from_pretrained(model_name)
 
@@ -118,3 +504,15 @@ def get_grammar_corrector():
             return None
 
     return grammar_corrector
+
+
+def preload_t5_model():
+    """Load the T5 pipeline up front (serve.py, before forking workers); False if it isn't used or failed.
+
+    The ONNX backend is left to each worker: ONNX Runtime sessions own thread
+    pools that do not survive fork(). With a 'neural' process pool the model
+    lives in the pool's processes instead.
+    """
+    if not _use_t5_model or _t5_backend == "onnx" or pool_configured("neural"):
+        return False
+    return _load_t5("pipeline") is not None
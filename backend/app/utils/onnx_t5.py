@@ -0,0 +1,167 @@
+"""T5 grammar corrector on ONNX Runtime with an int8-quantized export.
+
+An alternative to the `transformers` pipeline over a dynamically quantized
+torch model: the encoder and the two decoders (first step, and later steps
+with past key/values) are exported to ONNX once, their weights quantized to
+int8, and generation is a plain greedy loop over ONNX Runtime sessions. The
+cross-attention keys/values are computed on the first decoder step and reused,
+and each later step feeds only the newest token plus the cached self-attention
+keys/values, so a step costs one token's worth of work instead of re-running
+the whole prefix. Nothing from torch is loaded at serve time.
+
+Select it with T5_BACKEND=onnx (next to USE_T5_MODEL=true), after exporting
+(needs torch and optimum, at build time only; both runtimes come with the
+"onnx" extra):
+
+    pip install -e ".[onnx]"
+    python -m app.utils.onnx_t5 [--output PATH]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:  # Only needed when this backend is selected
+    np = None
+
+T5_ONNX_PATH = os.getenv("T5_ONNX_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "t5-onnx"
+)
+
+ENCODER_FILE = "encoder_model.onnx"
+DECODER_FILE = "decoder_model.onnx"
+DECODER_WITH_PAST_FILE = "decoder_with_past_model.onnx"
+
+
+def _feed(session, candidates):
+    """Only the inputs this session declares (exports differ, e.g. in whether they take encoder_hidden_states)."""
+    return {i.name: candidates[i.name] for i in session.get_inputs()}
+
+
+def _run(session, candidates):
+    names = [o.name for o in session.get_outputs()]
+    return dict(zip(names, session.run(None, _feed(session, candidates))))
+
+
+class OnnxT5Corrector:
+    """Greedy T5 generation over ONNX Runtime sessions, called like the text2text pipeline.
+
+    `corrector(texts, max_length=128)` returns one `{'generated_text': ...}` per
+    text, so it drops into correct_sentences() and the inference scheduler.
+    """
+
+    def __init__(self, tokenizer, encoder, decoder, decoder_with_past, model_id,
+                 decoder_start_token_id=0, eos_token_id=1, pad_token_id=0):
+        self.tokenizer = tokenizer
+        self.encoder = encoder
+        self.decoder = decoder
+        self.decoder_with_past = decoder_with_past
+        # Cache keys must not mix its outputs with the torch pipeline's
+        self.model_id = model_id
+        self.decoder_start_token_id = decoder_start_token_id
+        self.eos_token_id = eos_token_id
+        self.pad_token_id = pad_token_id
+
+    @classmethod
+    def from_pretrained(cls, path=None, num_threads=None, model_name="vennify/t5-base-grammar-correction"):
+        """Load an export written by export_model()."""
+        import onnxruntime
+        from transformers import AutoConfig, AutoTokenizer
+
+        path = path or T5_ONNX_PATH
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        def session(name):
+            return onnxruntime.InferenceSession(
+                os.path.join(path, name), options, providers=["CPUExecutionProvider"]
+            )
+
+        config = AutoConfig.from_pretrained(path)
+        return cls(
+            AutoTokenizer.from_pretrained(path),
+            session(ENCODER_FILE), session(DECODER_FILE), session(DECODER_WITH_PAST_FILE),
+            model_id=f"{model_name}:onnx-int8",
+            decoder_start_token_id=config.decoder_start_token_id,
+            eos_token_id=config.eos_token_id,
+            pad_token_id=config.pad_token_id,
+        )
+
+    def __call__(self, inputs, batch_size=None, max_length=128, **kwargs):
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not inputs:
+            return []
+        encoded = self.tokenizer(list(inputs), padding=True, truncation=True, max_length=512, return_tensors="np")
+        tokens = self.generate(
+            encoded["input_ids"].astype(np.int64), encoded["attention_mask"].astype(np.int64), max_length
+        )
+        texts = self.tokenizer.batch_decode(tokens, skip_special_tokens=True)
+        return [{'generated_text': text} for text in texts]
+
+    def generate(self, input_ids, attention_mask, max_length=128):
+        """Greedy decoding with cached keys/values; returns the generated token ids per row."""
+        batch = input_ids.shape[0]
+        hidden = _run(self.encoder, {"input_ids": input_ids, "attention_mask": attention_mask})["last_hidden_state"]
+
+        inputs = {
+            "input_ids": np.full((batch, 1), self.decoder_start_token_id, dtype=np.int64),
+            "encoder_hidden_states": hidden,
+            "encoder_attention_mask": attention_mask,
+        }
+        session = self.decoder
+        generated = []
+        finished = np.zeros(batch, dtype=bool)
+        past = {}
+        for _ in range(max_length):
+            outputs = _run(session, {**inputs, **past})
+            next_tokens = outputs["logits"][:, -1, :].argmax(axis=-1).astype(np.int64)
+            # Rows that already ended keep emitting padding
+            next_tokens = np.where(finished, self.pad_token_id, next_tokens)
+            generated.append(next_tokens)
+            finished |= next_tokens == self.eos_token_id
+            if finished.all():
+                break
+
+            # present.* become past_key_values.*; the cross-attention entries only come from the first step
+            for name, value in outputs.items():
+                if name.startswith("present."):
+                    past["past_key_values." + name[len("present."):]] = value
+            inputs["input_ids"] = next_tokens[:, None]
+            session = self.decoder_with_past
+        return np.stack(generated, axis=1) if generated else np.zeros((batch, 0), dtype=np.int64)
+
+
+def export_model(model_name, output=None):
+    """Export the model to ONNX (encoder, decoder, decoder with past) with int8 dynamic quantization."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from optimum.exporters.onnx import main_export
+
+    output = output or T5_ONNX_PATH
+    os.makedirs(output, exist_ok=True)
+    with tempfile.TemporaryDirectory() as exported:
+        # Keep the two decoders separate instead of merging them behind an if-node
+        main_export(model_name, output=exported, task="text2text-generation-with-past", no_post_process=True)
+        for name in os.listdir(exported):
+            source = os.path.join(exported, name)
+            if name.endswith(".onnx"):
+                # Weights to int8, activations quantized on the fly (as torch's quantize_dynamic does)
+                quantize_dynamic(source, os.path.join(output, name), weight_type=QuantType.QInt8)
+            elif os.path.isfile(source):
+                # Tokenizer and config files
+                shutil.copy(source, os.path.join(output, name))
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the T5 grammar model to int8 ONNX.")
+    parser.add_argument("--model", default="vennify/t5-base-grammar-correction")
+    parser.add_argument("--output", default=T5_ONNX_PATH)
+    args = parser.parse_args()
+    path = export_model(args.model, args.output)
+    size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path) if f.endswith(".onnx"))
+    print(f"Wrote int8 ONNX export of {args.model} ({size / 1e6:.0f} MB) to {path}")
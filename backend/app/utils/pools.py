@@ -0,0 +1,317 @@
+"""Process pools for the CPU-bound NLP stages: summarization, offline spelling and the local T5 model.
+
+The API handlers run on threads of one interpreter, so a long Sumy SVD, a
+spelling pass or a T5 generation holding the GIL slows every other request in
+the process, cheap synonym lookups included. With NLP_PROCESS_POOLS=true those
+stages run in per-stage ProcessPoolExecutors instead:
+
+- "summarize": /summarize (NLP_POOL_SUMMARIZE_WORKERS processes)
+- "spelling": the offline spelling check, when LanguageTool is down (NLP_POOL_SPELLING_WORKERS)
+- "neural": the local T5 model (NLP_POOL_NEURAL_WORKERS); the inference scheduler
+  keeps batching across requests and sends each batch to the pool
+
+Workers are forked from a forkserver that has the NLP modules imported, and
+each loads its stage's model/index in its initializer when the pool starts, so
+no request pays for the warm-up. A pool accepts at most NLP_POOL_MAX_PENDING
+queued or running calls before raising PoolOverloaded; its queue depth, wait
+and run times are reported in /metrics. Cheap paths (synonyms, LanguageTool
+over HTTP, Gemini) stay inline.
+"""
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool, ProcessPoolExecutor
+
+_pools_enabled = os.getenv("NLP_PROCESS_POOLS", "false").lower() == "true"
+_pool_start_method = os.getenv("NLP_POOL_START_METHOD", "forkserver")
+_pool_max_pending = int(os.getenv("NLP_POOL_MAX_PENDING", "64"))
+POOL_SIZES = {
+    "summarize": int(os.getenv("NLP_POOL_SUMMARIZE_WORKERS", "2")),
+    "spelling": int(os.getenv("NLP_POOL_SPELLING_WORKERS", "1")),
+    # Each neural worker holds its own copy of the model
+    "neural": int(os.getenv("NLP_POOL_NEURAL_WORKERS", "1")),
+}
+
+# Imported once by the forkserver, shared by the workers it forks
+_FORKSERVER_PRELOAD = ["app.utils.pools", "app.utils.summarizer", "app.utils.spelling", "app.utils.tokenizer"]
+
+# Set in pool workers, which run their stage inline
+_in_worker = False
+
+
+class PoolOverloaded(Exception):
+    """Raised when a pool already has its maximum of queued and running calls."""
+
+
+# Worker side
+
+
+def _init_worker(name):
+    """Pool initializer: load what the stage needs before the first call arrives."""
+    global _in_worker
+    _in_worker = True
+    # Ctrl-C is the parent's to handle; it shuts the pools down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from app.utils.assets import ensure_assets
+
+    # The parent has already downloaded what it could
+    ensure_assets(download=False)
+    try:
+        if name == "summarize":
+            from app.utils.summarizer import SUMMARIZERS, get_summarizer
+            from app.utils.tokenizer import _get_punkt
+
+            _get_punkt()
+            for algorithm in SUMMARIZERS:
+                get_summarizer(algorithm)
+        elif name == "spelling":
+            from app.utils.spelling import get_spell_checker
+
+            get_spell_checker()
+        elif name == "neural":
+            from app.utils import nlp
+
+            try:
+                import torch
+                torch.set_num_threads(nlp._torch_num_threads)
+            except ImportError:
+                pass
+            nlp._load_t5(nlp._t5_backend)
+    except Exception as e:
+        # The calls will load lazily (and report the error) instead
+        print(f"Warning: warm-up of the '{name}' pool worker failed: {e}")
+
+
+def _ping():
+    return os.getpid()
+
+
+def _timed(fn, args):
+    """Run one call in the worker, with its start and end times for the queue metrics."""
+    started = time.time()
+    result = fn(*args)
+    return started, time.time(), result
+
+
+def summarize_text(algorithm, text):
+    from app.utils.summarizer import get_summarizer
+
+    return get_summarizer(algorithm).summarize(text)
+
+
+def check_spelling(text):
+    """Offline spelling check: (start, end, word, suggestion) per misspelled word."""
+    from app.utils.spelling import get_spell_checker
+    from app.utils.tokenizer import segment
+
+    return list(get_spell_checker().check_words(segment(text).words))
+
+
+def t5_generate(inputs, kwargs):
+    from app.utils import nlp
+
+    corrector = nlp._load_t5(nlp._t5_backend)
+    if corrector is None:
+        raise RuntimeError("the T5 model failed to load in the pool worker")
+    return corrector(inputs, **kwargs)
+
+
+# Parent side
+
+
+class WorkerPool:
+    """A ProcessPoolExecutor with warm-initialized workers, a bound on pending calls and queue metrics."""
+
+    def __init__(self, name, max_workers, max_pending=64, start_method=None):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def _context(self):
+        method = self.start_method
+        if method not in multiprocessing.get_all_start_methods():
+            method = None
+        context = multiprocessing.get_context(method)
+        if context.get_start_method() == "forkserver":
+            context.set_forkserver_preload(_FORKSERVER_PRELOAD)
+        return context
+
+    def start(self):
+        """Start the worker processes and their warm-up (in the background)."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ProcessPoolExecutor(
+                self.max_workers, mp_context=self._context(), initializer=_init_worker, initargs=(self.name,)
+            )
+            executor = self._executor
+        # Executors start processes on demand; one call per worker brings them all up now
+        for _ in range(self.max_workers):
+            executor.submit(_ping)
+
+    def stop(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _restart(self, broken):
+        """Replace an executor whose worker died (the calls it held fail with BrokenProcessPool)."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.restarts += 1
+        print(f"Warning: a '{self.name}' pool worker died, restarting the pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in a worker; returns a Future of its result."""
+        self.start()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolOverloaded(f"The '{self.name}' pool is full ({self.max_pending} pending calls)")
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+            self.submitted += 1
+            executor = self._executor
+
+        outer = Future()
+        submitted = time.time()
+        try:
+            inner = executor.submit(_timed, fn, args)
+        except BrokenProcessPool:
+            self._done(None)
+            self._restart(executor)
+            raise
+
+        def resolve(inner):
+            try:
+                started, finished, result = inner.result()
+            except BaseException as e:
+                self._done(None)
+                if isinstance(e, BrokenProcessPool):
+                    self._restart(executor)
+                outer.set_exception(e)
+                return
+            self._done((started - submitted, finished - started))
+            outer.set_result(result)
+
+        inner.add_done_callback(resolve)
+        return outer
+
+    def _done(self, timings):
+        with self._lock:
+            self.pending -= 1
+            if timings is None:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self._wait_seconds += max(0.0, timings[0])
+                self._run_seconds += timings[1]
+
+    def call(self, fn, *args, timeout=None):
+        """Run fn(*args) in a worker and block until it returns (the GIL is free meanwhile)."""
+        return self.submit(fn, *args).result(timeout=timeout)
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "avg_wait_ms": round(self._wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_run_ms": round(self._run_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+
+class PooledCorrector:
+    """The local T5 model running in the 'neural' pool, called like the text2text pipeline."""
+
+    def __init__(self, pool, model_id):
+        self.pool = pool
+        # Same cache keys as the in-process model
+        self.model_id = model_id
+
+    def __call__(self, inputs, **kwargs):
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return self.pool.call(t5_generate, list(inputs), kwargs)
+
+
+# Lazy globals, one pool per stage
+pools = {}
+_lock = threading.Lock()
+
+
+def pool_configured(name):
+    """Whether a stage runs in a process pool (without starting it)."""
+    return _pools_enabled and not _in_worker and POOL_SIZES.get(name, 0) > 0
+
+
+def get_pool(name):
+    """Get the pool for a stage, or None when the stage runs inline."""
+    if not pool_configured(name):
+        return None
+    pool = pools.get(name)
+    if pool is None:
+        with _lock:
+            pool = pools.get(name)
+            if pool is None:
+                pool = pools[name] = WorkerPool(
+                    name, POOL_SIZES[name], max_pending=_pool_max_pending, start_method=_pool_start_method
+                )
+    return pool
+
+
+def start_pools():
+    """Create the configured pools and start warming their workers (called on startup)."""
+    for name in POOL_SIZES:
+        pool = get_pool(name)
+        if pool is not None:
+            pool.start()
+
+
+def stop_pools():
+    with _lock:
+        stopping = list(pools.values())
+        pools.clear()
+    for pool in stopping:
+        pool.stop()
+
+
+def pool_stats():
+    """Queue metrics per started pool, or None when pools are off."""
+    if not _pools_enabled:
+        return None
+    return {name: pool.stats() for name, pool in list(pools.items())}
@@ -0,0 +1,181 @@
+"""Cheap first stage deciding which sentences are worth sending to the neural corrector.
+
+Most student sentences are already correct, and the T5/Gemini corrector costs
+the same for a clean sentence as for a broken one. Each sentence is scored by a
+small logistic model over features that are free by the time the neural stage
+runs: the LanguageTool (or offline spelling) matches inside the sentence,
+out-of-vocabulary words, agreement bigrams that are almost always wrong
+("he don't", "they was", "a apple"), repeated words, and capitalization and
+punctuation slips. Only sentences scoring at least the threshold reach the
+corrector; benchmarks/eval_prefilter.py measures the recall given up against
+the compute saved, and can refit the weights. Off by default (GRAMMAR_PREFILTER):
+without LanguageTool the cheap features only catch a third of the errors.
+"""
+import bisect
+import json
+import math
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Sequence
+
+_prefilter_enabled = os.getenv("GRAMMAR_PREFILTER", "false").lower() == "true"
+_prefilter_threshold = float(os.getenv("GRAMMAR_PREFILTER_THRESHOLD", "0.3"))
+_prefilter_weights_path = os.getenv("GRAMMAR_PREFILTER_WEIGHTS", "")
+
+FEATURES = (
+    "bias", "grammar_matches", "spelling_matches", "oov_words", "bad_bigrams",
+    "repeated_words", "lowercase_start", "no_final_punctuation", "log_length",
+)
+
+# Fitted with `python -m benchmarks.eval_prefilter --fit` on the bundled essays
+# (offline spelling only, so grammar_matches and the length prior keep hand-set
+# values). OOV words and spelling matches got no weight: the frequency list
+# misses too many correct domain words, and the spelling stage reports typos anyway.
+DEFAULT_WEIGHTS = {
+    "bias": -2.18,
+    "grammar_matches": 4.0,
+    "spelling_matches": 0.0,
+    "oov_words": 0.0,
+    "bad_bigrams": 2.27,
+    "repeated_words": 1.24,
+    "lowercase_start": 0.78,
+    "no_final_punctuation": 1.0,
+    "log_length": 0.4,
+}
+
+_WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+
+# Subject + verb pairs that don't agree
+_SUBJECT_VERBS = {
+    "i": {"is", "are", "has", "was"},
+    "you": {"is", "has", "was", "am"},
+    "we": {"is", "has", "was", "am"},
+    "they": {"is", "has", "was", "am"},
+    "he": {"are", "have", "were", "don't", "am", "do"},
+    "she": {"are", "have", "were", "don't", "am", "do"},
+    "it": {"are", "have", "were", "don't", "am", "do"},
+}
+_BAD_BIGRAMS = frozenset((subject, verb) for subject, verbs in _SUBJECT_VERBS.items() for verb in verbs) | frozenset({
+    ("more", "better"), ("more", "worse"), ("most", "best"), ("didn't", "went"), ("didn't", "came"),
+    ("can", "sings"), ("can", "goes"), ("to", "went"), ("to", "goes"), ("an", "one"),
+    ("despite", "of"), ("am", "agree"), ("is", "agree"),
+})
+# "a" before these initial letters is usually wrong ("an" before a consonant is scored too)
+_VOWELS = frozenset("aeio")
+
+
+# Regular inflections, so plurals and verb forms missing from the frequency list aren't counted as OOV
+_SUFFIXES = ("s", "es", "ed", "d", "ing", "ly", "er", "ers")
+
+
+def _known(word, vocabulary):
+    return word in vocabulary or any(
+        word.endswith(suffix) and word[:-len(suffix)] in vocabulary for suffix in _SUFFIXES
+    )
+
+
+class SentenceScore(NamedTuple):
+    index: int
+    score: float
+    features: Dict[str, float]
+
+
+def _load_weights(path):
+    if not path:
+        return dict(DEFAULT_WEIGHTS)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {**DEFAULT_WEIGHTS, **json.load(f)}
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read prefilter weights from {path}, using defaults: {e}")
+        return dict(DEFAULT_WEIGHTS)
+
+
+def features(text, matches=(), vocabulary=None):
+    """Feature values for one sentence; `matches` are the types of the checker errors inside it."""
+    words = _WORD_RE.findall(text)
+    lower = [w.lower() for w in words]
+    bigrams = list(zip(lower, lower[1:]))
+
+    bad = sum(1 for pair in bigrams if pair in _BAD_BIGRAMS)
+    bad += sum(1 for a, b in bigrams if (a == "a" and b[0] in _VOWELS) or (a == "an" and b[0] not in _VOWELS | {"h", "u"}))
+    oov = 0
+    if vocabulary is not None:
+        # Words split on apostrophes, as in the spelling dictionary
+        oov = sum(1 for w in lower for part in w.split("'") if len(part) > 1 and not _known(part, vocabulary))
+    stripped = text.strip()
+    return {
+        "bias": 1.0,
+        "grammar_matches": float(sum(1 for m in matches if m == "grammar")),
+        "spelling_matches": float(sum(1 for m in matches if m == "spelling")),
+        "oov_words": float(oov),
+        "bad_bigrams": float(bad),
+        "repeated_words": float(sum(1 for a, b in bigrams if a == b and a not in ("had", "that"))),
+        "lowercase_start": float(bool(stripped) and stripped[0].islower()),
+        "no_final_punctuation": float(bool(stripped) and stripped[-1] not in ".!?\"')"),
+        "log_length": math.log1p(len(words)),
+    }
+
+
+class PreFilter:
+    """Logistic scorer: P(sentence needs correcting) = sigmoid(weights . features)."""
+
+    def __init__(self, weights=None, threshold=0.3, vocabulary=None):
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.threshold = threshold
+        self.vocabulary = vocabulary
+
+    def score(self, text, matches=()):
+        values = features(text, matches, self.vocabulary)
+        z = sum(self.weights.get(name, 0.0) * value for name, value in values.items())
+        return 1.0 / (1.0 + math.exp(-max(-60.0, min(60.0, z)))), values
+
+    def scores(self, sentences: Sequence[str], matches: Sequence[Sequence[str]]) -> List[SentenceScore]:
+        results = []
+        for i, (text, sentence_matches) in enumerate(zip(sentences, matches)):
+            score, values = self.score(text, sentence_matches)
+            results.append(SentenceScore(i, score, values))
+        return results
+
+    def select(self, sentences, matches):
+        """Indices of the sentences to forward to the corrector."""
+        return [s.index for s in self.scores(sentences, matches) if s.score >= self.threshold]
+
+
+def matches_by_sentence(sentences, errors):
+    """Bucket checker errors (GrammarErrors with absolute positions) by sentence, as their types."""
+    starts = [s.start for s in sentences]
+    buckets = [[] for _ in sentences]
+    for error in errors:
+        i = bisect.bisect_right(starts, error.position.start) - 1
+        if i >= 0 and error.position.start < sentences[i].end:
+            buckets[i].append(error.type)
+    return buckets
+
+
+# Lazy global, the vocabulary comes from the spelling index
+prefilter = None
+_lock = threading.Lock()
+
+
+def prefilter_enabled():
+    return _prefilter_enabled
+
+
+def get_prefilter():
+    """Get the shared pre-filter, or None when GRAMMAR_PREFILTER is off."""
+    global prefilter
+
+    if not _prefilter_enabled:
+        return None
+    if prefilter is None:
+        with _lock:
+            if prefilter is None:
+                from app.utils.spelling import get_spell_checker
+
+                prefilter = PreFilter(
+                    _load_weights(_prefilter_weights_path), _prefilter_threshold,
+                    vocabulary=get_spell_checker().frequencies,
+                )
+    return prefilter
@@ -0,0 +1,182 @@
+"""Offline spelling engine used when LanguageTool is unavailable.
+
+Replaces per-word `TextBlob.Word.correct()` (a Norvig edit-distance search run
+from scratch for every token) with a SymSpell-style index: every dictionary word
+is stored under all strings reachable by deleting up to `max_distance`
+characters from its prefix, so distance-2 candidates come from a few dict probes
+instead of enumerating hundreds of thousands of edits. Known words take a single
+lookup and every token's suggestion is memoized. Suggestions use TextBlob's own
+word-frequency list and ranking (closest edit distance, then most frequent
+word), so results stay comparable.
+"""
+import os
+import threading
+from functools import lru_cache
+from app.utils.tokenizer import Token, iter_words
+
+# Lazy global, the index takes about a second to build
+spell_checker = None
+_lock = threading.Lock()
+
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+def osa_distance(a, b, max_distance):
+    """Optimal string alignment distance (Damerau-Levenshtein with adjacent swaps).
+
+    Returns max_distance + 1 as soon as the distance is known to exceed max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def _edits1(word):
+    """Every string one delete, adjacent swap, replace or insert away (as in Norvig's corrector)."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = [a + b[1:] for a, b in splits if b]
+    transposes = [a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1]
+    replaces = [a + c + b[1:] for a, b in splits if b for c in _ALPHABET]
+    inserts = [a + c + b for a, b in splits for c in _ALPHABET]
+    return set(deletes + transposes + replaces + inserts)
+
+
+def _deletes(word, max_distance):
+    """All strings obtained by deleting up to max_distance characters (including the word itself)."""
+    found = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {s[:i] + s[i + 1:] for s in frontier for i in range(len(s))}
+        found |= frontier
+    return found
+
+
+class SpellChecker:
+    """Dictionary-backed spelling corrector with a precomputed delete index."""
+
+    def __init__(self, frequencies, max_distance=2, prefix_length=7, memo_size=65536):
+        self.frequencies = frequencies
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = list(frequencies)
+
+        # delete string -> word index (int), or list of indices when shared
+        self._index = {}
+        for i, word in enumerate(self.words):
+            for variant in _deletes(word[:prefix_length], max_distance):
+                entry = self._index.get(variant)
+                if entry is None:
+                    self._index[variant] = i
+                elif isinstance(entry, int):
+                    self._index[variant] = [entry, i]
+                else:
+                    entry.append(i)
+
+        # Per-token memoization: a document repeats the same words many times
+        self.suggest = lru_cache(maxsize=memo_size)(self._suggest)
+
+    @classmethod
+    def from_textblob(cls, **kwargs):
+        """Build from the word-frequency list bundled with TextBlob (no corpus download needed)."""
+        import textblob.en
+
+        path = os.path.join(os.path.dirname(textblob.en.__file__), "en-spelling.txt")
+        frequencies = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(";;;"):
+                    continue
+                parts = line.split()
+                if len(parts) == 2:
+                    frequencies[parts[0]] = int(parts[1])
+        return cls(frequencies, **kwargs)
+
+    def known(self, word):
+        return word.lower() in self.frequencies
+
+    def _suggest(self, word):
+        """Best correction for a word, or None if it is known or nothing is close enough."""
+        lower = word.lower()
+        if lower in self.frequencies:
+            return None
+        # The dictionary is ASCII English: "café" or "Zürich" can't be judged, only mangled
+        if not lower.isascii():
+            return None
+
+        # Distance 1: enumerating single edits is cheaper than scanning index candidates
+        best = [w for w in _edits1(lower) if w in self.frequencies]
+        if not best and self.max_distance >= 2:
+            best = self._lookup(lower)
+        if not best:
+            return None
+
+        # Same tie-break as TextBlob: most frequent, then reverse alphabetical
+        suggestion = max(best, key=lambda w: (self.frequencies[w], w))
+        if word.istitle():  # Preserve capitalization
+            suggestion = suggestion.title()
+        return suggestion
+
+    def _lookup(self, lower):
+        """Closest dictionary words found through the delete index."""
+        candidates = set()
+        for variant in _deletes(lower[:self.prefix_length], self.max_distance):
+            entry = self._index.get(variant)
+            if entry is None:
+                continue
+            if isinstance(entry, int):
+                candidates.add(entry)
+            else:
+                candidates.update(entry)
+
+        best_distance = self.max_distance + 1
+        best = []
+        for i in candidates:
+            candidate = self.words[i]
+            distance = osa_distance(lower, candidate, min(best_distance, self.max_distance))
+            if distance < best_distance:
+                best_distance, best = distance, [candidate]
+            elif distance == best_distance and distance <= self.max_distance:
+                best.append(candidate)
+        return best
+
+    def check(self, text):
+        """Return (start, end, word, suggestion) for every misspelled word in text."""
+        return self.check_words(Token(w, s, e) for s, e, w in iter_words(text))
+
+    def check_words(self, words):
+        """Like check(), for words already segmented into Tokens (see app.utils.tokenizer)."""
+        misspellings = []
+        for word, start, end in words:
+            if len(word) <= 1:
+                continue
+            suggestion = self.suggest(word)
+            if suggestion is not None and suggestion != word:
+                misspellings.append((start, end, word, suggestion))
+        return misspellings
+
+
+def get_spell_checker():
+    """Get the shared spell checker, building its index on first use."""
+    global spell_checker
+
+    if spell_checker is None:
+        with _lock:
+            if spell_checker is None:
+                spell_checker = SpellChecker.from_textblob()
+    return spell_checker
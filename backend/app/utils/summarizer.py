@@ -0,0 +1,331 @@
+"""Extractive summarizers on NumPy arrays, selectable by name.
+
+Three rankers share one sentence pipeline (segmentation, cached stemming,
+sparse term counts): "lsa" (the default), "textrank" and "centroid".
+
+The LSA ranker produces the same ranking as sumy's `LsaSummarizer` (which builds a dense
+term-sentence matrix cell by cell and runs a full SVD on every request), but
+keeps the term counts as sparse (row, col, count) arrays and reuses the stemmer
+and stop-word set across requests. With every singular value kept, as sumy
+does, a sentence's LSA rank sqrt(sum sigma_i^2 * v_ij^2) is exactly the norm of
+its column in the TF matrix, so no SVD is needed and ranking is linear in the
+number of words. Setting `components` keeps only the top k singular values,
+computed with a randomized truncated SVD that never materializes the matrix.
+
+TextRank and centroid work on L2-normalized TF-IDF sentence vectors and never
+build the sentence-similarity matrix: its products are taken through the
+sparse term-sentence factors, so each step is linear in the number of words.
+"""
+import os
+import threading
+from functools import lru_cache
+
+from sumy.nlp.stemmers import Stemmer
+from sumy.utils import get_stop_words
+
+from app.utils.tokenizer import segment, summary_words
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Lazy globals, one instance per algorithm
+summarizers = {}
+_lock = threading.Lock()
+
+# Used when a request doesn't name an algorithm
+SUMMARY_ALGORITHM = os.getenv("SUMMARY_ALGORITHM", "lsa")
+
+# 0 keeps every singular value (identical ranking to sumy); k > 0 uses a rank-k truncated SVD
+SUMMARY_LSA_COMPONENTS = int(os.getenv("SUMMARY_LSA_COMPONENTS", "0"))
+
+# Streaming mode: sentences per section; each section is summarized on its own
+SUMMARY_STREAM_WINDOW = int(os.getenv("SUMMARY_STREAM_WINDOW", "200"))
+
+# sumy never uses fewer dimensions than this
+MIN_DIMENSIONS = 3
+
+
+def summary_length(sentence_count):
+    """Sentences to keep: 30% of the document, at least 2."""
+    return max(2, int(sentence_count * 0.3))
+
+
+class Summarizer:
+    """Base extractive summarizer: subclasses rank sentences. Safe to share between threads."""
+
+    name = None
+
+    def __init__(self, language="english"):
+        if np is None:
+            raise ValueError("Summarizers require NumPy. Install it with 'pip install numpy'.")
+        self.stop_words = frozenset(w.lower() for w in get_stop_words(language))
+        # A document repeats the same words many times, and stemming is the slow part
+        self._stem = lru_cache(maxsize=65536)(Stemmer(language))
+
+    @property
+    def identity(self):
+        """Name used in cache keys; changes whenever the ranking would."""
+        return self.name
+
+    def _term_counts(self, sentences):
+        """Sparse term-sentence counts as (rows, cols, counts) arrays plus the vocabulary size.
+
+        Same vocabulary as sumy: stems of non-stop words. Every word whose stem is
+        in the vocabulary is counted, including stop words sharing a stem.
+        """
+        vocabulary = {}
+        sentence_stems = []
+        for words in sentences:
+            stems = []
+            for word in words:
+                lower = word.lower()
+                stem = self._stem(lower)
+                stems.append(stem)
+                if lower not in self.stop_words:
+                    vocabulary.setdefault(stem, len(vocabulary))
+            sentence_stems.append(stems)
+
+        rows, cols = [], []
+        for col, stems in enumerate(sentence_stems):
+            for stem in stems:
+                row = vocabulary.get(stem)
+                if row is not None:
+                    rows.append(row)
+                    cols.append(col)
+
+        n = len(sentences)
+        cells, counts = np.unique(np.asarray(rows, dtype=np.int64) * n + np.asarray(cols, dtype=np.int64),
+                                  return_counts=True)
+        return cells // n, cells % n, counts.astype(np.float64), len(vocabulary)
+
+    def _tfidf(self, sentences):
+        """L2-normalized TF-IDF sentence vectors as sparse (rows, cols, values) plus the vocabulary size."""
+        n = len(sentences)
+        rows, cols, counts, terms = self._term_counts(sentences)
+        if terms == 0:
+            return rows, cols, counts, terms
+        idf = np.log(n / np.bincount(rows, minlength=terms)) + 1.0
+        values = counts * idf[rows]
+        norms = np.sqrt(np.bincount(cols, weights=values ** 2, minlength=n))
+        return rows, cols, values / norms[cols], terms
+
+    def rank(self, sentences):
+        """Score of each sentence, given as lists of words (higher is better)."""
+        raise NotImplementedError
+
+    def select(self, sentences, sentences_count=None):
+        """Best of the given sentence strings, in their original order."""
+        if sentences_count is None:
+            sentences_count = summary_length(len(sentences))
+        ranks = self.rank([summary_words(s) for s in sentences])
+        if not ranks.any():
+            return []  # No content words (sumy returns an empty summary too)
+        # Stable sort: among equal ranks the earlier sentence wins, as in sumy
+        best = sorted(np.argsort(-ranks, kind="stable")[:sentences_count])
+        return [sentences[i] for i in best]
+
+    def summarize(self, text, sentences_count=None):
+        """Best sentences of text, in document order, joined with spaces."""
+        sentences = [s.text for s in segment(text).sentences]
+        if len(sentences) <= 2:
+            return text
+        return " ".join(self.select(sentences, sentences_count))
+
+
+class LsaSummarizer(Summarizer):
+    """Latent semantic analysis ranking, identical to sumy's LsaSummarizer."""
+
+    name = "lsa"
+
+    def __init__(self, language="english", components=0, smooth=0.4, oversample=10, power_iterations=2, seed=0):
+        super().__init__(language)
+        self.components = components
+        self.smooth = smooth
+        self.oversample = oversample
+        self.power_iterations = power_iterations
+        self.seed = seed
+
+    @property
+    def identity(self):
+        return f"lsa-k{self.components}" if self.components else "lsa"
+
+    def rank(self, sentences):
+        """LSA rank of each sentence, given as lists of words."""
+        n = len(sentences)
+        rows, cols, counts, terms = self._term_counts(sentences)
+        if terms == 0:
+            return np.zeros(n)
+
+        # Maximum-TF normalization. sumy smooths every cell of a non-empty column,
+        # zeros included, so A = smooth * 1 mask^T + S with S sparse.
+        max_counts = np.zeros(n)
+        np.maximum.at(max_counts, cols, counts)
+        mask = (max_counts > 0).astype(np.float64)
+        values = (1.0 - self.smooth) * counts / max_counts[cols]
+
+        k = max(MIN_DIMENSIONS, self.components) if self.components else 0
+        if not k or k >= min(terms, n):
+            # All singular values kept: rank_j = ||A[:, j]||
+            norms = mask * terms * self.smooth ** 2
+            norms += np.bincount(cols, weights=(self.smooth + values) ** 2 - self.smooth ** 2, minlength=n)
+            return np.sqrt(norms)
+
+        sigma, vt = self._truncated_svd(rows, cols, values, mask, terms, n, k)
+        return np.sqrt((sigma[:, None] ** 2 * vt ** 2).sum(axis=0))
+
+    def _truncated_svd(self, rows, cols, values, mask, terms, n, k):
+        """Top-k singular values and right singular vectors (Halko et al. randomized SVD)."""
+        smooth = self.smooth
+
+        def matmul(x):  # A @ x, x is n-by-p
+            out = np.outer(np.ones(terms), smooth * (mask @ x))
+            for j in range(x.shape[1]):
+                out[:, j] += np.bincount(rows, weights=values * x[cols, j], minlength=terms)
+            return out
+
+        def rmatmul(y):  # A.T @ y, y is terms-by-p
+            out = np.outer(mask, smooth * y.sum(axis=0))
+            for j in range(y.shape[1]):
+                out[:, j] += np.bincount(cols, weights=values * y[rows, j], minlength=n)
+            return out
+
+        rng = np.random.default_rng(self.seed)
+        q, _ = np.linalg.qr(matmul(rng.standard_normal((n, min(n, k + self.oversample)))))
+        for _ in range(self.power_iterations):
+            z, _ = np.linalg.qr(rmatmul(q))
+            q, _ = np.linalg.qr(matmul(z))
+        _, sigma, vt = np.linalg.svd(rmatmul(q).T, full_matrices=False)
+        return sigma[:k], vt[:k]
+
+
+
+class TextRankSummarizer(Summarizer):
+    """TextRank: PageRank over the cosine-similarity graph of TF-IDF sentence vectors.
+
+    With X the normalized term-sentence matrix the graph is X^T X minus its
+    diagonal, so each power-iteration step costs two sparse products.
+    """
+
+    name = "textrank"
+
+    def __init__(self, language="english", damping=0.85, tolerance=1e-6, max_iterations=100):
+        super().__init__(language)
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+    def rank(self, sentences):
+        n = len(sentences)
+        rows, cols, values, terms = self._tfidf(sentences)
+        if terms == 0:
+            return np.zeros(n)
+
+        def similarity(x):  # (X^T X - I_nonempty) @ x; unit vectors have self-similarity 1
+            term_weights = np.bincount(rows, weights=values * x[cols], minlength=terms)
+            return np.bincount(cols, weights=values * term_weights[rows], minlength=n) - nonempty * x
+
+        nonempty = (np.bincount(cols, minlength=n) > 0).astype(np.float64)
+        degree = similarity(np.ones(n))
+        inverse_degree = np.divide(1.0, degree, out=np.zeros(n), where=degree > 1e-12)
+        dangling = inverse_degree == 0
+
+        scores = np.full(n, 1.0 / n)
+        for _ in range(self.max_iterations):
+            # Sentences without neighbours spread their score evenly
+            spread = scores[dangling].sum() / n
+            updated = (1.0 - self.damping) / n + self.damping * (similarity(scores * inverse_degree) + spread)
+            converged = np.abs(updated - scores).sum() < self.tolerance
+            scores = updated
+            if converged:
+                break
+        # Sentences without content words can't be picked over ones with some
+        return scores * nonempty
+
+
+class CentroidSummarizer(Summarizer):
+    """Centroid ranking: cosine similarity of each TF-IDF sentence vector to the document centroid."""
+
+    name = "centroid"
+
+    def rank(self, sentences):
+        n = len(sentences)
+        rows, cols, values, terms = self._tfidf(sentences)
+        if terms == 0:
+            return np.zeros(n)
+        centroid = np.bincount(rows, weights=values, minlength=terms) / n
+        # Sentence vectors are unit length, so the dot product ranks like the cosine
+        return np.bincount(cols, weights=values * centroid[rows], minlength=n) / np.linalg.norm(centroid)
+
+
+# Available algorithms by name; SummarizeRequest.algorithm lists the same names
+SUMMARIZERS = {
+    "lsa": lambda: LsaSummarizer(components=SUMMARY_LSA_COMPONENTS),
+    "textrank": TextRankSummarizer,
+    "centroid": CentroidSummarizer,
+}
+
+
+class StreamingSummary:
+    """Summarize an unbounded stream of sentences in bounded memory.
+
+    Sentences are summarized in sections of `window`. Each section's summary
+    goes up one level; when a level holds `window` sentences it is summarized
+    into the next, so at most `window` sentences are held per level (a
+    logarithmic number of levels).
+    """
+
+    def __init__(self, engine, window=None):
+        self.engine = engine
+        self.window = max(3, window or SUMMARY_STREAM_WINDOW)
+        self.levels = [[]]
+        self.sections = 0
+        self.sentences = 0
+
+    def extend(self, sentences):
+        """Add sentences; returns the summaries of the sections they completed."""
+        finished = []
+        for sentence in sentences:
+            self.sentences += 1
+            self.levels[0].append(sentence)
+            if len(self.levels[0]) >= self.window:
+                summary = self._reduce(0)
+                self.sections += 1
+                finished.append(" ".join(summary))
+        return finished
+
+    def _reduce(self, level):
+        """Summarize a full level into the one above it; returns the selected sentences."""
+        selected = self.engine.select(self.levels[level])
+        self.levels[level] = []
+        if level + 1 == len(self.levels):
+            self.levels.append([])
+        self.levels[level + 1].extend(selected)
+        if len(self.levels[level + 1]) >= self.window:
+            self._reduce(level + 1)
+        return selected
+
+    def finish(self):
+        """Summary of everything seen (higher levels hold earlier text)."""
+        remaining = [s for level in reversed(self.levels) for s in level]
+        if len(remaining) <= 2:
+            return " ".join(remaining)
+        return " ".join(self.engine.select(remaining))
+
+
+def get_summarizer(algorithm=None):
+    """Get the shared summarizer for an algorithm name (default: SUMMARY_ALGORITHM).
+
+    Instances are reused across requests, so their stemmer cache and stop words are too.
+    """
+    algorithm = algorithm or SUMMARY_ALGORITHM
+    engine = summarizers.get(algorithm)
+    if engine is None:
+        if algorithm not in SUMMARIZERS:
+            raise ValueError(f"Unknown summarization algorithm: {algorithm}")
+        with _lock:
+            engine = summarizers.get(algorithm)
+            if engine is None:
+                engine = summarizers[algorithm] = SUMMARIZERS[algorithm]()
+    return engine
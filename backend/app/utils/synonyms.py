@@ -0,0 +1,361 @@
+"""Prebuilt, memory-mapped synonym index with context-aware ranking.
+
+Replaces walking `wordnet.synsets(word)` on every request (and the lazy
+WordNet corpus load on the first one) with a binary file built once from
+WordNet. It stores every sense (synset) once, as UTF-8 runs addressed through
+an array of offsets: its members and a gloss signature (stemmed content words
+of its definition, examples and members), plus each word's senses with how
+often the word is used in them. Lookups hash the word with CRC32 and probe an
+open-addressing table that keeps the full hash next to each entry, so
+collisions are skipped without comparing strings and nothing parses WordNet.
+The file is mapped read-only, so worker processes share its pages.
+
+Senses are ranked by simplified Lesk overlap between the signature and the
+request's context, then by frequency, then by WordNet's order, so results are
+deterministic and cacheable. Without an index file the same senses are read
+from WordNet directly and ranked the same way.
+
+Build it (needs the NLTK WordNet data) with:
+
+    python -m app.utils.synonyms [--output PATH]
+"""
+import argparse
+import os
+import struct
+import threading
+import zlib
+from array import array
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple, Tuple
+
+# Lazy global; False means we looked and no index file is available
+synonym_index = None
+_lock = threading.Lock()
+
+SYNONYM_INDEX_PATH = os.getenv("SYNONYM_INDEX_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "synonyms.idx"
+)
+
+# Synonyms returned per word (0 = all)
+SYNONYMS_TOP_K = int(os.getenv("SYNONYMS_TOP_K", "10"))
+
+_MAGIC = b"SYNIDX\0\0"
+_FORMAT_VERSION = 4
+# magic, format version, words, senses, hash slots, data version length
+_HEADER = struct.Struct("=8sIIIII")
+# Lemma names never contain newlines, so a sense's members are stored as one joined string
+_SEPARATOR = "\n"
+
+# WordNet's regular inflection rules (as in morphy), used when a word isn't indexed as-is
+_SUFFIX_RULES = (
+    ("s", ""), ("ses", "s"), ("xes", "x"), ("zes", "z"), ("ches", "ch"), ("shes", "sh"),
+    ("men", "man"), ("ies", "y"), ("es", "e"), ("es", ""), ("ed", "e"), ("ed", ""),
+    ("ing", "e"), ("ing", ""), ("er", ""), ("est", ""), ("er", "e"), ("est", "e"),
+)
+
+
+class Sense(NamedTuple):
+    members: Tuple[str, ...]  # lemma names, most used first
+    count: int  # how often the looked-up word is used in this sense
+    signature: FrozenSet[str]  # stemmed content words of the gloss
+
+
+@lru_cache(maxsize=1)
+def _normalizer():
+    from sumy.nlp.stemmers import Stemmer
+    from sumy.utils import get_stop_words
+
+    return lru_cache(maxsize=65536)(Stemmer("english")), frozenset(get_stop_words("english"))
+
+
+def signature(text):
+    """Stemmed content words of text, for Lesk overlap."""
+    from app.utils.tokenizer import summary_words
+
+    stem, stop_words = _normalizer()
+    return frozenset(stem(w) for w in (w.lower() for w in summary_words(text)) if w not in stop_words)
+
+
+def rank_senses(word, senses, context, top_k=None):
+    """Synonyms of word from its senses, best-fitting sense first.
+
+    `context` is a signature() of the surrounding text; without one, senses are
+    ranked by frequency alone.
+    """
+    top_k = SYNONYMS_TOP_K if top_k is None else top_k
+    context = context - signature(word) if context else frozenset()
+    order = sorted(range(len(senses)), key=lambda i: (
+        -len(senses[i].signature & context), -senses[i].count, i
+    ))
+    ranked = {}
+    for i in order:
+        for member in senses[i].members:
+            if member.lower() != word:
+                ranked.setdefault(member, None)
+        if top_k and len(ranked) >= top_k:
+            break
+    ranked = list(ranked)
+    return ranked[:top_k] if top_k else ranked
+
+
+def _u32(values):
+    # Native byte order: the index is built on the kind of machine that serves it
+    return array("I", values).tobytes()
+
+
+def build_index(entries, path, version=""):
+    """Write an index file from (word, senses, base forms) entries. Words are stored lowercased.
+
+    `senses` is a list of (sense id, members, count, signature words); senses
+    with the same id are stored once, with all their members. `base forms` are
+    the members that are the word itself in another form ("run" for "ran");
+    lookups leave them out.
+    """
+    keys, bases, word_senses, word_sense_offsets = [], [], [], [0]
+    sense_ids, sense_members, sense_signatures = {}, [], []
+    seen = set()
+    for word, senses, word_bases in entries:
+        word = word.lower()
+        if word in seen:
+            continue
+        seen.add(word)
+        keys.append(word.encode("utf-8"))
+        bases.append(_SEPARATOR.join(word_bases).encode("utf-8"))
+        for sense_id, members, count, words in senses:
+            number = sense_ids.get(sense_id)
+            if number is None:
+                number = sense_ids[sense_id] = len(sense_members)
+                sense_members.append(_SEPARATOR.join(members).encode("utf-8"))
+                sense_signatures.append(" ".join(sorted(words)).encode("utf-8"))
+            word_senses.extend((number, count))
+        word_sense_offsets.append(len(word_senses) // 2)
+
+    # One blob of runs addressed by offsets: keys, base forms, sense members, sense signatures
+    runs = keys + bases + sense_members + sense_signatures
+    offsets = [0]
+    for data in runs:
+        offsets.append(offsets[-1] + len(data))
+
+    # Open addressing with linear probing, at most half full; each slot is (hash, entry + 1)
+    table_size = 1
+    while table_size < 2 * len(keys):
+        table_size *= 2
+    slots = [0] * (2 * table_size)
+    mask = table_size - 1
+    for entry, key in enumerate(keys):
+        key_hash = zlib.crc32(key)
+        slot = key_hash & mask
+        while slots[2 * slot + 1]:
+            slot = (slot + 1) & mask
+        slots[2 * slot] = key_hash
+        slots[2 * slot + 1] = entry + 1
+
+    version_bytes = version.encode("utf-8")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(keys), len(sense_members), table_size, len(version_bytes)))
+        f.write(version_bytes + b"\0" * (-len(version_bytes) % 4))
+        for section in (slots, word_sense_offsets, word_senses, offsets):
+            f.write(_u32(section))
+        f.write(b"".join(runs))
+    # Readers either see the old file or the complete new one
+    os.replace(temp_path, path)
+
+
+class SynonymIndex:
+    """Read-only view of an index file; safe to share between threads."""
+
+    def __init__(self, path, memo_size=8192):
+        import mmap
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"Unsupported synonym index file: {path}")
+        magic, format_version, n_words, n_senses, table_size, version_length = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or format_version != _FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Unsupported synonym index file: {path}")
+
+        position = _HEADER.size
+        self.version = self._mmap[position:position + version_length].decode("utf-8")
+        position += version_length + (-version_length % 4)
+
+        view = memoryview(self._mmap)
+        self._slots = view[position:position + 8 * table_size].cast("I")
+        position += 8 * table_size
+        self._word_sense_offsets = view[position:position + 4 * (n_words + 1)].cast("I")
+        position += 4 * (n_words + 1)
+        pairs = self._word_sense_offsets[n_words]
+        self._word_senses = view[position:position + 8 * pairs].cast("I")
+        position += 8 * pairs
+        runs = 2 * n_words + 2 * n_senses
+        self._offsets = view[position:position + 4 * (runs + 1)].cast("I")
+        self._blob_start = position + 4 * (runs + 1)
+        self._mask = table_size - 1
+        self.words = n_words
+        self.senses_count = n_senses
+
+        # Repeated words skip even the probe
+        self.senses = lru_cache(maxsize=memo_size)(self._senses)
+
+    def _slice(self, i):
+        # Slicing the mmap itself is much faster than slicing a memoryview of it
+        start = self._blob_start
+        return self._mmap[start + self._offsets[i]:start + self._offsets[i + 1]]
+
+    def _find(self, key):
+        """Entry number for the UTF-8 key, or None."""
+        key_hash = zlib.crc32(key)
+        slots, mask = self._slots, self._mask
+        slot = key_hash & mask
+        while True:
+            entry = slots[2 * slot + 1]
+            if not entry:
+                return None
+            if slots[2 * slot] == key_hash and self._slice(entry - 1) == key:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def _entries(self, word):
+        """Entries for word itself, or else for its regular base forms."""
+        entry = self._find(word.encode("utf-8"))
+        if entry is not None:
+            return [entry]
+        entries = []
+        for suffix, replacement in _SUFFIX_RULES:
+            if word.endswith(suffix) and len(word) > len(suffix):
+                entry = self._find((word[:-len(suffix)] + replacement).encode("utf-8"))
+                if entry is not None and entry not in entries:
+                    entries.append(entry)
+        return entries
+
+    def _senses(self, word):
+        """Senses of word (see Sense) in WordNet's order, or None if it isn't indexed."""
+        word = word.lower().replace("_", " ")
+        entries = self._entries(word)
+        if not entries:
+            return None
+        # The word's base forms (reached through an inflection, or stored for irregular ones) are not synonyms of it
+        excluded = {word}
+        for entry in entries:
+            excluded.add(self._slice(entry).decode("utf-8"))
+            excluded.update(self._slice(self.words + entry).decode("utf-8").split(_SEPARATOR))
+        senses, seen = [], set()
+        members_base, signatures_base = 2 * self.words, 2 * self.words + self.senses_count
+        for entry in entries:
+            for pair in range(self._word_sense_offsets[entry], self._word_sense_offsets[entry + 1]):
+                number, count = self._word_senses[2 * pair], self._word_senses[2 * pair + 1]
+                if number in seen:
+                    continue
+                seen.add(number)
+                members = self._slice(members_base + number).decode("utf-8")
+                words = self._slice(signatures_base + number).decode("utf-8")
+                members = tuple(m for m in members.split(_SEPARATOR) if m and m.lower() not in excluded)
+                senses.append(Sense(members, count, frozenset(words.split())))
+        return tuple(senses)
+
+    def rank(self, word, context=None, top_k=None):
+        """Top synonyms of word, best sense for a context signature() first, or None if unknown."""
+        word = word.lower().replace("_", " ")
+        senses = self.senses(word)
+        return None if senses is None else rank_senses(word, senses, context, top_k)
+
+
+def base_forms(wordnet, word):
+    """word and the forms WordNet's morphology may reduce it to (irregular exceptions and suffix rules)."""
+    forms = {word}
+    for exceptions in getattr(wordnet, "_exception_map", {}).values():
+        forms.update(form.replace("_", " ").lower() for form in exceptions.get(word.replace(" ", "_"), ()))
+    for suffix, replacement in _SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) > len(suffix):
+            forms.add(word[:-len(suffix)] + replacement)
+    return forms
+
+
+def _wordnet_senses(wordnet, word):
+    """(sense id, members, count, signature words) of every WordNet sense of word, and its base forms.
+
+    WordNet finds the senses of an inflection through its base form; base forms
+    count as uses of the word and are not synonyms of it ("ran" -> "run").
+    Members are returned in full; the base forms are those among them.
+    """
+    bases = base_forms(wordnet, word)
+    senses, found = [], set()
+    for synset in wordnet.synsets(word.replace(" ", "_")):
+        lemmas = sorted(synset.lemmas(), key=lambda lemma: -lemma.count())  # Stable: ties keep WordNet's order
+        members = tuple(lemma.name().replace("_", " ") for lemma in lemmas)
+        count = sum(lemma.count() for lemma, name in zip(lemmas, members) if name.lower() in bases)
+        found.update(name.lower() for name in members if name.lower() in bases and name.lower() != word)
+        gloss = " ".join([synset.definition()] + list(synset.examples()) + list(members))
+        senses.append((synset.name(), members, count, signature(gloss)))
+    return senses, sorted(found)
+
+
+def wordnet_senses(wordnet, word):
+    """Senses of word straight from WordNet (when no index has been built), filtered as the index does."""
+    senses, bases = _wordnet_senses(wordnet, word)
+    excluded = {word, *bases}
+    return tuple(
+        Sense(tuple(m for m in members if m.lower() not in excluded), count, words)
+        for _, members, count, words in senses
+    )
+
+
+def wordnet_entries(wordnet):
+    """(word, senses, base forms) for every WordNet lemma name and irregular inflection."""
+    words = {name.replace("_", " ").lower() for name in wordnet.all_lemma_names()}
+    for exceptions in getattr(wordnet, "_exception_map", {}).values():
+        words.update(form.replace("_", " ").lower() for form in exceptions)
+    for word in sorted(words):
+        yield (word, *_wordnet_senses(wordnet, word))
+
+
+def build_wordnet_index(path=None):
+    """Build the index from the NLTK WordNet corpus."""
+    from nltk.corpus import wordnet
+
+    build_index(wordnet_entries(wordnet), path or SYNONYM_INDEX_PATH, version=f"wordnet-{wordnet.get_version()}")
+
+
+def get_synonym_index():
+    """Get the shared index, or None if no index file has been built."""
+    global synonym_index
+
+    if synonym_index is None:
+        with _lock:
+            if synonym_index is None:
+                try:
+                    synonym_index = SynonymIndex(SYNONYM_INDEX_PATH)
+                except (OSError, ValueError) as e:
+                    print(f"Warning: synonym index unavailable, using WordNet directly "
+                          f"(build it with 'python -m app.utils.synonyms'): {e}")
+                    synonym_index = False
+    return synonym_index or None
+
+
+@lru_cache(maxsize=1)
+def _wordnet_version():
+    try:
+        from nltk.corpus import wordnet
+        return f"wordnet-{wordnet.get_version()}"
+    except LookupError:
+        return "wordnet-unavailable"
+
+
+def synonym_data_version():
+    """Version of the data synonyms are served from (for HTTP validators)."""
+    index = get_synonym_index()
+    return index.version if index is not None else _wordnet_version()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the synonym index from WordNet.")
+    parser.add_argument("--output", default=SYNONYM_INDEX_PATH)
+    args = parser.parse_args()
+    build_wordnet_index(args.output)
+    index = SynonymIndex(args.output)
+    print(f"Wrote {index.words} words, {index.senses_count} senses "
+          f"({os.path.getsize(args.output) / 1e6:.1f} MB) to {args.output}")
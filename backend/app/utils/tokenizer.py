@@ -0,0 +1,203 @@
+"""Span-aware segmentation shared by the grammar, spelling and summary stages.
+
+The input is segmented once into sentences and tokens that carry exact
+character offsets into the original text, so later stages never have to
+recover positions with str.find() and offsets stay correct for any mix of
+spaces, tabs and newlines between sentences.
+"""
+import codecs
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple
+
+# Loaded on first use; None means the NLTK punkt data is unavailable
+_punkt = None
+_punkt_loaded = False
+
+# segment() keeps recent Documents up to this many characters of text in total;
+# a Document takes roughly 20-40 bytes per character with its tokens
+_segment_cache_chars = int(os.getenv("SEGMENT_CACHE_CHARS", "500000"))
+# Longer texts are segmented on every call instead of evicting everything else
+_segment_cache_max_text = int(os.getenv("SEGMENT_CACHE_MAX_TEXT_CHARS", "50000"))
+
+_TOKEN_RE = re.compile(r"\S+")
+# Runs of letters in any script ("café", "naïve" stay whole), so contractions split as "don" + "t"
+_WORD_RE = re.compile(r"[^\W\d_]+")
+# Words for the summarizer: letters, with inner apostrophes and hyphens ("don't", "well-known")
+_SUMMARY_WORD_RE = re.compile(r"[^\W\d_](?:[^\W\d_]|['-])*")
+# Fallback sentence splitter: up to and including terminal punctuation (and closing quotes)
+_SENTENCE_RE = re.compile(r"[^.!?\s][^.!?]*(?:[.!?]+['\")\]]*|$)")
+
+
+class Token(NamedTuple):
+    text: str
+    start: int
+    end: int
+
+
+class Sentence(NamedTuple):
+    text: str
+    start: int
+    end: int
+    tokens: List[Token]  # whitespace-delimited, absolute offsets
+
+
+class Document:
+    """A segmented text. Offsets of sentences, tokens and words index into `text`."""
+
+    def __init__(self, text, sentences):
+        self.text = text
+        self.sentences = sentences
+        self._words = None
+
+    @property
+    def words(self):
+        """Alphabetic words as Tokens, for the spelling checker."""
+        if self._words is None:
+            self._words = [Token(m.group(), m.start(), m.end()) for m in _WORD_RE.finditer(self.text)]
+        return self._words
+
+
+def iter_words(text):
+    """Yield (start, end, word) for every alphabetic token, in a single pass."""
+    for match in _WORD_RE.finditer(text):
+        yield match.start(), match.end(), match.group()
+
+
+def summary_words(text):
+    """Words used for sentence scoring (no punctuation or numbers)."""
+    return _SUMMARY_WORD_RE.findall(text)
+
+
+def _get_punkt():
+    global _punkt, _punkt_loaded
+
+    if not _punkt_loaded:
+        try:
+            from nltk.tokenize.punkt import PunktTokenizer
+            _punkt = PunktTokenizer("english")
+        except (ImportError, LookupError) as e:
+            print(f"Warning: punkt unavailable, using regex sentence splitting: {e}")
+            _punkt = None
+        _punkt_loaded = True
+    return _punkt
+
+
+def sentence_spans(text):
+    """(start, end) of each sentence, without surrounding whitespace."""
+    punkt = _get_punkt()
+    if punkt is not None:
+        return list(punkt.span_tokenize(text))
+    spans = []
+    for match in _SENTENCE_RE.finditer(text):
+        start, end = match.span()
+        end = start + len(match.group().rstrip())
+        if end > start:
+            spans.append((start, end))
+    return spans
+
+
+def _tokens(text, offset):
+    return [Token(m.group(), offset + m.start(), offset + m.end()) for m in _TOKEN_RE.finditer(text)]
+
+
+class _SegmentCache:
+    """Thread-safe LRU of Documents, bounded by the total length of their texts."""
+
+    def __init__(self, max_chars, max_text_chars):
+        self.max_chars = max_chars
+        self.max_text_chars = max_text_chars
+        self.chars = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text):
+        with self._lock:
+            document = self._data.get(text)
+            if document is not None:
+                self._data.move_to_end(text)
+            return document
+
+    def set(self, text, document):
+        if len(text) > self.max_text_chars or len(text) > self.max_chars:
+            return
+        with self._lock:
+            if text in self._data:
+                return
+            self._data[text] = document
+            self.chars += len(text)
+            while self.chars > self.max_chars:
+                evicted, _ = self._data.popitem(last=False)
+                self.chars -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.chars = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+_segment_cache = _SegmentCache(_segment_cache_chars, _segment_cache_max_text)
+
+
+def clear_segment_cache():
+    _segment_cache.clear()
+
+
+def segment(text):
+    """Segment text into sentences and tokens with exact offsets (cached per text).
+
+    The result is shared between stages and requests, so treat it as read-only.
+    """
+    document = _segment_cache.get(text)
+    if document is not None:
+        return document
+    sentences = []
+    for start, end in sentence_spans(text):
+        sentence_text = text[start:end]
+        sentences.append(Sentence(sentence_text, start, end, _tokens(sentence_text, start)))
+    document = Document(text, sentences)
+    _segment_cache.set(text, document)
+    return document
+
+
+class SentenceStream:
+    """Incremental sentence segmentation for text that arrives in chunks.
+
+    feed() returns the sentences completed so far; only the trailing, possibly
+    unfinished sentence is kept, so memory does not grow with the input. A
+    "sentence" longer than `max_pending` characters is cut at whitespace.
+    """
+
+    def __init__(self, max_pending=20000):
+        self.max_pending = max_pending
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+
+    def feed(self, chunk):
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        self._pending += chunk
+        spans = sentence_spans(self._pending)
+        # The last sentence may continue in the next chunk
+        sentences = [self._pending[start:end] for start, end in spans[:-1]]
+        if spans:
+            self._pending = self._pending[spans[-1][0]:]
+        while len(self._pending) > self.max_pending:
+            cut = self._pending.rfind(" ", 0, self.max_pending)
+            cut = cut if cut > 0 else self.max_pending
+            if self._pending[:cut].strip():
+                sentences.append(self._pending[:cut].strip())
+            self._pending = self._pending[cut:].lstrip()
+        return sentences
+
+    def close(self):
+        """Flush the remaining text once the input has ended."""
+        self._pending += self._decoder.decode(b"", final=True)
+        sentences = [self._pending[start:end] for start, end in sentence_spans(self._pending)]
+        self._pending = ""
+        return sentences
@@ -0,0 +1,64 @@
+"""Micro-benchmark: merge_errors vs the original pairwise merge on long documents.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_merge
+"""
+import random
+import time
+
+from app.models.schemas import GrammarError, GrammarErrorPosition
+from app.utils.merge import merge_errors
+
+
+def _errors(rng, count, text_length, source):
+    errors = []
+    for _ in range(count):
+        start = rng.randrange(text_length)
+        errors.append(GrammarError(
+            type='grammar',
+            position=GrammarErrorPosition(start=start, end=start + rng.randint(1, 12)),
+            suggestion=source,
+            message=source
+        ))
+    return errors
+
+
+def pairwise_merge(t5_errors, spelling_errors):
+    final_errors = list(t5_errors)
+    for s_err in spelling_errors:
+        if not any(
+            max(s_err.position.start, t.position.start) < min(s_err.position.end, t.position.end)
+            for t in t5_errors
+        ):
+            final_errors.append(s_err)
+    final_errors.sort(key=lambda x: x.position.start)
+    return final_errors
+
+
+def _time(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'errors (T5 + LT)':>18} {'pairwise':>12} {'merge_errors':>13} {'speedup':>9}")
+    for count in (100, 1_000, 5_000):
+        text_length = count * 40
+        t5_errors = _errors(rng, count, text_length, "neural")
+        spelling_errors = _errors(rng, count, text_length, "languagetool")
+
+        slow, expected = _time(lambda: pairwise_merge(t5_errors, spelling_errors), repeat=1)
+        fast, merged = _time(lambda: merge_errors({"neural": t5_errors, "languagetool": spelling_errors}))
+        assert merged == expected
+
+        print(f"{f'{count} + {count}':>18} {slow * 1000:>10.1f}ms {fast * 1000:>11.1f}ms {slow / fast:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
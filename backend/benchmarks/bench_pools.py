@@ -0,0 +1,90 @@
+"""Benchmark: summarize throughput and synonym latency with the summarizer inline vs in a process pool.
+
+Several threads post long documents to /api/summarize (the result cache off)
+while another times cheap /api/synonyms lookups, first with summarization in
+the API process and then in the "summarize" process pool. Inline, the
+summaries compete for one GIL; pooled, they spread over cores and the lookups
+no longer wait behind them. Run from the backend directory:
+
+    python -m benchmarks.bench_pools [--clients 4] [--seconds 10] [--workers 4]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.api import endpoints
+from app.main import app
+from app.utils import pools
+from benchmarks.bench_summarizer_algorithms import load_corpus
+
+
+def run(mode, clients, seconds, document):
+    client = TestClient(app)
+    stop = time.monotonic() + seconds
+    summaries = []
+    lookups = []
+
+    def summarize():
+        while time.monotonic() < stop:
+            response = client.post("/api/summarize", json={"text": document, "algorithm": "lsa"})
+            response.raise_for_status()
+            summaries.append(1)
+
+    def lookup():
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            client.post("/api/synonyms", json={"word": "good"}).raise_for_status()
+            lookups.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=summarize) for _ in range(clients)] + [threading.Thread(target=lookup)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    lookups.sort()
+    return {
+        "mode": mode,
+        "summaries_per_s": len(summaries) / seconds,
+        "lookup_p50_ms": statistics.median(lookups) * 1000,
+        "lookup_p95_ms": lookups[int(len(lookups) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    document = "\n\n".join(load_corpus().values()) * 3
+    # Time the work, not cache hits
+    endpoints.get_result_cache = lambda: None
+    endpoints.record = lambda *a, **k: None
+
+    results = [run("inline", args.clients, args.seconds, document)]
+
+    pools._pools_enabled = True
+    pools.POOL_SIZES = {"summarize": args.workers}
+    pool = pools.get_pool("summarize")
+    pool.start()
+    pool.call(pools._ping)  # Wait for the warm-up
+    try:
+        results.append(run(f"pool x{args.workers}", args.clients, args.seconds, document))
+        print("pool:", pool.stats())
+    finally:
+        pools.stop_pools()
+
+    print(f"{args.clients} summarize clients, {len(document.split())} words per document")
+    print(f"{'mode':>10} {'summaries/s':>12} {'lookup p50':>11} {'lookup p95':>11}")
+    for r in results:
+        print(f"{r['mode']:>10} {r['summaries_per_s']:>12.1f} {r['lookup_p50_ms']:>9.1f}ms {r['lookup_p95_ms']:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
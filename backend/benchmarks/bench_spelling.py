@@ -0,0 +1,88 @@
+"""Benchmark: offline spelling engine vs the per-word TextBlob fallback it replaced.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_spelling
+"""
+import random
+import time
+
+from textblob import Word
+
+from app.utils.spelling import SpellChecker, iter_words
+
+ESSAY = (
+    "The industrial revolution changed how people lived and worked. Factories "
+    "replaced small workshops, and many families moved from the countryside to "
+    "growing cities in search of employment. Working conditions were often "
+    "dangerous, and children were frequently employed for long hours. Over time, "
+    "reformers campaigned for laws that limited working hours and improved safety. "
+)
+
+
+def _typo(rng, word):
+    chars = list(word)
+    for _ in range(rng.choice([1, 1, 2])):
+        i = rng.randrange(len(chars))
+        op = rng.randrange(3)
+        if op == 0 and len(chars) > 3:
+            del chars[i]
+        elif op == 1:
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        else:
+            chars.insert(i, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+    return "".join(chars)
+
+
+def make_document(rng, paragraphs, typo_rate=0.05):
+    words = (ESSAY * paragraphs).split(" ")
+    return " ".join(_typo(rng, w) if len(w) > 3 and rng.random() < typo_rate else w for w in words)
+
+
+def textblob_fallback(text):
+    """The old loop: Word.correct() on every token, positions recovered with str.find.
+
+    Tokens come from the same regex so the comparison needs no NLTK corpora;
+    the real fallback also paid for TextBlob's NLTK tokenization.
+    """
+    found = []
+    offset = 0
+    for _, _, token in iter_words(text):
+        word = Word(token)
+        corrected = word.correct()
+        if word != corrected and len(word) > 1:
+            start = text.find(word, offset)
+            if start != -1:
+                found.append((start, start + len(word), str(word), str(corrected)))
+                offset = start + len(word)
+    return found
+
+
+def main():
+    rng = random.Random(0)
+    started = time.perf_counter()
+    checker = SpellChecker.from_textblob()
+    print(f"index build: {time.perf_counter() - started:.2f}s")
+
+    print(f"{'words':>8} {'textblob':>10} {'engine':>9} {'speedup':>8} {'same suggestions':>17}")
+    for paragraphs in (1, 5, 20):
+        text = make_document(rng, paragraphs)
+        words = len(text.split())
+
+        started = time.perf_counter()
+        old = textblob_fallback(text)
+        slow = time.perf_counter() - started
+
+        checker.suggest.cache_clear()
+        started = time.perf_counter()
+        new = checker.check(text)
+        fast = time.perf_counter() - started
+
+        old_map = {(s, e): fix for s, e, _, fix in old}
+        new_map = {(s, e): fix for s, e, _, fix in new}
+        same = sum(1 for span, fix in old_map.items() if new_map.get(span) == fix)
+        print(f"{words:>8} {slow:>9.2f}s {fast:>8.3f}s {slow / fast:>7.0f}x {same:>8}/{len(old_map)}")
+
+
+if __name__ == "__main__":
+    main()
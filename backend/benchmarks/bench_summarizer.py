@@ -0,0 +1,80 @@
+"""Benchmark: NumPy LSA summarizer vs the per-request sumy pipeline it replaced.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_summarizer
+"""
+import random
+import time
+import warnings
+
+from sumy.nlp.stemmers import Stemmer
+from sumy.parsers.plaintext import PlaintextParser
+from sumy.summarizers.lsa import LsaSummarizer as SumyLsaSummarizer
+from sumy.utils import get_stop_words
+
+from app.utils.summarizer import LsaSummarizer, summary_length
+from app.utils.tokenizer import sentence_spans, summary_words
+
+VOCABULARY = (
+    "industrial revolution changed people lived worked factories replaced workshops families "
+    "moved countryside growing cities search employment conditions dangerous children employed "
+    "long hours reformers campaigned laws limited improved safety steam engines railways coal "
+    "iron cotton mills trade markets workers unions wages housing sanitation disease"
+).split() + ["the", "and", "of", "to", "in", "a", "was", "were", "for", "by"] * 4
+
+
+def make_document(rng, sentences):
+    return " ".join(
+        " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 25))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+class _Tokenizer:
+    """Stands in for sumy's Tokenizer, which needs the NLTK punkt data."""
+    language = "english"
+
+    def to_sentences(self, paragraph):
+        return [paragraph[start:end] for start, end in sentence_spans(paragraph)]
+
+    def to_words(self, sentence):
+        return summary_words(sentence)
+
+
+def sumy_pipeline(text):
+    """The old /summarize body: new parser, stemmer, summarizer and stop words per call."""
+    parser = PlaintextParser.from_string(text, _Tokenizer())
+    summarizer = SumyLsaSummarizer(Stemmer("english"))
+    summarizer.stop_words = get_stop_words("english")
+    sentences = list(parser.document.sentences)
+    return summarizer(parser.document, summary_length(len(sentences)))
+
+
+def main():
+    warnings.simplefilter("ignore")  # sumy warns when there are fewer terms than sentences
+    rng = random.Random(0)
+    engine = LsaSummarizer()
+    truncated = LsaSummarizer(components=10)
+
+    print(f"{'sentences':>9} {'sumy':>9} {'engine':>9} {'k=10':>9} {'speedup':>8}")
+    for count in (20, 100, 500, 2000):
+        text = make_document(rng, count)
+
+        started = time.perf_counter()
+        sumy_pipeline(text)
+        slow = time.perf_counter() - started
+
+        started = time.perf_counter()
+        engine.summarize(text)
+        fast = time.perf_counter() - started
+
+        started = time.perf_counter()
+        truncated.summarize(text)
+        partial = time.perf_counter() - started
+
+        print(f"{count:>9} {slow:>8.3f}s {fast:>8.3f}s {partial:>8.3f}s {slow / fast:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
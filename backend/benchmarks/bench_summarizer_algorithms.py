@@ -0,0 +1,79 @@
+"""Benchmark: latency and ROUGE overlap of each summarization algorithm against LSA.
+
+Uses the essays bundled in benchmarks/corpus, alone and concatenated into
+longer documents, so large inputs can be routed to the cheapest algorithm whose
+output stays close enough to the LSA summary. Run from the backend directory:
+
+    python -m benchmarks.bench_summarizer_algorithms
+"""
+import os
+import time
+from collections import Counter
+
+from app.utils.summarizer import SUMMARIZERS, get_summarizer
+from app.utils.tokenizer import clear_segment_cache, segment, summary_words
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def load_corpus():
+    documents = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith(".txt"):
+            with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+                documents[name[:-4]] = f.read()
+    return documents
+
+
+def _ngrams(text, n):
+    words = [w.lower() for w in summary_words(text)]
+    return Counter(tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+
+
+def rouge_f1(candidate, reference, n):
+    """ROUGE-n F1 between two texts (clipped n-gram overlap)."""
+    candidate, reference = _ngrams(candidate, n), _ngrams(reference, n)
+    overlap = sum((candidate & reference).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(candidate.values())
+    recall = overlap / sum(reference.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def timed(engine, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        clear_segment_cache()  # Count segmentation, as a cold request would
+        started = time.perf_counter()
+        summary = engine.summarize(text)
+        best = min(best, time.perf_counter() - started)
+    return summary, best
+
+
+def main():
+    corpus = load_corpus()
+    documents = dict(corpus)
+    joined = "\n\n".join(corpus.values())
+    for copies in (10, 50):
+        documents[f"corpus x{copies}"] = "\n\n".join([joined] * copies)
+
+    engines = {name: get_summarizer(name) for name in SUMMARIZERS}
+    print(f"{'document':>16} {'sentences':>9} " + " ".join(f"{name:>10}" for name in engines)
+          + f" {'R1/R2 textrank':>15} {'R1/R2 centroid':>15}")
+    for name, text in documents.items():
+        summaries, timings = {}, {}
+        for algorithm, engine in engines.items():
+            summaries[algorithm], timings[algorithm] = timed(engine, text)
+        reference = summaries["lsa"]
+        scores = {
+            algorithm: f"{rouge_f1(summaries[algorithm], reference, 1):.2f}/{rouge_f1(summaries[algorithm], reference, 2):.2f}"
+            for algorithm in ("textrank", "centroid")
+        }
+        print(f"{name:>16} {len(segment(text).sentences):>9} "
+              + " ".join(f"{timings[a] * 1000:>8.1f}ms" for a in engines)
+              + f" {scores['textrank']:>15} {scores['centroid']:>15}")
+
+
+if __name__ == "__main__":
+    main()
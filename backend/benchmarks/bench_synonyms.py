@@ -0,0 +1,72 @@
+"""Benchmark: synonym index lookups vs walking WordNet on every request.
+
+Uses the real index file when it has been built, otherwise a synthetic index of
+WordNet's size. Run from the backend directory:
+
+    python -m benchmarks.bench_synonyms
+"""
+import os
+import random
+import tempfile
+import time
+
+from app.utils.synonyms import SYNONYM_INDEX_PATH, SynonymIndex, build_index, rank_senses
+
+WORDS = ["good", "happy", "run", "fast", "light", "bank", "study", "bright", "house", "quick"]
+
+
+def synthetic_index(path, words=150000, senses=120000):
+    rng = random.Random(0)
+    pool = [
+        (f"sense{i}", tuple(f"word{rng.randrange(words)}" for _ in range(rng.randint(1, 6))), 0,
+         [f"gloss{rng.randrange(20000)}" for _ in range(8)])
+        for i in range(senses)
+    ]
+    entries = []
+    for i in range(words):
+        word_senses = [(id_, members, rng.randint(0, 20), gloss) for id_, members, _, gloss in rng.sample(pool, rng.randint(0, 4))]
+        entries.append((f"word{i}", word_senses, []))
+    build_index(entries, path, version="synthetic")
+    return [word for word, _, _ in rng.sample(entries, 1000)]
+
+
+def per_call(function, words, rounds=20):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for word in words:
+            function(word)
+    return (time.perf_counter() - started) / (rounds * len(words)) * 1e6
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        if os.path.exists(SYNONYM_INDEX_PATH):
+            path, words = SYNONYM_INDEX_PATH, WORDS
+        else:
+            path = os.path.join(tmp, "synonyms.idx")
+            words = synthetic_index(path)
+
+        started = time.perf_counter()
+        index = SynonymIndex(path)
+        print(f"{path}: {index.words} words, {os.path.getsize(path) / 1e6:.1f} MB, "
+              f"opened in {(time.perf_counter() - started) * 1000:.2f}ms")
+
+        print(f"index, uncached: {per_call(lambda w: rank_senses(w, index._senses(w) or (), None), words):.2f}us per lookup")
+        print(f"index, memoized: {per_call(index.rank, words):.2f}us per lookup")
+
+        try:
+            from nltk.corpus import wordnet
+            from app.utils.synonyms import wordnet_senses
+
+            started = time.perf_counter()
+            wordnet.synsets("warmup")
+            print(f"wordnet corpus load: {(time.perf_counter() - started) * 1000:.0f}ms")
+            walk = per_call(lambda w: rank_senses(w, wordnet_senses(wordnet, w), None), WORDS, rounds=5)
+            print(f"wordnet walk: {walk:.2f}us per lookup")
+        except LookupError:
+            print("wordnet walk: skipped (WordNet data not downloaded)")
+        del index
+
+
+if __name__ == "__main__":
+    main()
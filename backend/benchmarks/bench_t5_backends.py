@@ -0,0 +1,149 @@
+"""Benchmark: latency and memory of the T5 grammar backends on a fixed sentence set.
+
+Compares the transformers pipeline over the dynamically quantized torch model
+with the int8 ONNX export (export it first with `python -m app.utils.onnx_t5`).
+Each backend runs in its own process, so its resident memory is measured alone.
+Run from the backend directory:
+
+    python -m benchmarks.bench_t5_backends [--backends pipeline,onnx] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SENTENCES = [
+    "She go to school every day.",
+    "I has a apple in my bag.",
+    "They was playing football when it start to rain.",
+    "He don't like vegetables.",
+    "We is going to the park tomorrow.",
+    "The childs are playing outside.",
+    "My brother have three cat.",
+    "She can sings very well.",
+    "I am agree with you.",
+    "There is many people in the room.",
+    "He have been working here since five years.",
+    "Yesterday I buyed a new phone.",
+    "The informations are not correct.",
+    "She is more taller than her sister.",
+    "I didn't went to the party.",
+    "Everyone have their own opinion.",
+    "The results of the experiment was surprising to the researchers.",
+    "If I would have known, I would have came earlier.",
+    "Neither the teacher nor the students was ready for the test.",
+    "The committee have decided to postpone the meeting until next week.",
+    "Despite of the rain, we went for a walk along the river.",
+    "He suggested me to apply for the job before the deadline.",
+    "The number of students who has passed the exam increased this year.",
+    "Each of the books on the shelf are worth reading at least once.",
+    "Industrial revolution changed how people lives and works in the cities.",
+    "Factories replaced small workshop, and many family moved to the city.",
+    "Working conditions was often dangerous and children worked long hour.",
+    "Reformers campaigned for law that limited working hours.",
+    "The steam engine were one of the most important invention of the era.",
+    "Railways allowed good to be transported more faster than before.",
+    "Many worker joined unions to fight for better wage.",
+    "Over time, the living conditions in city improves slowly.",
+]
+
+
+def rss_mb():
+    """Current resident set size of this process (Linux), in MB."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def load(backend):
+    from app.utils import nlp
+
+    if backend == "onnx":
+        from app.utils.onnx_t5 import OnnxT5Corrector
+        return OnnxT5Corrector.from_pretrained(num_threads=nlp._torch_num_threads)
+
+    nlp._use_t5_model = True
+    nlp._t5_backend = "pipeline"
+    os.environ.pop("GEMINI_API_KEY", None)
+    corrector = nlp.get_grammar_corrector()
+    if corrector is None:
+        raise RuntimeError("the T5 pipeline failed to load")
+    return corrector
+
+
+def run_backend(backend, repeat, batch_size):
+    """Child process: load one backend, time it on SENTENCES and print one JSON line."""
+    from app.utils.nlp import correct_sentences
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    corrector = load(backend)
+    load_seconds = time.perf_counter() - started
+    correct_sentences(corrector, SENTENCES[:batch_size], batch_size=batch_size, max_length=128)  # Warm-up
+
+    single, batched = [], []
+    for _ in range(repeat):
+        for sentence in SENTENCES:
+            started = time.perf_counter()
+            correct_sentences(corrector, [sentence], batch_size=1, max_length=128)
+            single.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        outputs = correct_sentences(corrector, SENTENCES, batch_size=batch_size, max_length=128)
+        batched.append(time.perf_counter() - started)
+
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_seconds,
+        "p50_ms": statistics.median(single) * 1000,
+        "p95_ms": sorted(single)[int(len(single) * 0.95)] * 1000,
+        "batch_ms_per_sentence": min(batched) / len(SENTENCES) * 1000,
+        "rss_mb": rss_mb(),
+        "model_rss_mb": rss_mb() - baseline,
+        "outputs": outputs,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default="pipeline,onnx")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_backend(args.child, args.repeat, args.batch_size)
+        return
+
+    results = {}
+    for backend in args.backends.split(","):
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_t5_backends", "--child", backend,
+             "--repeat", str(args.repeat), "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True,
+        )
+        lines = [line for line in process.stdout.splitlines() if line.startswith("{")]
+        if process.returncode or not lines:
+            print(f"{backend}: failed\n{process.stderr.strip().splitlines()[-1] if process.stderr.strip() else ''}")
+            continue
+        results[backend] = json.loads(lines[-1])
+
+    print(f"{len(SENTENCES)} sentences, batch size {args.batch_size}")
+    print(f"{'backend':>9} {'load':>7} {'p50':>9} {'p95':>9} {'batch/sent':>12} {'rss':>8} {'model':>8}")
+    for backend, r in results.items():
+        print(f"{backend:>9} {r['load_s']:>6.1f}s {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms "
+              f"{r['batch_ms_per_sentence']:>10.1f}ms {r['rss_mb']:>6.0f}MB {r['model_rss_mb']:>6.0f}MB")
+
+    if len(results) == 2:
+        a, b = (results[name]["outputs"] for name in results)
+        same = sum(x == y for x, y in zip(a, b))
+        print(f"identical corrections: {same}/{len(SENTENCES)}")
+
+
+if __name__ == "__main__":
+    main()
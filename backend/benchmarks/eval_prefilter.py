@@ -0,0 +1,183 @@
+"""Evaluation: recall lost vs compute saved by the grammar pre-filter, per threshold.
+
+Sentences come from the essays in benchmarks/corpus (correct, label 0), copies
+with one injected error each (agreement, article, spelling, verb form, doubled
+word, capitalization, plural; label 1) and the hand-written error sentences of
+bench_t5_backends. Recall is the share of erroneous sentences still forwarded
+to the corrector; "saved" is the share of all sentences it no longer sees. With
+--corrector, labels come from whether the configured T5/Gemini corrector
+actually changes the sentence. --fit refits the weights by logistic regression
+(--write saves them for GRAMMAR_PREFILTER_WEIGHTS). Run from the backend
+directory:
+
+    python -m benchmarks.eval_prefilter [--fit] [--write weights.json] [--languagetool] [--corrector]
+"""
+import argparse
+import json
+import random
+import re
+
+import numpy as np
+
+from app.utils.prefilter import DEFAULT_WEIGHTS, FEATURES, PreFilter, _prefilter_threshold, matches_by_sentence
+from app.utils.spelling import get_spell_checker
+from app.utils.tokenizer import segment
+from benchmarks.bench_summarizer_algorithms import load_corpus
+from benchmarks.bench_t5_backends import SENTENCES as ERROR_SENTENCES
+
+_SWAPS = {"is": "are", "are": "is", "was": "were", "were": "was", "has": "have", "have": "has", "does": "do"}
+
+
+def _typo(rng, word):
+    i = rng.randrange(1, len(word))
+    return word[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[i + 1:]
+
+
+def corrupt(rng, sentence):
+    """The sentence with one injected error, or None if no corruption applies."""
+    words = sentence.split(" ")
+    options = []
+    for i, w in enumerate(words):
+        bare = w.lower().strip(",.;:")
+        if bare in _SWAPS:
+            options.append(("agreement", i))
+        if bare in ("a", "an") and i + 1 < len(words):
+            options.append(("article", i))
+        if re.fullmatch(r"[a-z]{5,}", w):
+            options.append(("spelling", i))
+            if w.endswith("ed"):
+                options.append(("verb", i))
+            if w.endswith("s") and not w.endswith("ss"):
+                options.append(("plural", i))
+        if i and bare == w and len(w) > 2:
+            options.append(("doubled", i))
+    options.append(("lowercase", 0))
+    kind, i = rng.choice(options)
+    word = words[i]
+    if kind == "agreement":
+        bare = word.lower().strip(",.;:")
+        words[i] = word.replace(bare, _SWAPS[bare])
+    elif kind == "article":
+        words[i] = "an" if word.lower() == "a" else "a"
+    elif kind == "spelling":
+        words[i] = _typo(rng, word)
+    elif kind == "verb":
+        words[i] = word[:-2]
+    elif kind == "plural":
+        words[i] = word[:-1]
+    elif kind == "doubled":
+        words.insert(i, word)
+    else:
+        words[0] = words[0][:1].lower() + words[0][1:]
+    return " ".join(words)
+
+
+def build_dataset(seed=0, error_share=0.3):
+    """(sentence, label) pairs, with about `error_share` of them erroneous."""
+    rng = random.Random(seed)
+    clean = [s.text for text in load_corpus().values() for s in segment(text).sentences]
+    data = [(s, 0) for s in clean]
+    wanted = int(len(clean) * error_share / (1 - error_share)) - len(ERROR_SENTENCES)
+    data += [(corrupt(rng, s), 1) for s in rng.sample(clean, min(len(clean), max(0, wanted)))]
+    data += [(s, 1) for s in ERROR_SENTENCES]
+    return data
+
+
+def checker_matches(sentences, languagetool):
+    """Per-sentence checker error types, as the spelling stage would report them."""
+    if languagetool:
+        from app.api.endpoints import _spelling_stage
+    checker = get_spell_checker()
+    matches = []
+    for text in sentences:
+        if languagetool:
+            errors = [e for group in _spelling_stage(text).values() for e in group]
+            matches.append(matches_by_sentence(segment(text).sentences, errors)[0] if errors else [])
+        else:
+            matches.append(["spelling"] * len(checker.check(text)))
+    return matches
+
+
+def corrector_labels(sentences):
+    from app.utils.nlp import correct_sentences, get_grammar_corrector
+
+    corrector = get_grammar_corrector()
+    if corrector is None:
+        raise SystemExit("No corrector configured (set USE_T5_MODEL=true or GEMINI_API_KEY)")
+    corrected = correct_sentences(corrector, sentences, max_length=128)
+    return [int(c is not None and c.strip() != s.strip()) for s, c in zip(sentences, corrected)]
+
+
+def fit(X, y, l2=0.01, steps=5000, rate=0.5):
+    """Logistic regression by projected gradient descent.
+
+    Error evidence (checker matches, OOV words, ...) is kept non-negative.
+    Features that never fire in the data (grammar matches without LanguageTool)
+    keep their default weight, and so does the length prior: the hand-written
+    error sentences are much shorter than the essays' and would make length
+    look like evidence.
+    """
+    free = [FEATURES.index("bias"), FEATURES.index("log_length")]
+    unseen = ~X.any(axis=0)
+    unseen[FEATURES.index("log_length")] = True
+    w = np.array([DEFAULT_WEIGHTS[name] if unseen[i] else 0.0 for i, name in enumerate(FEATURES)])
+    penalty = np.full(X.shape[1], l2)
+    penalty[FEATURES.index("bias")] = 0.0
+    for _ in range(steps):
+        p = 1.0 / (1.0 + np.exp(-X @ w))
+        step = rate * (X.T @ (p - y) / len(y) + penalty * w)
+        step[unseen] = 0.0
+        w -= step
+        evidence = np.ones(len(w), dtype=bool)
+        evidence[free] = False
+        w[evidence] = np.maximum(w[evidence], 0.0)
+    return {name: round(float(value), 2) for name, value in zip(FEATURES, w)}
+
+
+def report(prefilter, sentences, matches, labels, thresholds):
+    scores = np.array([s.score for s in prefilter.scores(sentences, matches)])
+    labels = np.array(labels)
+    print(f"{len(sentences)} sentences, {labels.sum()} with errors")
+    print(f"{'threshold':>9} {'recall':>7} {'lost':>6} {'saved':>6} {'precision':>9}")
+    for threshold in thresholds:
+        forwarded = scores >= threshold
+        recall = (forwarded & (labels == 1)).sum() / max(1, labels.sum())
+        precision = (forwarded & (labels == 1)).sum() / max(1, forwarded.sum())
+        marker = "  <- configured" if abs(threshold - _prefilter_threshold) < 1e-9 else ""
+        print(f"{threshold:>9.2f} {recall:>7.1%} {labels.sum() - (forwarded & (labels == 1)).sum():>6} "
+              f"{1 - forwarded.mean():>6.1%} {precision:>9.1%}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fit", action="store_true")
+    parser.add_argument("--write")
+    parser.add_argument("--languagetool", action="store_true", help="use LanguageTool matches (needs a server)")
+    parser.add_argument("--corrector", action="store_true", help="label by the configured corrector's output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sentences, labels = map(list, zip(*build_dataset(args.seed)))
+    if args.corrector:
+        labels = corrector_labels(sentences)
+    matches = checker_matches(sentences, args.languagetool)
+    vocabulary = get_spell_checker().frequencies
+    thresholds = sorted({0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, _prefilter_threshold})
+
+    weights = DEFAULT_WEIGHTS
+    if args.fit:
+        # Fit on even-indexed sentences, report on the odd ones
+        scorer = PreFilter(vocabulary=vocabulary)
+        rows = [[f[name] for name in FEATURES] for f in (s.features for s in scorer.scores(sentences, matches))]
+        X, y = np.array(rows), np.array(labels, dtype=float)
+        weights = fit(X[0::2], y[0::2])
+        print("fitted weights:", json.dumps(weights))
+        sentences, matches, labels = sentences[1::2], matches[1::2], labels[1::2]
+        if args.write:
+            with open(args.write, "w", encoding="utf-8") as f:
+                json.dump(weights, f, indent=2)
+    report(PreFilter(weights, vocabulary=vocabulary), sentences, matches, labels, thresholds)
+
+
+if __name__ == "__main__":
+    main()
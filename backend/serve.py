@@ -0,0 +1,242 @@
+"""Multi-worker server: load the models once, then fork the uvicorn workers.
+
+`uvicorn --workers N` starts N fresh interpreters, each loading its own T5
+model, NLTK data, spelling dictionary and synonym index on first use. Here the
+master process loads all of them up front, moves everything it allocated out of
+the garbage collector's reach (gc.freeze), binds the listening socket and forks
+the workers. The workers share the master's read-only pages copy-on-write, so a
+second worker costs its private memory rather than another copy of the model,
+and no worker's first request pays for loading it.
+
+    python serve.py [--host 0.0.0.0] [--port 8000] [--workers 4]
+
+With NLP_PROCESS_POOLS=true every worker starts its own process pools (they
+can't be forked along with the master), so the NLP_POOL_*_WORKERS sizes are
+split between the workers and the master warns about the total. A "neural"
+pool loads a private T5 copy in each of its processes; the master then
+preloads none.
+
+Send SIGUSR1 to the master (or set SERVE_MEMORY_REPORT_INTERVAL) to print the
+RSS/PSS of the master and every worker; each worker also reports its own under
+`memory` in GET /api/metrics.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+SERVE_MEMORY_REPORT_INTERVAL = float(os.getenv("SERVE_MEMORY_REPORT_INTERVAL", "0"))
+SERVE_GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))
+# Proxies trusted to set X-Forwarded-For/-Proto (comma-separated IPs, or "*" for any)
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def preload():
+    """Import the app and load everything the workers would otherwise load on their own."""
+    # Nothing allocated from here on is collected before the fork, so the collector
+    # never writes to (and un-shares) those pages
+    gc.disable()
+
+    from app.main import app
+    from app.utils import assets, nlp
+
+    started = time.perf_counter()
+    try:
+        missing = nlp.init_nlp()
+    except Exception:
+        # Each worker's lifespan checks again and keeps /ready at 503 if it still fails
+        missing = []
+    if missing:
+        print(f"Warning: NLP assets missing before fork: {', '.join(missing)}")
+    for name, warm in assets.WARMUPS:
+        try:
+            warm()
+        except Exception as e:
+            print(f"Preload '{name}' failed: {e}")
+
+    if nlp._use_t5_model and nlp._t5_backend != "onnx":
+        import torch
+
+        # A single intra-op thread in the master: OpenMP thread pools don't survive fork()
+        torch.set_num_threads(1)
+        nlp.preload_t5_model()
+    elif nlp._use_t5_model:
+        print("T5_BACKEND=onnx: each worker loads its own ONNX Runtime sessions")
+    print(f"Preloaded in {time.perf_counter() - started:.1f}s")
+
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def worker_threads(workers):
+    """Intra-op threads per worker: TORCH_NUM_THREADS if set, else the CPUs split between the workers."""
+    configured = int(os.getenv("TORCH_NUM_THREADS", "0"))
+    return configured or max(1, (os.cpu_count() or 1) // workers)
+
+
+def split_pools(workers):
+    """Share the configured process pool sizes out between the workers; returns the total pool processes."""
+    from app.utils import pools
+
+    if not pools._pools_enabled:
+        return 0
+    sizes = {name: max(1, size // workers) for name, size in pools.POOL_SIZES.items() if size > 0}
+    pools.POOL_SIZES.update(sizes)
+    total = workers * sum(sizes.values())
+    if workers > 1:
+        per_worker = ", ".join(f"{name}={size}" for name, size in sizes.items())
+        print(f"Warning: NLP_PROCESS_POOLS with {workers} workers: each worker starts its own pools ({per_worker}), "
+              f"{total} pool processes in total; lower WEB_CONCURRENCY or NLP_POOL_*_WORKERS if that is too many")
+    if sizes.get("neural"):
+        print(f"Warning: the 'neural' pool loads a separate T5 model in each of its {workers * sizes['neural']} "
+              "processes; the master preloads none to share")
+    return total
+
+
+def bind(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def uvicorn_options():
+    """Settings for each worker's uvicorn server; client addresses come from proxy headers only from trusted proxies."""
+    return {"lifespan": "on", "proxy_headers": True, "forwarded_allow_ips": FORWARDED_ALLOW_IPS}
+
+
+def run_worker(number, app, sock, workers):
+    """Body of a forked worker: a single-process uvicorn server on the inherited socket."""
+    import uvicorn
+    from app.db.database import engine
+    from app.utils import nlp
+
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+        signal.signal(sig, signal.SIG_DFL)
+    gc.enable()
+    os.environ["SERVE_WORKER_ID"] = str(number)
+    # Pooled connections belong to the master; open fresh ones
+    engine.dispose(close=False)
+
+    threads = worker_threads(workers)
+    nlp._torch_num_threads = threads
+    if nlp.grammar_corrector is not None and nlp._t5_backend != "onnx":
+        import torch
+        torch.set_num_threads(threads)
+
+    config = uvicorn.Config(app, **uvicorn_options())
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def memory_report(master, children):
+    """Print the memory of the master and workers; the PSS sum is what they use together."""
+    from app.utils.memory import process_memory
+
+    rows = [("master", master)] + [(f"worker {n}", pid) for n, pid in sorted(children.items())]
+    total_rss = total_pss = 0.0
+    print(f"{'process':>10} {'pid':>8} {'rss':>9} {'pss':>9} {'shared':>9} {'private':>9}")
+    for name, pid in rows:
+        memory = process_memory(pid)
+        if not memory or "pss_mb" not in memory:
+            print(f"{name:>10} {pid:>8}  (no smaps_rollup)")
+            continue
+        total_rss += memory["rss_mb"]
+        total_pss += memory["pss_mb"]
+        print(f"{name:>10} {pid:>8} {memory['rss_mb']:>7.0f}MB {memory['pss_mb']:>7.0f}MB "
+              f"{memory['shared_mb']:>7.0f}MB {memory['private_mb']:>7.0f}MB")
+    print(f"total rss {total_rss:.0f}MB, actually used (pss) {total_pss:.0f}MB, "
+          f"saved by sharing {total_rss - total_pss:.0f}MB")
+    sys.stdout.flush()
+
+
+def serve(host, port, workers, report_interval=0.0):
+    app = preload()
+    split_pools(workers)
+    sock = bind(host, port)
+    print(f"Serving on {host}:{port} with {workers} worker(s), master pid {os.getpid()}")
+
+    children = {}  # worker number -> pid
+    state = {"stopping": False, "report": False}
+
+    def spawn(number):
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(number, app, sock, workers)
+            except BaseException as e:
+                print(f"Worker {number} failed: {e}")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        children[number] = pid
+
+    def on_stop(signum, frame):
+        state["stopping"] = True
+
+    def on_report(signum, frame):
+        state["report"] = True
+
+    signal.signal(signal.SIGTERM, on_stop)
+    signal.signal(signal.SIGINT, on_stop)
+    signal.signal(signal.SIGUSR1, on_report)
+
+    for number in range(workers):
+        spawn(number)
+
+    next_report = time.monotonic() + report_interval if report_interval > 0 else None
+    while not state["stopping"]:
+        # Replace workers that died (the preloaded state is still here to fork from)
+        for number, pid in list(children.items()):
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if not done:
+                continue
+            del children[number]
+            if not state["stopping"]:
+                print(f"Worker {number} (pid {pid}) exited with status {status}, restarting")
+                time.sleep(1)
+                spawn(number)
+        if next_report is not None and time.monotonic() >= next_report:
+            state["report"] = True
+            next_report += report_interval
+        if state["report"]:
+            state["report"] = False
+            memory_report(os.getpid(), children)
+        time.sleep(0.5)
+
+    # Graceful shutdown: uvicorn finishes in-flight requests and runs the lifespan shutdown on SIGTERM
+    for pid in children.values():
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + SERVE_GRACEFUL_TIMEOUT
+    while children and time.monotonic() < deadline:
+        for number, pid in list(children.items()):
+            if os.waitpid(pid, os.WNOHANG)[0]:
+                del children[number]
+        time.sleep(0.1)
+    for pid in children.values():
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preload the models and fork uvicorn workers that share them.")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--memory-report-interval", type=float, default=SERVE_MEMORY_REPORT_INTERVAL)
+    args = parser.parse_args()
+    serve(args.host, args.port, max(1, args.workers), args.memory_report_interval)
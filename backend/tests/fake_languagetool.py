@@ -0,0 +1,70 @@
+"""Minimal offline stand-in for a LanguageTool HTTP server.
+
+Implements just enough of the /v2 API (languages, check) for the tests. It can
+run in-process via `start_fake_server()` or as a process to be supervised:
+
+    python -m tests.fake_languagetool --port 8081
+"""
+import argparse
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+MISSPELLINGS = {"teh": "the", "gooing": "going", "mistaks": "mistakes"}
+
+
+class FakeLanguageToolHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/v2/languages"):
+            self._send_json([{"name": "English (US)", "code": "en", "longCode": "en-US"}])
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if not self.path.startswith("/v2/check"):
+            self._send_json({"error": "not found"}, status=404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        text = form.get("text", [""])[0]
+        matches = []
+        for m in re.finditer(r"[A-Za-z]+", text):
+            fix = MISSPELLINGS.get(m.group().lower())
+            if fix:
+                matches.append({
+                    "message": "Possible spelling mistake found.",
+                    "offset": m.start(),
+                    "length": len(m.group()),
+                    "replacements": [{"value": fix}],
+                    "rule": {"id": "MORFOLOGIK_RULE_EN_US", "issueType": "misspelling"},
+                })
+        self._send_json({"matches": matches})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_server(port=0):
+    """Serve on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLanguageToolHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+    ThreadingHTTPServer(("127.0.0.1", args.port), FakeLanguageToolHandler).serve_forever()
@@ -7,6 +7,8 @@ from app.main import app
 from app.db.database import Base, get_db
 from app.models import User, TextHistory
 from app.models.text_history import OperationType
+from app.utils import auth, history
+from app.utils.history import HistoryRecorder
 
 
 # Create test database
@@ -41,8 +43,9 @@ def client(test_db):
     return TestClient(app)
 
 
-def test_grammar_check_creates_history(client, test_db):
-    """Test that grammar check creates text history entry."""
+def test_grammar_check_creates_history(client, test_db, monkeypatch):
+    """Test that grammar check creates text history entry owned by the authenticated user."""
+    monkeypatch.setattr(auth, "_auth_secret", "test-secret")
     # Create a test user
     db = TestingSessionLocal()
     user = User(username="testuser", email="test@example.com")
@@ -50,16 +53,27 @@ def test_grammar_check_creates_history(client, test_db):
     db.commit()
     db.refresh(user)
 
-    # Make grammar check request
-    response = client.post(
-        "/api/check-grammar",
-        json={"text": "This is a test sentance with eror."}
-    )
+    # Record into the test database, as the lifespan hook would into the real one
+    history.history_recorder = HistoryRecorder(TestingSessionLocal, flush_interval_ms=10)
+    history.history_recorder.start()
+    try:
+        # Make grammar check request
+        response = client.post(
+            "/api/check-grammar",
+            json={"text": "This is a test sentance with eror."},
+            headers=_auth(user.id),
+        )
+    finally:
+        history.stop_history_recorder()
 
     assert response.status_code == 200
 
-    # Verify history was created (if we implement it)
-    # For now, this validates the endpoint works
+    # Verify history was created once the recorder drained
+    entries = db.query(TextHistory).all()
+    assert len(entries) == 1
+    assert entries[0].operation_type == OperationType.GRAMMAR_CHECK
+    assert entries[0].input_text == "This is a test sentance with eror."
+    assert entries[0].user_id == user.id
     db.close()
 
 
@@ -199,3 +213,78 @@ def test_user_text_history_relationship(test_db):
     assert len(user.text_histories) == 3
 
     db.close()
+
+
+def _create_users(*usernames):
+    db = TestingSessionLocal()
+    users = [User(username=name, email=f"{name}@example.com") for name in usernames]
+    db.add_all(users)
+    db.commit()
+    ids = [user.id for user in users]
+    db.close()
+    return ids
+
+
+def _auth(user_id):
+    return {"Authorization": f"Bearer {auth.issue_token(user_id)}"}
+
+
+def test_history_listing_and_detail(client, test_db, monkeypatch):
+    """Listing returns projections page by page; detail returns the full texts."""
+    monkeypatch.setattr(auth, "_auth_secret", "test-secret")
+    owner, = _create_users("owner")
+    essay = "Rivers shape the land around them. " * 100
+    history.history_recorder = HistoryRecorder(TestingSessionLocal, flush_interval_ms=10)
+    history.history_recorder.start()
+    try:
+        for i in range(3):
+            history.record(OperationType.SUMMARIZE, essay, f"Summary {i}", user_id=owner)
+    finally:
+        history.stop_history_recorder()
+
+    headers = _auth(owner)
+    first = client.get("/api/history", params={"limit": 2}, headers=headers).json()
+    assert [item["output_size"] for item in first["items"]] == [9, 9]
+    assert first["items"][0]["snippet"] == essay[:120]
+    assert "input_text" not in first["items"][0]
+
+    second = client.get("/api/history", params={"limit": 2, "cursor": first["next_cursor"]}, headers=headers).json()
+    assert len(second["items"]) == 1
+    assert second["next_cursor"] is None
+
+    detail = client.get(f"/api/history/{second['items'][0]['id']}", headers=headers).json()
+    assert detail["input_text"] == essay
+    assert detail["output_result"] == "Summary 0"
+
+    assert client.get("/api/history/999999", headers=headers).status_code == 404
+    assert client.get("/api/history", params={"cursor": "garbage"}, headers=headers).status_code == 400
+
+
+def test_history_is_private_to_its_owner(client, test_db, monkeypatch):
+    """Anonymous and other users' requests never see a user's entries; anonymous rows are never listed."""
+    monkeypatch.setattr(auth, "_auth_secret", "test-secret")
+    owner, other = _create_users("owner", "other")
+    history.history_recorder = HistoryRecorder(TestingSessionLocal, flush_interval_ms=10)
+    history.history_recorder.start()
+    try:
+        history.record(OperationType.SUMMARIZE, "Private notes.", "Notes.", user_id=owner)
+        history.record(OperationType.SUMMARIZE, "Anonymous text.", "Text.")
+    finally:
+        history.stop_history_recorder()
+
+    items = client.get("/api/history", headers=_auth(owner)).json()["items"]
+    assert [item["snippet"] for item in items] == ["Private notes."]
+    entry = items[0]["id"]
+
+    assert client.get("/api/history").status_code == 401
+    assert client.get(f"/api/history/{entry}").status_code == 401
+    assert client.get(f"/api/history/{entry}", headers={"Authorization": "Bearer forged.token.here"}).status_code == 401
+    # Signed with another secret
+    forged = {"Authorization": f"Bearer {auth.issue_token(owner, secret='other-secret')}"}
+    assert client.get(f"/api/history/{entry}", headers=forged).status_code == 401
+
+    assert client.get("/api/history", headers=_auth(other)).json()["items"] == []
+    assert client.get(f"/api/history/{entry}", headers=_auth(other)).status_code == 404
+    # The expired token of the owner
+    expired = {"Authorization": f"Bearer {auth.issue_token(owner, ttl=-1)}"}
+    assert client.get(f"/api/history/{entry}", headers=expired).status_code == 401
@@ -0,0 +1,113 @@
+"""Tests for the per-route admission budgets and load shedding."""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.admission import AdmissionMiddleware, Budget, Shed, budget_for
+
+
+def test_budget_queues_then_sheds():
+    async def scenario():
+        budget = Budget("test", concurrency=1, queue_size=1, queue_timeout=0.2)
+        await budget.acquire()
+
+        waiting = asyncio.ensure_future(budget.acquire())
+        await asyncio.sleep(0)
+        assert budget.waiting == 1
+        with pytest.raises(Shed) as full:
+            await budget.acquire()
+        assert full.value.status_code == 429
+
+        # Releasing hands the slot to the waiter
+        budget.release(0.5)
+        await waiting
+        assert budget.active == 1 and budget.waiting == 0
+
+        with pytest.raises(Shed) as late:
+            await budget.acquire()
+        assert late.value.status_code == 503
+        assert late.value.retry_after >= 1
+        budget.release(0.5)
+        assert budget.active == 0
+        return budget.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2
+    assert stats["shed_queue_full"] == 1
+    assert stats["shed_timeout"] == 1
+
+
+def test_routes():
+    assert budget_for("/api/check-grammar") == "grammar"
+    assert budget_for("/api/synonyms/bulk") == "synonyms"
+    assert budget_for("/api/history/3") == "default"
+    assert budget_for("/health") is None
+    assert budget_for("/api/metrics") is None
+
+
+def test_middleware_degrades_grammar_then_sheds():
+    inner = FastAPI()
+    release = asyncio.Event()
+
+    @inner.post("/api/check-grammar")
+    async def check(request: Request):
+        await release.wait()
+        return {"degraded": getattr(request.state, "degraded", False)}
+
+    @inner.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    middleware = AdmissionMiddleware(
+        inner, budgets={"grammar": (1, 0), "grammar-degraded": (1, 0)}, queue_timeout=1, enabled=True
+    )
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            requests = [asyncio.ensure_future(client.post("/api/check-grammar")) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            shed = await client.post("/api/check-grammar")
+            health = await client.get("/health")
+            release.set()
+            return [await r for r in requests], shed, health
+
+    (first, second), shed, health = asyncio.run(scenario())
+    assert sorted([first.json()["degraded"], second.json()["degraded"]]) == [False, True]
+    assert shed.status_code == 429
+    assert int(shed.headers["Retry-After"]) >= 1
+    assert health.status_code == 200
+
+    stats = middleware.stats()
+    assert stats["rejected"] == 1
+    assert stats["degraded"] == 1
+    assert stats["budgets"]["grammar"]["shed_queue_full"] == 2
+
+
+def test_degraded_grammar_check_skips_the_neural_stage(monkeypatch):
+    from app.api import endpoints
+    from app.models.schemas import GrammarError, GrammarErrorPosition
+
+    async def neural(text, checker_errors=None):
+        raise AssertionError("the neural stage should not run")
+
+    def spelling(text):
+        return {"languagetool": [GrammarError(
+            type='spelling', position=GrammarErrorPosition(start=0, end=4), suggestion="This", message="Thsi"
+        )]}
+
+    monkeypatch.setattr(endpoints, "_neural_stage", neural)
+    monkeypatch.setattr(endpoints, "_spelling_stage", spelling)
+
+    middleware = AdmissionMiddleware(app, budgets={"grammar": (1, 0), "grammar-degraded": (1, 0)}, enabled=True)
+    middleware.budgets["grammar"].active = 1  # Saturated
+    response = TestClient(middleware).post("/api/check-grammar", json={"text": "Thsi is fine."})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["degraded"] is True
+    assert [e["suggestion"] for e in data["errors"]] == ["This"]
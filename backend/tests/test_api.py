@@ -151,6 +151,20 @@ def test_synonyms_nonexistent_word():
     assert isinstance(data["synonyms"], list)
 
 
+def test_summarize_with_selected_algorithm():
+    """Each algorithm returns sentences taken from the input; unknown names are rejected."""
+    text = " ".join(f"Sentence {i} talks about {word}." for i, word in enumerate(
+        ["rivers", "rivers and lakes", "mountains", "lakes", "rivers", "deserts", "lakes and rivers"]))
+    for algorithm in ("lsa", "textrank", "centroid"):
+        response = client.post("/api/summarize", json={"text": text, "algorithm": algorithm})
+        assert response.status_code == 200
+        kept = response.json()["summary"][:-1].split(". ")
+        assert len(kept) == 2 and all(sentence + "." in text for sentence in kept)
+
+    response = client.post("/api/summarize", json={"text": text, "algorithm": "nope"})
+    assert response.status_code == 422
+
+
 def test_api_error_handling():
     """Test API error handling with invalid requests."""
     # Missing required field
@@ -166,3 +180,79 @@ def test_api_error_handling():
         json={"wrong_field": "value"}
     )
     assert response.status_code in [400, 422]
+
+
+def test_grammar_check_returns_partial_results_on_timeout(monkeypatch):
+    """A stage that misses its budget is reported while the other stage's errors are kept."""
+    import time
+    from app.api import endpoints
+    from app.models.schemas import GrammarError, GrammarErrorPosition
+
+    def slow_neural(text):
+        time.sleep(0.5)
+        return []
+
+    def spelling(text):
+        return {"languagetool": [GrammarError(
+            type='spelling',
+            position=GrammarErrorPosition(start=0, end=4),
+            suggestion="This",
+            message="Possible spelling mistake: Thsi"
+        )]}
+
+    monkeypatch.setattr(endpoints, "_neural_stage", slow_neural)
+    monkeypatch.setattr(endpoints, "_spelling_stage", spelling)
+    monkeypatch.setattr(endpoints, "_neural_timeout", 0.1)
+
+    response = client.post("/api/check-grammar", json={"text": "Thsi is fine."})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["timed_out"] == ["neural"]
+    assert [e["suggestion"] for e in data["errors"]] == ["This"]
+
+
+def test_overloaded_scheduler_reports_the_neural_stage_as_timed_out(monkeypatch):
+    """A full inference queue shows up in `timed_out`, not as an empty neural result."""
+    from app.api import endpoints
+    from app.utils.batching import SchedulerOverloaded
+
+    def overloaded(corrector, sentences, **kwargs):
+        raise SchedulerOverloaded("Inference queue is full")
+
+    monkeypatch.setattr(endpoints, "get_grammar_corrector", lambda: object())
+    monkeypatch.setattr(endpoints, "batch_correct", overloaded)
+    monkeypatch.setattr(endpoints, "get_result_cache", lambda: None)
+    monkeypatch.setattr(endpoints, "_spelling_stage", lambda text: {})
+
+    response = client.post("/api/check-grammar", json={"text": "This is fine."})
+
+    assert response.status_code == 200
+    assert response.json()["timed_out"] == ["neural"]
+
+
+def test_summarize_stream_returns_sections_and_final_summary(monkeypatch):
+    """A chunked upload is summarized section by section, then merged."""
+    import json
+    from app.utils import summarizer
+
+    monkeypatch.setattr(summarizer, "SUMMARY_STREAM_WINDOW", 10)
+    topics = ["rivers", "mountains", "forests", "deserts", "oceans"]
+    text = " ".join(f"Sentence {i} is about {topics[i % 5]} and {topics[i * 7 % 5]}." for i in range(45))
+
+    def chunks():
+        data = text.encode("utf-8")
+        for i in range(0, len(data), 100):
+            yield data[i:i + 100]
+
+    response = client.post("/api/summarize/stream", content=chunks(), headers={"Content-Type": "text/plain"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["section"] for line in lines[:-1]] == [0, 1, 2, 3]
+    final = lines[-1]
+    assert final["final"] is True
+    assert final["sentences"] == 45 and final["sections"] == 4
+    kept = final["summary"][:-1].split(". ")
+    assert kept and all(sentence + "." in text for sentence in kept)
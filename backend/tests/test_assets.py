@@ -0,0 +1,99 @@
+"""Tests for the NLP asset bundle and background startup."""
+import json
+
+import nltk
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import assets
+
+
+@pytest.fixture
+def no_downloads(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("unexpected download")
+
+    monkeypatch.setattr(nltk, "download", refuse)
+
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(assets, "_state", {"assets": "pending", "missing": [], "warmup": {}})
+    monkeypatch.setattr(assets, "_startup_thread", None)
+
+
+def test_current_manifest_skips_lookups_and_downloads(tmp_path, no_downloads, monkeypatch):
+    (tmp_path / "manifest.json").write_text(json.dumps(
+        {"version": assets.ASSET_BUNDLE_VERSION, "nltk": sorted(assets.NLTK_PACKAGES)}
+    ))
+    monkeypatch.setattr(assets, "_found", lambda resource: pytest.fail("looked up " + resource))
+    assert assets.ensure_assets(str(tmp_path)) == []
+    assert nltk.data.path[0] == str(tmp_path)
+
+
+def test_outdated_manifest_downloads_only_missing_packages(tmp_path, monkeypatch):
+    (tmp_path / "manifest.json").write_text(json.dumps({"version": 0, "nltk": sorted(assets.NLTK_PACKAGES)}))
+    present = {"tokenizers/punkt", "tokenizers/punkt_tab", "corpora/omw-1.4"}
+    downloaded = []
+
+    def download(package, download_dir=None, quiet=False):
+        downloaded.append(package)
+        present.add(assets.NLTK_PACKAGES[package])
+        for resource in present:
+            (tmp_path / resource).mkdir(parents=True, exist_ok=True)
+        return True
+
+    monkeypatch.setattr(assets, "_found", lambda resource: resource in present)
+    monkeypatch.setattr(nltk, "download", download)
+    assert assets.ensure_assets(str(tmp_path), download=True) == []
+    assert downloaded == ["wordnet"]
+    # The now complete bundle gets a current manifest
+    assert assets.read_manifest(str(tmp_path))["version"] == assets.ASSET_BUNDLE_VERSION
+
+
+def test_missing_assets_are_reported_without_download(tmp_path, no_downloads, monkeypatch):
+    monkeypatch.setattr(assets, "_found", lambda resource: resource != "corpora/wordnet")
+    assert assets.ensure_assets(str(tmp_path), download=False) == ["wordnet"]
+    assert assets.read_manifest(str(tmp_path)) is None
+
+
+def test_startup_runs_in_background_and_reports_warmups(fresh_state, monkeypatch):
+    warmed = []
+    monkeypatch.setattr(assets, "WARMUPS", (("one", lambda: warmed.append("one")), ("two", lambda: 1 / 0)))
+    monkeypatch.setattr(assets, "_warmup_enabled", True)
+
+    assets.start_startup(lambda: ["wordnet"]).join(5)
+    state = assets.readiness()
+    assert state["ready"] and state["missing"] == ["wordnet"]
+    assert warmed == ["one"]
+    assert state["warmup"]["one"]["status"] == "done"
+    assert state["warmup"]["two"]["status"] == "failed"
+
+
+def test_ready_endpoint_is_503_until_assets_are_checked(fresh_state):
+    client = TestClient(app)
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").status_code == 200
+
+    assets._set_state(assets="ready")
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+
+def test_failed_asset_check_is_not_ready(fresh_state, monkeypatch):
+    from app.utils import nlp
+
+    monkeypatch.setattr(assets, "_warmup_enabled", False)
+
+    def broken():
+        raise OSError("read-only file system")
+
+    # The same path as the lifespan hook: init_nlp around ensure_assets
+    monkeypatch.setattr(nlp, "ensure_assets", broken)
+    assets.start_startup(nlp.init_nlp).join(5)
+    state = assets.readiness()
+    assert state["assets"] == "failed"
+    assert state["ready"] is False
+    assert TestClient(app).get("/ready").status_code == 503
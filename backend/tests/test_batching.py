@@ -0,0 +1,120 @@
+"""Tests for the cross-request inference scheduler."""
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from app.utils.batching import InferenceScheduler, SchedulerOverloaded, SchedulerStopped
+
+
+class RecordingPipeline:
+    """Fake text2text pipeline that records the size of every batch it sees."""
+
+    def __init__(self, delay=0.0):
+        self.batch_sizes = []
+        self.delay = delay
+
+    def __call__(self, inputs, **kwargs):
+        self.batch_sizes.append(len(inputs))
+        time.sleep(self.delay)
+        return [{'generated_text': text.upper()} for text in inputs]
+
+
+def test_scheduler_returns_results_in_order():
+    scheduler = InferenceScheduler(RecordingPipeline(), max_wait_ms=5)
+    try:
+        assert scheduler.correct(["one.", "three.", "two."]) == ["ONE.", "THREE.", "TWO."]
+    finally:
+        scheduler.stop()
+
+
+def test_scheduler_batches_concurrent_requests():
+    pipeline = RecordingPipeline()
+    scheduler = InferenceScheduler(pipeline, max_batch_size=32, max_wait_ms=50)
+    results = {}
+
+    def worker(n):
+        results[n] = scheduler.correct([f"request {n} sentence {i}." for i in range(3)])
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        scheduler.stop()
+
+    for n in range(6):
+        assert results[n] == [f"REQUEST {n} SENTENCE {i}." for i in range(3)]
+    assert sum(pipeline.batch_sizes) == 18
+    assert len(pipeline.batch_sizes) < 6
+    assert scheduler.stats()["sentences"] == 18
+
+
+def test_scheduler_rejects_when_queue_full():
+    scheduler = InferenceScheduler(RecordingPipeline(delay=0.2), max_batch_size=1,
+                                   max_queue_size=1, submit_timeout=0.01)
+    try:
+        with pytest.raises(SchedulerOverloaded):
+            scheduler.correct([f"sentence {i}." for i in range(10)])
+        assert scheduler.stats()["rejected"] == 1
+    finally:
+        scheduler.stop()
+
+
+def test_scheduler_propagates_model_errors():
+    def broken(inputs, **kwargs):
+        raise RuntimeError("model crashed")
+
+    scheduler = InferenceScheduler(broken, max_wait_ms=1)
+    try:
+        with pytest.raises(RuntimeError):
+            scheduler.correct(["hello."])
+    finally:
+        scheduler.stop()
+
+
+def test_stop_fails_queued_sentences():
+    release = threading.Event()
+
+    def blocked(inputs, **kwargs):
+        release.wait(5)
+        return [{'generated_text': text} for text in inputs]
+
+    scheduler = InferenceScheduler(blocked, max_batch_size=1, max_wait_ms=1)
+    running = scheduler.submit("first.")
+    time.sleep(0.05)  # The worker is now stuck on the first sentence
+    queued = [scheduler.submit(f"sentence {i}.") for i in range(3)]
+
+    stopper = threading.Thread(target=scheduler.stop)
+    stopper.start()
+    for future in queued:
+        with pytest.raises(SchedulerStopped):
+            future.result(timeout=1)
+    release.set()
+    stopper.join()
+
+    # The batch in progress still completes
+    assert running.result(timeout=1) == "first."
+    with pytest.raises(SchedulerStopped):
+        scheduler.submit("late.")
+
+
+def test_correct_gives_up_after_the_result_timeout():
+    release = threading.Event()
+
+    def stuck(inputs, **kwargs):
+        release.wait(5)
+        return [{'generated_text': text} for text in inputs]
+
+    scheduler = InferenceScheduler(stuck, max_wait_ms=1, result_timeout=0.1)
+    try:
+        started = time.monotonic()
+        with pytest.raises(concurrent.futures.TimeoutError):
+            scheduler.correct(["one.", "two."])
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        scheduler.stop()
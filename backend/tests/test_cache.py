@@ -0,0 +1,80 @@
+"""Tests for the result cache tiers."""
+import time
+
+from app.utils.cache import MemoryTier, ResultCache, SqliteTier, make_key, normalize_text
+
+
+def test_make_key_depends_on_every_component():
+    base = make_key("summarize", "text", "sumy-lsa", "1")
+    assert base == make_key("summarize", "text", "sumy-lsa", "1")
+    assert base != make_key("synonyms", "text", "sumy-lsa", "1")
+    assert base != make_key("summarize", "other", "sumy-lsa", "1")
+    assert base != make_key("summarize", "text", "textrank", "1")
+    assert base != make_key("summarize", "text", "sumy-lsa", "2")
+
+
+def test_normalize_text():
+    assert normalize_text("  Café\r\nok \n") == "Café\nok"
+
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = MemoryTier(max_entries=2, ttl=60)
+    tier.set("a", 1)
+    tier.set("b", 2)
+    assert tier.get("a") == 1  # "b" is now the oldest
+    tier.set("c", 3)
+    assert tier.get("b") is None
+    assert tier.get("a") == 1
+    assert tier.get("c") == 3
+
+
+def test_memory_tier_expires_entries():
+    tier = MemoryTier(max_entries=10, ttl=0.01)
+    tier.set("a", 1)
+    time.sleep(0.02)
+    assert tier.get("a") is None
+
+
+def test_sqlite_tier_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SqliteTier(path, ttl=60).set("key", {"summary": "cached"})
+    assert SqliteTier(path, ttl=60).get("key") == {"summary": "cached"}
+
+
+def test_sqlite_tier_prunes_expired_and_oldest_rows(tmp_path):
+    disk = SqliteTier(str(tmp_path / "cache.db"), ttl=60, max_entries=3, prune_every=2)
+    disk.set("stale", "old")
+    disk._conn.execute("UPDATE result_cache SET expires = 0 WHERE key = 'stale'")
+    disk._conn.commit()
+    disk.set("a", 1)  # Second write: prunes the expired row without it being read
+    assert len(disk) == 1
+    for key in "bcde":
+        disk.set(key, key)
+    disk.prune()
+    assert len(disk) == 3
+    assert disk.get("a") is None and disk.get("b") is None
+    assert disk.get("e") == "e"
+
+
+def test_result_cache_promotes_and_counts(tmp_path):
+    memory = MemoryTier(max_entries=10, ttl=60)
+    disk = SqliteTier(str(tmp_path / "cache.db"), ttl=60)
+    disk.set("key", ["glad", "joyful"])
+    cache = ResultCache([memory, disk])
+
+    assert cache.get("missing") is None
+    assert cache.get("key") == ["glad", "joyful"]
+    assert memory.get("key") == ["glad", "joyful"]
+    assert cache.get("key") == ["glad", "joyful"]
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["tiers"]["sqlite"]["hits"] == 1
+    assert stats["tiers"]["memory"]["hits"] == 1
+
+
+def test_result_cache_ignores_none():
+    cache = ResultCache([MemoryTier()])
+    cache.set("key", None)
+    assert cache.get("key") is None
@@ -0,0 +1,61 @@
+"""Tests for the database engine configuration."""
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db import database
+from app.db.database import (
+    TimedQueuePool, engine_options, make_engine, pool_stats, pool_status
+)
+
+
+def test_sqlite_file_connections_get_pragmas(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    try:
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert connection.execute(text("PRAGMA mmap_size")).scalar() == database._sqlite_mmap_size
+    finally:
+        engine.dispose()
+
+
+def test_pool_options_come_from_settings():
+    options = engine_options("postgresql://user@localhost/studykit")
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == database._pool_size
+    assert options["max_overflow"] == database._max_overflow
+    assert options["pool_pre_ping"] == database._pool_pre_ping
+    assert "connect_args" not in options
+
+    # In-memory SQLite keeps its single-connection pool
+    assert "poolclass" not in engine_options("sqlite://")
+
+
+def test_pool_records_checkout_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "_pool_size", 1)
+    monkeypatch.setattr(database, "_max_overflow", 0)
+    monkeypatch.setattr(database, "_pool_timeout", 0.05)
+    engine = make_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    before = pool_stats.stats()
+    try:
+        held = engine.connect()
+        released = threading.Timer(0.1, held.close)
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        released.start()
+        engine.pool._timeout = 2
+        with engine.connect():
+            pass
+        released.join()
+
+        after = pool_stats.stats()
+        assert after["checkouts"] - before["checkouts"] == 3
+        assert after["timeouts"] - before["timeouts"] == 1
+        assert after["max_wait_ms"] >= 50
+        status = pool_status(engine)
+        assert status["size"] == 1 and status["checked_out"] == 0
+    finally:
+        engine.dispose()
@@ -0,0 +1,178 @@
+"""Tests for the Gemini client against a local mock transport (no network)."""
+import asyncio
+import json
+
+import httpx
+
+from app.utils import nlp
+from app.utils.nlp import GeminiCorrector, CircuitBreaker
+
+
+def _reply(text):
+    return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+
+def _prompt_text(request):
+    prompt = json.loads(request.content)["contents"][0]["parts"][0]["text"]
+    return prompt.split("Text: ", 1)[1]
+
+
+def test_acorrect_fans_out_with_concurrency_limit():
+    state = {"active": 0, "peak": 0}
+
+    async def handler(request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return _reply(_prompt_text(request).replace("teh", "the"))
+
+    corrector = GeminiCorrector("key", max_concurrency=3, pack_tokens=0, transport=httpx.MockTransport(handler))
+    sentences = [f"Sentence {i} has teh typo." for i in range(10)]
+
+    corrected = asyncio.run(corrector.acorrect(sentences))
+
+    assert corrected == [f"Sentence {i} has the typo." for i in range(10)]
+    assert 1 < state["peak"] <= 3
+
+
+def test_acorrect_retries_rate_limits():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(429 if len(calls) == 1 else 503)
+        return _reply("Fixed.")
+
+    corrector = GeminiCorrector("key", backoff=0.001, transport=httpx.MockTransport(handler))
+
+    assert asyncio.run(corrector.acorrect(["Fixd."])) == ["Fixed."]
+    assert len(calls) == 3
+    assert corrector.breaker.state == "closed"
+
+
+def test_retry_after_is_capped():
+    corrector = GeminiCorrector("key", max_retries=2, backoff=0.5)
+
+    assert corrector._retry_delay(0, httpx.Response(429, headers={"Retry-After": "1"})) == 1.0
+    # An hour-long Retry-After waits no longer than the last backoff step
+    assert corrector._retry_delay(0, httpx.Response(429, headers={"Retry-After": "3600"})) == 0.5 * 2 ** 2
+
+
+def test_circuit_opens_and_fails_over(monkeypatch):
+    def handler(request):
+        return httpx.Response(500)
+
+    corrector = GeminiCorrector("key", max_retries=0, transport=httpx.MockTransport(handler))
+    corrector.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    assert asyncio.run(corrector.acorrect(["One.", "Two."])) == [None, None]
+    assert corrector.breaker.state == "open"
+
+    monkeypatch.setenv("GEMINI_API_KEY", "key")
+    monkeypatch.setattr(nlp, "gemini_corrector", corrector)
+    monkeypatch.setattr(nlp, "_use_t5_model", False)
+    # No T5 configured, so failing over leaves no neural corrector
+    assert nlp.get_grammar_corrector() is None
+
+
+def _packed_sentences(request):
+    prompt = json.loads(request.content)["contents"][0]["parts"][0]["text"]
+    if "Sentences: " not in prompt:
+        return None
+    return json.loads(prompt.split("Sentences: ", 1)[1])
+
+
+def test_packed_prompt_maps_corrections_back():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        items = _packed_sentences(request)
+        # Reply out of order to check the index mapping
+        reply = [{"i": item["i"], "text": item["text"].replace("teh", "the")} for item in reversed(items)]
+        return _reply(json.dumps(reply))
+
+    corrector = GeminiCorrector("key", transport=httpx.MockTransport(handler))
+    sentences = [f"Sentence {i} has teh typo." for i in range(20)]
+
+    assert asyncio.run(corrector.acorrect(sentences)) == [f"Sentence {i} has the typo." for i in range(20)]
+    assert len(calls) == 1
+
+
+def test_packed_prompt_falls_back_per_sentence():
+    def handler(request):
+        items = _packed_sentences(request)
+        if items is not None:
+            # Drop sentence 1 and wrap the JSON in a code fence
+            kept = [{"i": item["i"], "text": item["text"].upper()} for item in items if item["i"] != 1]
+            return _reply("```json\n" + json.dumps(kept) + "\n```")
+        return _reply(_prompt_text(request).lower())
+
+    corrector = GeminiCorrector("key", transport=httpx.MockTransport(handler))
+    sentences = ["One.", "Two.", "Three."]
+
+    assert asyncio.run(corrector.acorrect(sentences)) == ["ONE.", "two.", "THREE."]
+    assert corrector.correct_many(sentences) == ["ONE.", "two.", "THREE."]
+
+
+def test_unparseable_packed_reply_uses_single_calls():
+    def handler(request):
+        if _packed_sentences(request) is not None:
+            return _reply("Sorry, here are your sentences: ...")
+        return _reply(_prompt_text(request) + "!")
+
+    corrector = GeminiCorrector("key", transport=httpx.MockTransport(handler))
+
+    assert corrector(["One.", "Two."]) == [[{'generated_text': "One.!"}], [{'generated_text': "Two.!"}]]
+
+
+def test_pack_respects_token_budget():
+    corrector = GeminiCorrector("key", pack_tokens=40)
+    sentences = ["x" * 80] * 5  # ~28 tokens each
+
+    assert corrector._pack(sentences) == [[0], [1], [2], [3], [4]]
+    corrector.pack_tokens = 100
+    assert corrector._pack(sentences) == [[0, 1, 2], [3, 4]]
+
+
+def test_circuit_breaker_half_open_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_malformed_replies_count_as_failures():
+    replies = iter([
+        httpx.Response(200, text="<html>not json</html>"),
+        httpx.Response(200, json={"candidates": [{"content": {}}]}),
+    ])
+
+    corrector = GeminiCorrector("key", max_retries=1, backoff=0.001, transport=httpx.MockTransport(lambda r: next(replies)))
+    corrector.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    assert asyncio.run(corrector.acorrect(["One."])) == [None]
+    assert corrector.breaker.state == "open"
+
+
+def test_client_of_a_finished_loop_is_closed():
+    corrector = GeminiCorrector("key", transport=httpx.MockTransport(lambda r: _reply("Fixed.")))
+
+    assert asyncio.run(corrector.acorrect(["Fixd."])) == ["Fixed."]
+    first = corrector._async_client
+
+    async def second_loop():
+        corrected = await corrector.acorrect(["Fixd."])
+        await asyncio.sleep(0)  # Let the close task run
+        return corrected
+
+    assert asyncio.run(second_loop()) == ["Fixed."]
+    assert first.is_closed
+    assert corrector._async_client is not first
+
+    asyncio.run(corrector.aclose())
+    assert corrector._async_client is None
@@ -0,0 +1,150 @@
+"""Tests for the write-behind TextHistory recorder."""
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models import TextContent, TextHistory
+from app.models.text_history import OperationType
+from app.utils import history
+from app.utils.history import HistoryRecorder, decode_cursor, list_history, load_text, prepare_rows
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def _rows(session_factory):
+    with session_factory() as session:
+        return session.scalars(select(TextHistory).order_by(TextHistory.id)).all()
+
+
+def test_stop_drains_queued_rows(session_factory):
+    recorder = HistoryRecorder(session_factory, batch_size=4, flush_interval_ms=10000)
+    recorder.start()
+    for i in range(10):
+        assert recorder.record(OperationType.SUMMARIZE, f"text {i}", f"summary {i}")
+    recorder.stop()
+
+    rows = _rows(session_factory)
+    assert [row.input_text for row in rows] == [f"text {i}" for i in range(10)]
+    assert rows[3].operation_type is OperationType.SUMMARIZE
+    assert rows[3].output_result == "summary 3"
+    assert rows[3].created_at is not None
+    # Ten rows in batches of at most four
+    assert recorder.stats()["flushes"] == 3
+    assert recorder.stats()["written"] == 10
+
+
+def test_flushes_after_interval(session_factory):
+    flushed = threading.Event()
+
+    class Recorder(HistoryRecorder):
+        def flush(self, rows):
+            super().flush(rows)
+            flushed.set()
+
+    recorder = Recorder(session_factory, batch_size=100, flush_interval_ms=20)
+    recorder.start()
+    try:
+        recorder.record(OperationType.SYNONYM_LOOKUP, "happy", '["glad"]')
+        assert flushed.wait(5)
+        assert [row.input_text for row in _rows(session_factory)] == ["happy"]
+    finally:
+        recorder.stop()
+
+
+def test_record_does_not_block_when_queue_is_full(session_factory):
+    # Not started, so nothing consumes the queue
+    recorder = HistoryRecorder(session_factory, max_queue_size=2)
+    assert recorder.record(OperationType.GRAMMAR_CHECK, "one")
+    assert recorder.record(OperationType.GRAMMAR_CHECK, "two")
+    assert not recorder.record(OperationType.GRAMMAR_CHECK, "three")
+    assert recorder.stats()["dropped"] == 1
+
+
+def test_failed_flush_drops_batch(session_factory):
+    def broken():
+        raise RuntimeError("database is down")
+
+    recorder = HistoryRecorder(broken, flush_interval_ms=1)
+    recorder.start()
+    recorder.record(OperationType.GRAMMAR_CHECK, "text")
+    recorder.stop()
+    assert recorder.stats()["failed"] == 1
+    assert recorder.stats()["written"] == 0
+
+
+def test_large_texts_are_compressed_and_stored_once(session_factory):
+    essay = "A long essay about rivers and the banks along them. " * 200
+    recorder = HistoryRecorder(session_factory, flush_interval_ms=10000)
+    recorder.start()
+    recorder.record(OperationType.SUMMARIZE, essay, "short summary")
+    recorder.record(OperationType.SUMMARIZE, essay, "short summary")
+    recorder.stop()
+
+    rows = _rows(session_factory)
+    with session_factory() as session:
+        contents = session.scalars(select(TextContent)).all()
+        assert len(contents) == 1
+        assert len(contents[0].data) < len(essay) // 10
+        assert all(row.input_text is None and row.input_hash == contents[0].hash for row in rows)
+        assert load_text(session, rows[0].input_text, rows[0].input_hash) == essay
+        assert load_text(session, rows[0].output_result, rows[0].output_hash) == "short summary"
+    assert rows[0].input_size == len(essay)
+    assert rows[0].input_snippet == essay[:120]
+
+
+def test_prepare_rows_keeps_short_texts_inline():
+    row = {"user_id": 1, "operation_type": OperationType.GRAMMAR_CHECK, "input_text": "short",
+           "output_result": None, "created_at": datetime.now(timezone.utc)}
+    values, contents = prepare_rows([row], inline_max_chars=10)
+    assert contents == []
+    assert values[0]["input_text"] == "short" and values[0]["input_hash"] is None
+    assert values[0]["output_size"] is None
+
+
+def test_keyset_pagination_walks_all_rows(session_factory):
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    with session_factory() as session:
+        for i in range(25):
+            # Pairs of rows share a timestamp, so the id breaks ties
+            session.add(TextHistory(user_id=1, operation_type=OperationType.SUMMARIZE, input_text=f"text {i}",
+                                    input_snippet=f"text {i}", created_at=started + timedelta(seconds=i // 2)))
+        session.add(TextHistory(user_id=2, operation_type=OperationType.SUMMARIZE, input_text="other user"))
+        session.commit()
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = list_history(session, user_id=1, limit=10, cursor=cursor)
+            seen.extend(row.input_snippet for row in rows)
+            if cursor is None:
+                break
+        assert seen == [f"text {i}" for i in reversed(range(25))]
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_recorder_stays_off_without_the_tables(monkeypatch):
+    from app.db import database
+
+    empty = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    monkeypatch.setattr(database, "engine", empty)
+    monkeypatch.setattr(history, "_history_enabled", True)
+    monkeypatch.setattr(history, "history_recorder", None)
+
+    assert history.start_history_recorder() is None
+    # record() is then a no-op instead of a failing flush
+    history.record(OperationType.SUMMARIZE, "text", "summary")
+    empty.dispose()
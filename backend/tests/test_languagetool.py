@@ -0,0 +1,122 @@
+"""Tests for the LanguageTool client and local server supervisor (offline, using a fake server)."""
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+from app.utils import languagetool
+from app.utils.languagetool import LanguageToolClient, LanguageToolServer
+from tests.fake_languagetool import start_fake_server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def fake_server():
+    server, base_url = start_fake_server()
+    yield base_url
+    server.shutdown()
+
+
+def test_client_check_returns_matches(fake_server):
+    client = LanguageToolClient(fake_server)
+    try:
+        assert client.healthy()
+        matches = client.check("I saw teh cat.")
+    finally:
+        client.close()
+
+    assert len(matches) == 1
+    match = matches[0]
+    assert (match.offset, match.errorLength) == (6, 3)
+    assert match.replacements == ["the"]
+    assert match.ruleIssueType == "misspelling"
+
+
+def _wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not predicate():
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_get_language_tool_reconnects_in_background(fake_server, monkeypatch):
+    monkeypatch.setattr(languagetool, "language_tool", None)
+    monkeypatch.setattr(languagetool, "_next_retry", 0.0)
+    monkeypatch.setattr(languagetool, "_lt_mode", "remote")
+    monkeypatch.setattr(languagetool, "_lt_url", f"http://127.0.0.1:{_free_port()}/v2")
+
+    # Unreachable: disabled until the retry cooldown passes, not forever
+    assert languagetool.get_language_tool() is None
+    assert _wait_for(lambda: not languagetool._connecting)
+    assert languagetool.language_tool is None
+    assert languagetool._next_retry > time.monotonic()
+
+    monkeypatch.setattr(languagetool, "_lt_url", fake_server)
+    monkeypatch.setattr(languagetool, "_next_retry", 0.0)
+    # The request that triggers the connect doesn't wait for it
+    assert languagetool.get_language_tool() is None
+    assert _wait_for(lambda: languagetool.language_tool is not None)
+    tool = languagetool.get_language_tool()
+    assert languagetool.get_language_tool() is tool
+
+    languagetool.mark_language_tool_down()
+    assert languagetool.language_tool is None
+
+
+def test_local_server_starts_without_blocking_requests(monkeypatch):
+    port = _free_port()
+    # Stays silent for a second before serving, like the Java server loading its rules
+    command = [sys.executable, "-c", f"import time, runpy, sys; time.sleep(1); "
+               f"sys.argv = ['fake', '--port', '{port}']; runpy.run_module('tests.fake_languagetool', run_name='__main__')"]
+    monkeypatch.setattr(languagetool, "language_tool", None)
+    monkeypatch.setattr(languagetool, "language_tool_server", None)
+    monkeypatch.setattr(languagetool, "_next_retry", 0.0)
+    monkeypatch.setattr(languagetool, "_lt_mode", "local")
+    monkeypatch.setattr(languagetool, "_local_command", lambda: command)
+    monkeypatch.setattr(languagetool, "_lt_port", port)
+    cwd = os.getcwd()
+    os.chdir(BACKEND_DIR)
+    try:
+        started = time.monotonic()
+        languagetool.start_language_tool()
+        assert languagetool.get_language_tool() is None
+        assert time.monotonic() - started < 0.5
+
+        assert _wait_for(lambda: languagetool.language_tool is not None, timeout=20)
+        assert [m.replacements for m in languagetool.get_language_tool().check("I saw teh cat.")] == [["the"]]
+    finally:
+        languagetool.shutdown_language_tool()
+        os.chdir(cwd)
+
+
+def test_server_supervisor_restarts_crashed_process():
+    port = _free_port()
+    command = [sys.executable, "-m", "tests.fake_languagetool", "--port", str(port)]
+    server = LanguageToolServer(command, port, health_interval=0.1, startup_timeout=10)
+    cwd = os.getcwd()
+    os.chdir(BACKEND_DIR)
+    try:
+        server.start()
+        assert server.wait_ready(10)
+        assert server.healthy()
+
+        server._process.kill()
+        server._process.wait()
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and not (server.restarts and server.healthy()):
+            time.sleep(0.1)
+        assert server.restarts >= 1
+        assert server.healthy()
+    finally:
+        server.stop()
+        os.chdir(cwd)
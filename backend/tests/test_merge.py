@@ -0,0 +1,76 @@
+"""Property-style tests for merge_errors against the original pairwise merge."""
+import random
+
+from app.models.schemas import GrammarError, GrammarErrorPosition
+from app.utils.merge import merge_errors
+
+
+def _error(start, end, source):
+    return GrammarError(
+        type='grammar',
+        position=GrammarErrorPosition(start=start, end=end),
+        suggestion=source,
+        message=f"{source} {start}-{end}"
+    )
+
+
+def _pairwise_merge(t5_errors, spelling_errors):
+    """The O(n*m) merge check_grammar used before merge_errors existed."""
+    final_errors = list(t5_errors)
+    for s_err in spelling_errors:
+        is_covered = False
+        for t_err in t5_errors:
+            if max(s_err.position.start, t_err.position.start) < min(s_err.position.end, t_err.position.end):
+                is_covered = True
+                break
+        if not is_covered:
+            final_errors.append(s_err)
+    final_errors.sort(key=lambda x: x.position.start)
+    return final_errors
+
+
+def _random_errors(rng, count, source, text_length=200):
+    errors = []
+    for _ in range(count):
+        start = rng.randrange(text_length)
+        # Include zero-length spans, like the insert errors the T5 diff can produce
+        end = start + rng.choice([0, 1, 1, 2, 3, 5, 8, 13])
+        errors.append(_error(start, end, source))
+    return errors
+
+
+def test_matches_pairwise_merge_on_random_inputs():
+    rng = random.Random(1234)
+    for _ in range(500):
+        t5_errors = _random_errors(rng, rng.randrange(0, 15), "neural")
+        spelling_errors = _random_errors(rng, rng.randrange(0, 30), "languagetool")
+
+        merged = merge_errors({"neural": t5_errors, "languagetool": spelling_errors})
+
+        assert merged == _pairwise_merge(t5_errors, spelling_errors)
+
+
+def test_priority_order_is_configurable():
+    neural = [_error(0, 5, "neural")]
+    spelling = [_error(3, 8, "languagetool")]
+
+    assert merge_errors({"neural": neural, "languagetool": spelling}) == neural
+    assert merge_errors(
+        {"neural": neural, "languagetool": spelling}, priority=("languagetool", "neural")
+    ) == spelling
+
+
+def test_three_tiers_only_suppressed_by_kept_errors():
+    neural = [_error(0, 4, "neural")]
+    lt = [_error(2, 6, "languagetool"), _error(10, 12, "languagetool")]
+    textblob = [_error(5, 7, "textblob"), _error(11, 13, "textblob"), _error(20, 22, "textblob")]
+
+    merged = merge_errors({"textblob": textblob, "languagetool": lt, "neural": neural})
+
+    # (2, 6) is dropped by the neural error, so it doesn't suppress (5, 7)
+    assert [(e.position.start, e.position.end) for e in merged] == [(0, 4), (5, 7), (10, 12), (20, 22)]
+
+
+def test_errors_from_one_checker_never_suppress_each_other():
+    lt = [_error(0, 5, "languagetool"), _error(2, 4, "languagetool")]
+    assert merge_errors({"languagetool": lt}) == lt
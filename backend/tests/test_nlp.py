@@ -0,0 +1,42 @@
+"""Unit tests for the NLP helpers (no models or corpora required)."""
+from app.utils.nlp import correct_sentences
+
+
+class FakePipeline:
+    """Stands in for the text2text pipeline: upper-cases every input."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append(list(inputs))
+        return [{'generated_text': text.upper()} for text in inputs]
+
+
+def test_correct_sentences_preserves_input_order():
+    pipeline = FakePipeline()
+    sentences = ["a much longer sentence here.", "short.", "medium one."]
+
+    corrected = correct_sentences(pipeline, sentences, batch_size=8)
+
+    assert corrected == [s.upper() for s in sentences]
+    # Everything fits in one batch, sorted by length
+    assert pipeline.calls == [["short.", "medium one.", "a much longer sentence here."]]
+
+
+def test_correct_sentences_micro_batches():
+    pipeline = FakePipeline()
+    sentences = [f"sentence {'x' * i}." for i in range(5)]
+
+    corrected = correct_sentences(pipeline, sentences, batch_size=2)
+
+    assert corrected == [s.upper() for s in sentences]
+    assert [len(batch) for batch in pipeline.calls] == [2, 2, 1]
+
+
+def test_correct_sentences_handles_empty_results():
+    def corrector(inputs, **kwargs):
+        return [[] for _ in inputs]
+
+    assert correct_sentences(corrector, ["one.", "two."]) == [None, None]
+    assert correct_sentences(corrector, []) == []
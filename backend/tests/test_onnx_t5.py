@@ -0,0 +1,110 @@
+"""Tests for the ONNX T5 corrector's cached greedy decoding (fake sessions, no model needed)."""
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.utils.nlp import correct_sentences
+from app.utils.onnx_t5 import OnnxT5Corrector
+
+EOS, PAD = 1, 0
+VOCAB = ["<pad>", "</s>", "the", "cat", "sat", "dog", "ran"]
+
+
+class FakeTokenizer:
+    def __call__(self, texts, padding=True, truncation=True, max_length=512, return_tensors="np"):
+        rows = [[VOCAB.index(w) for w in text.split()] + [EOS] for text in texts]
+        width = max(len(r) for r in rows)
+        return {
+            "input_ids": np.array([r + [PAD] * (width - len(r)) for r in rows]),
+            "attention_mask": np.array([[1] * len(r) + [0] * (width - len(r)) for r in rows]),
+        }
+
+    def batch_decode(self, tokens, skip_special_tokens=True):
+        return [" ".join(VOCAB[t] for t in row if t > EOS) for row in tokens]
+
+
+class FakeSession:
+    """Declares its input/output names like an ONNX Runtime session and computes outputs with `fn`."""
+
+    def __init__(self, inputs, outputs, fn):
+        self._inputs, self._outputs, self.fn = inputs, outputs, fn
+        self.calls = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=n) for n in self._inputs]
+
+    def get_outputs(self):
+        return [SimpleNamespace(name=n) for n in self._outputs]
+
+    def run(self, output_names, feed):
+        assert set(feed) == set(self._inputs)
+        self.calls.append(feed)
+        result = self.fn(**{k.replace(".", "_"): v for k, v in feed.items()})
+        return [result[n] for n in self._outputs]
+
+
+def _logits(tokens):
+    logits = np.zeros((len(tokens), 1, len(VOCAB)), dtype=np.float32)
+    logits[np.arange(len(tokens)), 0, tokens] = 1.0
+    return logits
+
+
+def _copy_next(source, mask, position):
+    """A 'model' that copies the source: token at `position`, then EOS."""
+    lengths = mask.sum(axis=1) - 1  # without the source EOS
+    safe = np.minimum(position, source.shape[1] - 1)
+    return np.where(position < lengths, source[np.arange(len(source)), safe], EOS)
+
+
+def make_corrector():
+    encoder = FakeSession(
+        ["input_ids", "attention_mask"], ["last_hidden_state"],
+        lambda input_ids, attention_mask: {"last_hidden_state": input_ids[:, :, None].astype(np.float32)},
+    )
+
+    def first_step(input_ids, encoder_hidden_states, encoder_attention_mask):
+        source = encoder_hidden_states[:, :, 0].astype(np.int64)
+        return {
+            "logits": _logits(_copy_next(source, encoder_attention_mask, np.zeros(len(source), dtype=np.int64))),
+            "present.0.decoder.key": input_ids[:, None, :, None].astype(np.float32),
+            "present.0.encoder.key": encoder_hidden_states[:, None],
+        }
+
+    def next_step(input_ids, encoder_attention_mask, past_key_values_0_decoder_key, past_key_values_0_encoder_key):
+        key = np.concatenate([past_key_values_0_decoder_key, input_ids[:, None, :, None].astype(np.float32)], axis=2)
+        source = past_key_values_0_encoder_key[:, 0, :, 0].astype(np.int64)
+        position = np.full(len(source), key.shape[2] - 1)
+        return {"logits": _logits(_copy_next(source, encoder_attention_mask, position)), "present.0.decoder.key": key}
+
+    decoder = FakeSession(
+        ["input_ids", "encoder_hidden_states", "encoder_attention_mask"],
+        ["logits", "present.0.decoder.key", "present.0.encoder.key"], first_step,
+    )
+    decoder_with_past = FakeSession(
+        ["input_ids", "encoder_attention_mask", "past_key_values.0.decoder.key", "past_key_values.0.encoder.key"],
+        ["logits", "present.0.decoder.key"], next_step,
+    )
+    return OnnxT5Corrector(FakeTokenizer(), encoder, decoder, decoder_with_past, model_id="fake:onnx-int8",
+                           eos_token_id=EOS, pad_token_id=PAD)
+
+
+def test_generates_with_cached_keys_and_values():
+    corrector = make_corrector()
+    assert corrector(["the cat sat", "dog ran"]) == [{'generated_text': "the cat sat"}, {'generated_text': "dog ran"}]
+
+    # One first step, then one token per step through the with-past decoder until every row ended
+    assert len(corrector.decoder.calls) == 1
+    steps = corrector.decoder_with_past.calls
+    assert len(steps) == 3
+    assert all(step["input_ids"].shape == (2, 1) for step in steps)
+    assert [step["past_key_values.0.decoder.key"].shape[2] for step in steps] == [1, 2, 3]
+
+
+def test_respects_max_length():
+    corrector = make_corrector()
+    assert corrector(["the cat sat"], max_length=2) == [{'generated_text': "the cat"}]
+
+
+def test_drops_into_correct_sentences():
+    corrector = make_corrector()
+    assert correct_sentences(corrector, ["cat", "the dog ran"], batch_size=8, max_length=16) == ["cat", "the dog ran"]
@@ -0,0 +1,72 @@
+"""Tests for the process pools running the CPU-bound NLP stages."""
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import endpoints
+from app.main import app
+from app.utils import pools
+from app.utils.pools import PoolOverloaded, WorkerPool, summarize_text
+from app.utils.summarizer import get_summarizer
+
+TEXT = (
+    "Railways changed how goods and people moved. Steam locomotives pulled heavy trains over long distances. "
+    "Towns along the lines grew quickly. Farmers could sell their crops in distant cities. "
+    "Timetables forced the adoption of standard time. Cars and aircraft later competed with the railways."
+)
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool("test", 1, max_pending=2, start_method="forkserver")
+    yield pool
+    pool.stop()
+
+
+def test_runs_calls_in_worker_processes(pool):
+    assert pool.call(pools._ping) != os.getpid()
+    assert pool.call(summarize_text, "lsa", TEXT) == get_summarizer("lsa").summarize(TEXT)
+    assert asyncio.run(pool.run(summarize_text, "textrank", TEXT)) == get_summarizer("textrank").summarize(TEXT)
+
+    stats = pool.stats()
+    assert stats["completed"] == 3
+    assert stats["pending"] == 0
+    assert stats["avg_run_ms"] > 0
+
+
+def test_rejects_calls_beyond_max_pending(pool):
+    running = [pool.submit(time.sleep, 0.5), pool.submit(time.sleep, 0.5)]
+    with pytest.raises(PoolOverloaded):
+        pool.submit(time.sleep, 0)
+    for future in running:
+        future.result(timeout=10)
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["peak_pending"] == 2
+
+
+def test_restarts_after_a_worker_dies(pool):
+    with pytest.raises(Exception):
+        pool.call(os._exit, 1, timeout=30)
+    assert pool.call(pools._ping, timeout=30)
+    assert pool.stats()["restarts"] == 1
+    assert pool.stats()["failed"] == 1
+
+
+def test_summarize_endpoint_uses_the_pool(monkeypatch):
+    monkeypatch.setattr(pools, "_pools_enabled", True)
+    monkeypatch.setattr(pools, "POOL_SIZES", {"summarize": 1})
+    monkeypatch.setattr(endpoints, "get_result_cache", lambda: None)
+    client = TestClient(app)
+    try:
+        response = client.post("/api/summarize", json={"text": TEXT, "algorithm": "centroid"})
+        assert response.status_code == 200
+        assert response.json()["summary"] == get_summarizer("centroid").summarize(TEXT)
+
+        stats = client.get("/api/metrics").json()["pools"]
+        assert list(stats) == ["summarize"]
+        assert stats["summarize"]["completed"] == 1
+    finally:
+        pools.stop_pools()
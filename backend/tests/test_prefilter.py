@@ -0,0 +1,64 @@
+"""Tests for the grammar pre-filter in front of the neural corrector."""
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import GrammarError, GrammarErrorPosition
+from app.utils.prefilter import PreFilter, features, matches_by_sentence
+from app.utils.tokenizer import segment
+
+client = TestClient(app)
+
+
+def _error(start, end, type="grammar"):
+    return GrammarError(type=type, position=GrammarErrorPosition(start=start, end=end), suggestion="", message="")
+
+
+def test_flags_broken_sentences_and_passes_clean_ones():
+    prefilter = PreFilter()
+    clean = "Plants use sunlight to turn water and carbon dioxide into sugar."
+    for broken in ("He don't like vegetables.", "I has a apple in my bag.", "We went to to the park."):
+        assert prefilter.score(broken)[0] > prefilter.score(clean)[0]
+    assert prefilter.select([clean, "They was late."], [[], []]) == [1]
+    # A checker match inside the sentence is strong evidence on its own
+    assert prefilter.select([clean], [["grammar"]]) == [0]
+
+
+def test_features():
+    values = features("the the cat sat on a apple", vocabulary={"the", "cat", "sat", "on", "apple"})
+    assert values["repeated_words"] == 1
+    assert values["bad_bigrams"] == 1
+    assert values["lowercase_start"] == 1
+    assert values["no_final_punctuation"] == 1
+    assert values["oov_words"] == 0
+    # Regular inflections of known words are not out of vocabulary
+    assert features("Cats singing quietly.", vocabulary={"cat", "sing"})["oov_words"] == 1
+
+
+def test_matches_by_sentence():
+    text = "First one. Second one. Third one."
+    sentences = segment(text).sentences
+    errors = [_error(0, 5), _error(24, 29, "spelling"), _error(26, 27)]
+    assert matches_by_sentence(sentences, errors) == [["grammar"], [], ["spelling", "grammar"]]
+
+
+def test_grammar_check_skips_unsuspicious_sentences(monkeypatch):
+    from app.api import endpoints
+
+    seen = []
+
+    async def correct(corrector, sentences):
+        seen.extend(sentences)
+        return list(sentences)
+
+    monkeypatch.setattr(endpoints, "prefilter_enabled", lambda: True)
+    monkeypatch.setattr(endpoints, "get_prefilter", lambda: PreFilter())
+    monkeypatch.setattr(endpoints, "get_grammar_corrector", lambda: object())
+    monkeypatch.setattr(endpoints, "_correct_cached", correct)
+    monkeypatch.setattr(endpoints, "_spelling_stage", lambda text: {"languagetool": [_error(32, 37)]})
+
+    text = "The sun is bright today. Rivers flows to the sea. She don't know."
+    response = client.post("/api/check-grammar", json={"text": text})
+
+    assert response.status_code == 200
+    assert response.json()["skipped_sentences"] == 1
+    assert seen == ["Rivers flows to the sea.", "She don't know."]
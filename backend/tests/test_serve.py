@@ -0,0 +1,69 @@
+"""Tests for the preload-and-fork server's memory reporting and worker settings."""
+import os
+
+from fastapi.testclient import TestClient
+
+import serve
+from app.main import app
+from app.utils.memory import parse_smaps_rollup, process_memory
+
+SMAPS_ROLLUP = """55ad8058f000-7ffccaa24000 ---p 00000000 00:00 0                          [rollup]
+Rss:              204800 kB
+Pss:               71680 kB
+Pss_Anon:          10240 kB
+Shared_Clean:     184320 kB
+Shared_Dirty:       2048 kB
+Private_Clean:      8192 kB
+Private_Dirty:     10240 kB
+Swap:                  0 kB
+"""
+
+
+def test_parse_smaps_rollup():
+    assert parse_smaps_rollup(SMAPS_ROLLUP) == {
+        "rss_mb": 200.0, "pss_mb": 70.0, "shared_mb": 182.0, "private_mb": 18.0, "swap_mb": 0.0,
+    }
+
+
+def test_process_memory_of_this_process():
+    memory = process_memory()
+    if memory is None:  # No /proc on this platform
+        return
+    assert memory["rss_mb"] > 0
+    assert process_memory(2 ** 22 + 1) is None
+
+
+def test_metrics_report_worker_memory(monkeypatch):
+    monkeypatch.setenv("SERVE_WORKER_ID", "3")
+    memory = TestClient(app).get("/api/metrics").json()["memory"]
+    assert memory["pid"] == os.getpid()
+    assert memory["worker"] == 3
+
+
+def test_worker_threads_split_the_cpus(monkeypatch):
+    monkeypatch.delenv("TORCH_NUM_THREADS", raising=False)
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert serve.worker_threads(1) == 8
+    assert serve.worker_threads(3) == 2
+    assert serve.worker_threads(16) == 1
+    monkeypatch.setenv("TORCH_NUM_THREADS", "4")
+    assert serve.worker_threads(3) == 4
+
+
+def test_proxy_headers_trusted_only_from_configured_proxies(monkeypatch):
+    assert serve.uvicorn_options()["forwarded_allow_ips"] == "127.0.0.1"
+    monkeypatch.setattr(serve, "FORWARDED_ALLOW_IPS", "10.0.0.5,10.0.0.6")
+    assert serve.uvicorn_options()["forwarded_allow_ips"] == "10.0.0.5,10.0.0.6"
+
+
+def test_pools_are_split_between_workers(monkeypatch, capsys):
+    from app.utils import pools
+
+    monkeypatch.setattr(pools, "_pools_enabled", False)
+    assert serve.split_pools(4) == 0
+
+    monkeypatch.setattr(pools, "_pools_enabled", True)
+    monkeypatch.setattr(pools, "POOL_SIZES", {"summarize": 4, "spelling": 1, "neural": 0})
+    assert serve.split_pools(2) == 6
+    assert pools.POOL_SIZES == {"summarize": 2, "spelling": 1, "neural": 0}
+    assert "6 pool processes in total" in capsys.readouterr().out
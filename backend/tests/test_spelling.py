@@ -0,0 +1,52 @@
+"""Tests for the offline spelling engine."""
+import pytest
+from textblob import Word
+
+from app.utils.spelling import SpellChecker, get_spell_checker, osa_distance
+
+
+@pytest.fixture(scope="module")
+def checker():
+    return get_spell_checker()
+
+
+def test_osa_distance():
+    assert osa_distance("teh", "the", 2) == 1
+    assert osa_distance("gooing", "going", 2) == 1
+    assert osa_distance("speling", "spelling", 2) == 1
+    assert osa_distance("abc", "abc", 2) == 0
+    assert osa_distance("abcdef", "a", 2) == 3
+
+
+@pytest.mark.parametrize("word", [
+    "gooing", "mistaks", "teh", "recieve", "speling", "definately", "seperate",
+    "untill", "tommorow", "beleive", "freind", "enviroment", "goverment", "wich",
+])
+def test_suggestions_match_textblob(checker, word):
+    assert checker.suggest(word) == str(Word(word).correct())
+
+
+def test_known_words_and_capitalization(checker):
+    assert checker.suggest("going") is None
+    assert checker.suggest("Going") is None
+    assert checker.suggest("Gooing") == "Going"
+
+
+def test_check_reports_offsets(checker):
+    text = "I hope your day is gooing   grate.\nThis text has many mistaks."
+    found = {(start, end, word, suggestion) for start, end, word, suggestion in checker.check(text)}
+    start = text.index("gooing")
+    assert (start, start + 6, "gooing", "going") in found
+    start = text.index("mistaks")
+    assert (start, start + 7, "mistaks", "mistake") in found
+
+
+def test_distance_two_uses_index():
+    checker = SpellChecker({"elephant": 10, "giraffe": 50})
+    assert checker.suggest("elefant") == "elephant"
+    assert checker.suggest("zzzzzzzz") is None
+
+
+def test_accented_words_are_not_mangled(checker):
+    text = "The naïve café owner misspeled nothing else."
+    assert [word for _, _, word, _ in checker.check(text)] == ["misspeled"]
@@ -0,0 +1,148 @@
+"""Tests for the NumPy LSA summarizer against sumy's LsaSummarizer."""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from sumy.models.dom import ObjectDocumentModel, Paragraph, Sentence
+from sumy.nlp.stemmers import Stemmer
+from sumy.summarizers.lsa import LsaSummarizer as SumyLsaSummarizer
+from sumy.utils import get_stop_words
+
+from app.utils.summarizer import (
+    CentroidSummarizer, LsaSummarizer, StreamingSummary, TextRankSummarizer, get_summarizer, summary_length
+)
+from app.utils.tokenizer import segment, summary_words
+
+VOCABULARY = (
+    "the cat dog runs running ran quickly slow garden house river bank money "
+    "study studies studied learning learner of and a is was history science city"
+).split()
+
+
+class _Words:
+    language = "english"
+
+    def to_words(self, sentence):
+        return summary_words(sentence)
+
+
+def _sumy(sentences):
+    """sumy's LSA (what /summarize used before) over the same sentences: (ranks, summary)."""
+    summarizer = SumyLsaSummarizer(Stemmer("english"))
+    summarizer.stop_words = get_stop_words("english")
+    document = ObjectDocumentModel([Paragraph([Sentence(s.text, _Words()) for s in sentences])])
+    dictionary = summarizer._create_dictionary(document)
+    matrix = summarizer._compute_term_frequency(summarizer._create_matrix(document, dictionary))
+    _, sigma, v = np.linalg.svd(matrix, full_matrices=False)
+    ranks = np.array(summarizer._compute_ranks(sigma, v))
+    summary = " ".join(str(s) for s in summarizer(document, summary_length(len(sentences))))
+    return ranks, summary
+
+
+def _random_text(rng, sentences):
+    return " ".join(
+        " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(3, 12))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def test_matches_sumy_on_random_documents():
+    rng = random.Random(0)
+    summarizer = LsaSummarizer()
+    for _ in range(50):
+        text = _random_text(rng, rng.randint(3, 25))
+        sentences = segment(text).sentences
+        ranks = summarizer.rank([summary_words(s.text) for s in sentences])
+        sumy_ranks, sumy_summary = _sumy(sentences)
+        assert np.allclose(ranks, sumy_ranks)
+
+        # With a tie at the cut-off, sumy's pick depends on SVD rounding noise
+        ordered = np.sort(ranks)[::-1]
+        count = summary_length(len(sentences))
+        if count >= len(sentences) or not np.isclose(ordered[count - 1], ordered[count]):
+            assert summarizer.summarize(text) == sumy_summary
+
+
+def test_short_and_empty_documents():
+    summarizer = LsaSummarizer()
+    assert summarizer.summarize("One sentence. Two sentences.") == "One sentence. Two sentences."
+    assert summarizer.summarize("The. A. Of. And.") == ""
+
+
+def test_truncated_svd_matches_exact_ranks_at_full_rank():
+    rng = random.Random(1)
+    sentences = [summary_words(_random_text(rng, 1)) for _ in range(30)]
+    exact = LsaSummarizer().rank(sentences)
+    _, _, _, terms = LsaSummarizer()._term_counts(sentences)
+    truncated = LsaSummarizer(components=min(terms, len(sentences)) - 1, oversample=30).rank(sentences)
+    # Dropping only the smallest singular value barely moves the ranks
+    assert np.corrcoef(exact, truncated)[0, 1] > 0.99
+
+
+def test_streaming_summary_keeps_bounded_levels():
+    rng = random.Random(2)
+    sentences = [_random_text(rng, 1) for _ in range(2000)]
+    summary = StreamingSummary(LsaSummarizer(), window=20)
+    finished = []
+    for i in range(0, len(sentences), 37):
+        finished.extend(summary.extend(sentences[i:i + 37]))
+        assert all(len(level) < 20 for level in summary.levels)
+
+    assert len(finished) == summary.sections == 100
+    assert summary.sentences == 2000
+    final = summary.finish()
+    assert final
+    # Every kept sentence comes from the input, in document order
+    positions = [sentences.index(s + ".") for s in final[:-1].split(". ")]
+    assert positions == sorted(positions)
+
+
+def test_streaming_summary_of_short_input_is_the_input():
+    summary = StreamingSummary(LsaSummarizer(), window=20)
+    assert summary.extend(["One sentence.", "Two sentences."]) == []
+    assert summary.finish() == "One sentence. Two sentences."
+
+
+def _dense_tfidf(summarizer, sentences):
+    rows, cols, values, terms = summarizer._tfidf(sentences)
+    matrix = np.zeros((terms, len(sentences)))
+    matrix[rows, cols] = values
+    return matrix
+
+
+def test_textrank_matches_dense_pagerank():
+    rng = random.Random(3)
+    sentences = [summary_words(_random_text(rng, 1)) for _ in range(40)] + [["the", "of"]]
+    summarizer = TextRankSummarizer(tolerance=1e-12, max_iterations=1000)
+    matrix = _dense_tfidf(summarizer, sentences)
+    graph = matrix.T @ matrix
+    np.fill_diagonal(graph, 0.0)
+    degree = graph.sum(axis=1)
+    transition = np.divide(graph, degree[:, None], out=np.full_like(graph, 1.0 / len(sentences)),
+                           where=degree[:, None] > 0)
+    scores = np.full(len(sentences), 1.0 / len(sentences))
+    for _ in range(1000):
+        scores = 0.15 / len(sentences) + 0.85 * transition.T @ scores
+
+    ranks = summarizer.rank(sentences)
+    assert np.allclose(ranks[:-1], scores[:-1])
+    assert ranks[-1] == 0  # Only stop words
+
+
+def test_centroid_matches_dense_cosine():
+    rng = random.Random(4)
+    sentences = [summary_words(_random_text(rng, 1)) for _ in range(40)]
+    summarizer = CentroidSummarizer()
+    matrix = _dense_tfidf(summarizer, sentences)
+    centroid = matrix.mean(axis=1)
+    expected = matrix.T @ centroid / np.linalg.norm(centroid)
+    assert np.allclose(summarizer.rank(sentences), expected)
+
+
+def test_registry_returns_shared_instances():
+    assert get_summarizer("textrank") is get_summarizer("textrank")
+    assert isinstance(get_summarizer("centroid"), CentroidSummarizer)
+    assert get_summarizer().identity == "lsa"
+    with pytest.raises(ValueError):
+        get_summarizer("nope")
@@ -0,0 +1,185 @@
+"""Tests for the memory-mapped synonym index (built from a small stand-in for WordNet)."""
+import pytest
+
+from app.utils import synonyms
+from app.utils.synonyms import SynonymIndex, build_index, signature, wordnet_entries
+
+
+class _Lemma:
+    def __init__(self, name, count):
+        self._name, self._count = name, count
+
+    def name(self):
+        return self._name
+
+    def count(self):
+        return self._count
+
+
+class _Synset:
+    def __init__(self, name, definition, *lemmas):
+        self._name, self._definition = name, definition
+        self._lemmas = [_Lemma(name, count) for name, count in lemmas]
+
+    def name(self):
+        return self._name
+
+    def definition(self):
+        return self._definition
+
+    def examples(self):
+        return []
+
+    def lemmas(self):
+        return self._lemmas
+
+
+class FakeWordNet:
+    """Just the parts of nltk's WordNet reader the index builder uses."""
+
+    SYNSETS = [
+        _Synset("happy.a.01", "enjoying or showing joy", ("happy", 10), ("felicitous", 1), ("glad", 3)),
+        _Synset("glad.s.02", "eagerly disposed to act", ("glad", 5), ("happy", 2), ("beaming", 0)),
+        _Synset("hot_dog.n.01", "a frankfurter served on a bun", ("hot_dog", 2), ("frank", 1), ("wiener", 3)),
+        _Synset("run.v.01", "move fast on foot", ("run", 40), ("go", 5)),
+        _Synset("bank.n.01", "sloping land beside a river", ("bank", 20), ("riverbank", 2), ("shore", 1)),
+        _Synset("bank.n.02", "a financial institution that accepts deposits of money", ("bank", 40),
+                ("depository financial institution", 1), ("banking company", 1)),
+    ]
+    _exception_map = {"v": {"ran": ["run"]}}
+
+    def all_lemma_names(self):
+        return sorted({l.name().lower() for s in self.SYNSETS for l in s.lemmas()})
+
+    def synsets(self, word):
+        # Like WordNet's morphy: the word itself, its irregular base forms and its regular ones
+        forms = {word, *self._exception_map["v"].get(word, [])}
+        forms.update(word[:-len(suffix)] + replacement for suffix, replacement in synonyms._SUFFIX_RULES
+                     if word.endswith(suffix) and len(word) > len(suffix))
+        return [s for s in self.SYNSETS if any(l.name().lower() in forms for l in s.lemmas())]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "synonyms.idx"
+    build_index(wordnet_entries(FakeWordNet()), str(path), version="fake-1")
+    return SynonymIndex(str(path))
+
+
+def test_rank_returns_deduplicated_synonyms_by_sense(index):
+    assert index.version == "fake-1"
+    # The sense happy is used in most first (happy: 10 vs 2), members by their own use
+    assert index.rank("happy", top_k=0) == ["glad", "felicitous", "beaming"]
+    assert index.rank("Happy", top_k=0) == ["glad", "felicitous", "beaming"]
+    assert index.rank("hot dog", top_k=0) == ["wiener", "frank"]
+    assert index.rank("xyzabc") is None
+
+
+def test_rank_covers_inflections(index):
+    # Base forms are not synonyms, for irregular forms (indexed at build time) and regular ones (suffix rules)
+    assert index.rank("ran", top_k=0) == ["go"]
+    assert index.rank("runs", top_k=0) == ["go"]
+    assert index.rank("wieners", top_k=0) == ["hot dog", "frank"]
+
+
+def test_every_word_is_found(tmp_path):
+    entries = [(f"word{i}", [(f"sense{i}", (f"synonym{i}", f"synonym{i + 1}"), 1, ())], []) for i in range(5000)]
+    path = tmp_path / "synonyms.idx"
+    build_index(entries, str(path))
+    index = SynonymIndex(str(path))
+    assert index.words == 5000
+    assert index.senses_count == 5000
+    for word, senses, _ in entries:
+        assert index.rank(word, top_k=0) == list(senses[0][1])
+
+
+def test_empty_index(tmp_path):
+    path = tmp_path / "synonyms.idx"
+    build_index([], str(path))
+    assert SynonymIndex(str(path)).rank("anything") is None
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "synonyms.idx"
+    path.write_bytes(b"not an index" * 10)
+    with pytest.raises(ValueError):
+        SynonymIndex(str(path))
+
+
+def test_endpoint_serves_from_index(index, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.utils import synonyms
+
+    monkeypatch.setattr(synonyms, "synonym_index", index)
+    client = TestClient(app)
+
+    response = client.post("/api/synonyms", json={"word": "Happy"})
+    assert response.json() == {"synonyms": ["glad", "felicitous", "beaming"]}
+    # The context picks the sense
+    response = client.post("/api/synonyms", json={"word": "bank", "text": "We sat on the bank of the river."})
+    assert response.json()["synonyms"][0] == "riverbank"
+    # Words WordNet doesn't know still get the built-in fallback
+    response = client.post("/api/synonyms", json={"word": "good"})
+    assert response.json()["synonyms"] == ["excellent", "great", "superb", "fine"]
+
+
+def test_bulk_endpoint_dedupes_and_revalidates(index, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.utils import synonyms
+
+    monkeypatch.setattr(synonyms, "synonym_index", index)
+    client = TestClient(app)
+
+    response = client.post("/api/synonyms/bulk", json={"words": ["Happy", "happy", " ran ", "xyzabc"]})
+    assert response.status_code == 200
+    assert response.json() == {"synonyms": {
+        "happy": ["glad", "felicitous", "beaming"], "ran": ["go"], "xyzabc": []}}
+    etag = response.headers["etag"]
+    assert "max-age" in response.headers["cache-control"]
+
+    # Same words, same data: nothing to send
+    response = client.get("/api/synonyms/bulk", params={"words": "happy,ran,xyzabc"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    # Words taken from the text when no list is given
+    response = client.post("/api/synonyms/bulk", json={"text": "Happy wieners ran.", "words": None},
+                           headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert list(response.json()["synonyms"]) == ["happy", "wieners", "ran"]
+
+    # New synonym data invalidates every ETag
+    monkeypatch.setattr(index, "version", "fake-2")
+    response = client.get("/api/synonyms/bulk", params={"words": "happy,ran,xyzabc"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_context_ranks_the_fitting_sense_first(index):
+    # Without context the more frequent (financial) sense wins
+    assert index.rank("bank")[:2] == ["depository financial institution", "banking company"]
+    river = signature("Fish swam near the muddy river banks.")
+    assert index.rank("bank", river)[:2] == ["riverbank", "shore"]
+    assert index.rank("banks", river)[:2] == ["riverbank", "shore"]
+    money = signature("She deposited her money.")
+    assert index.rank("bank", money)[0] == "depository financial institution"
+    assert index.rank("xyzabc", river) is None
+
+
+def test_top_k_truncates(index, monkeypatch):
+    assert index.rank("bank", top_k=3) == ["depository financial institution", "banking company", "riverbank"]
+    monkeypatch.setattr(synonyms, "SYNONYMS_TOP_K", 1)
+    assert index.rank("bank", signature("river")) == ["riverbank"]
+    assert index.rank("happy") == ["glad"]
+
+
+@pytest.mark.parametrize("word", ["happy", "glad", "hot dog", "bank", "banks", "run", "runs", "ran", "wieners"])
+@pytest.mark.parametrize("context", [None, "the river bank", "She deposited money and ran home happy."])
+def test_wordnet_fallback_ranks_like_the_index(index, word, context):
+    wordnet = FakeWordNet()
+    context = signature(context) if context else None
+    live = synonyms.rank_senses(word, synonyms.wordnet_senses(wordnet, word), context, top_k=0)
+    assert live == index.rank(word, context, top_k=0)
+    assert word not in live
@@ -0,0 +1,92 @@
+"""Tests for the span-aware tokenizer."""
+import pytest
+
+from app.api.endpoints import _diff_errors
+from app.utils import tokenizer
+from app.utils.tokenizer import SentenceStream, clear_segment_cache, iter_words, segment, summary_words
+
+MESSY = "I  has a apple.\tShe go to school!\n\n  Is it   ok?  "
+
+
+@pytest.fixture(params=["punkt", "regex"])
+def splitter(request, monkeypatch):
+    if request.param == "regex":
+        monkeypatch.setattr(tokenizer, "_punkt", None)
+        monkeypatch.setattr(tokenizer, "_punkt_loaded", True)
+    clear_segment_cache()
+    yield request.param
+    clear_segment_cache()
+
+
+def test_iter_words_yields_exact_offsets():
+    text = "Hello,\tworld!\n\nIt's  fine."
+    for start, end, word in iter_words(text):
+        assert text[start:end] == word
+    assert [w for _, _, w in iter_words(text)] == ["Hello", "world", "It", "s", "fine"]
+
+
+def test_words_keep_accented_letters():
+    text = "A naïve café owner in Zürich."
+    assert [w for _, _, w in iter_words(text)] == ["A", "naïve", "café", "owner", "in", "Zürich"]
+    assert [w.text for w in segment(text).words] == ["A", "naïve", "café", "owner", "in", "Zürich"]
+
+
+def test_segment_cache_is_bounded_by_text_length(monkeypatch):
+    cache = tokenizer._SegmentCache(max_chars=100, max_text_chars=40)
+    monkeypatch.setattr(tokenizer, "_segment_cache", cache)
+
+    first = segment("First sentence here. ")
+    assert segment("First sentence here. ") is first
+    for i in range(10):
+        segment(f"Sentence number {i} is short. ")
+    assert cache.chars <= 100
+    assert segment("First sentence here. ") is not first  # Evicted
+
+    long_text = "Too long to cache. " * 5
+    assert segment(long_text) is not segment(long_text)
+    assert long_text not in cache._data
+
+
+def test_segment_offsets_survive_irregular_whitespace(splitter):
+    doc = segment(MESSY)
+    assert [s.text for s in doc.sentences] == ["I  has a apple.", "She go to school!", "Is it   ok?"]
+    for sentence in doc.sentences:
+        assert MESSY[sentence.start:sentence.end] == sentence.text
+        for token in sentence.tokens:
+            assert MESSY[token.start:token.end] == token.text
+    for word in doc.words:
+        assert MESSY[word.start:word.end] == word.text
+
+
+def test_diff_errors_use_absolute_offsets(splitter):
+    sentence = segment(MESSY).sentences[1]
+    errors = _diff_errors(sentence, "She goes to school!")
+    assert len(errors) == 1
+    assert MESSY[errors[0].position.start:errors[0].position.end] == "go"
+    assert errors[0].suggestion == "goes"
+
+
+def test_summary_words_skip_punctuation_and_numbers():
+    assert summary_words("It's a well-known fact, 42 times over.") == [
+        "It's", "a", "well-known", "fact", "times", "over"]
+
+
+def test_sentence_stream_matches_segment_for_any_chunking(splitter):
+    text = ("Première phrase ici.  Second one\tfollows! " * 20) + "Last one has no stop"
+    data = text.encode("utf-8")
+    expected = [s.text for s in segment(text).sentences]
+    for size in (1, 3, 7, 64, len(data)):
+        stream = SentenceStream()
+        sentences = []
+        for i in range(0, len(data), size):  # Splits multi-byte characters too
+            sentences.extend(stream.feed(data[i:i + size]))
+            assert len(stream._pending) < 100
+        sentences.extend(stream.close())
+        assert sentences == expected
+
+
+def test_sentence_stream_cuts_unterminated_text():
+    stream = SentenceStream(max_pending=50)
+    sentences = stream.feed("word " * 100)
+    assert sentences and all(len(s) <= 50 for s in sentences)
+    assert len(stream._pending) <= 50